@@ -1,35 +1,96 @@
-import requests
-from bs4 import BeautifulSoup
 import time
 import random
-import re
-from openpyxl import Workbook
-from openpyxl.styles import Font
 import sys
+import argparse
 import logging
 import os
+import tempfile
 from datetime import datetime
-import cloudscraper
 import urllib.parse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import transport
+import rate_limiter
+import disk_cache
+import sanction_index
+import gtip_extractor
+import html_stream
+import country_matcher
+import redirect_resolver
+import query_planner
+import crawl_cache
+import exporters
+import result_record
+from normalize import normalize_key
+import batch
+import log_config
+import profiler
+from collections import Counter
+from contextlib import contextmanager
 
-print("🚀 OTOMATİK RİSK ANALİZLİ TİCARET SİSTEMİ")
-
-# Logging setup
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(f'analysis_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'),
-        logging.StreamHandler()
-    ]
-)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 class Config:
     def __init__(self):
+        self.DEMO_MODE = os.environ.get('DEMO_MODE', '1') != '0'
         self.MAX_RESULTS = 10
         self.REQUEST_TIMEOUT = 30
         self.RETRY_ATTEMPTS = 1
+        self.RETRY_BACKOFF = 0.5
+        self.POOL_CONNECTIONS = 10
+        self.POOL_MAXSIZE = 10
+        self.HOST_POOL_SIZES = {
+            'duckduckgo.com': 4,
+            'eur-lex.europa.eu': 4,
+        }
+        # Uç noktalar ortamdan değiştirilebilir (ör. benchmark için yerel fixture_server)
+        self.SEARCH_URL = os.environ.get('SEARCH_URL', 'https://duckduckgo.com/html/')
+        self.EURLEX_SEARCH_URL = os.environ.get('EURLEX_SEARCH_URL', 'https://eur-lex.europa.eu/search.html')
+        self.SANCTION_CACHE_PATH = os.environ.get(
+            'SANCTION_CACHE_PATH',
+            os.path.join(tempfile.gettempdir(), 'ticaret_analiz_cache.sqlite3')
+        )
+        self.SANCTION_CACHE_TTL = 7 * 24 * 3600
+        self.SANCTION_CACHE_MAX_ENTRIES = 5000
+        # Boş bırakılırsa arama önbelleği yalnız bellekte tutulur
+        self.SEARCH_CACHE_PATH = os.environ.get('SEARCH_CACHE_PATH', self.SANCTION_CACHE_PATH)
+        self.SEARCH_CACHE_TTL = 6 * 3600
+        self.SEARCH_CACHE_MAX_ENTRIES = 2000
+        # Host bazlı hız sınırı: (istek/saniye, burst); 429/403'te otomatik düşer.
+        # Tanımsız host'lar (ör. yerel mock sunucu) için varsayılan ortamdan '2.0,4' biçiminde verilebilir
+        self.RATE_LIMIT_PATH = os.environ.get('RATE_LIMIT_PATH', self.SANCTION_CACHE_PATH)
+        self.RATE_LIMIT_DEFAULT = rate_limiter.parse_limit(os.environ.get('RATE_LIMIT_DEFAULT'), (2.0, 4))
+        self.HOST_RATE_LIMITS = {
+            'duckduckgo.com': (0.5, 1),
+            'eur-lex.europa.eu': (1.0, 2),
+        }
+        self.RATE_LIMIT_MIN_RATE = 0.05
+        self.RATE_LIMIT_MAX_WAIT = 30
+        # Sorgu şablonu verim istatistikleri; bu kadar güçlü URL bulununca arama durur
+        self.QUERY_STATS_PATH = os.environ.get('QUERY_STATS_PATH', self.SANCTION_CACHE_PATH)
+        self.QUERY_TARGET_STRONG_HITS = 8
+        # Crawl önbelleği: taze kayıt ağa çıkmaz, eskisi koşullu GET ile doğrulanır
+        self.CRAWL_CACHE_PATH = os.environ.get('CRAWL_CACHE_PATH', self.SANCTION_CACHE_PATH)
+        self.CRAWL_CACHE_FRESH = 3600
+        self.CRAWL_CACHE_TTL = 7 * 24 * 3600
+        self.CRAWL_CACHE_MAX_ENTRIES = 20000
+        self.SANCTION_LIST_PATH = os.environ.get(
+            'SANCTION_LIST_PATH',
+            os.path.join(BASE_DIR, 'data', 'eu_russia_sanction_annex.txt')
+        )
+        self.SANCTION_LIST_URL = os.environ.get('SANCTION_LIST_URL', '')
+        self.SANCTION_LIST_REFRESH = 24 * 3600
+        # Anlık görüntü tüm eki kapsıyorsa listede olmayan kodlar EUR-Lex'e sorulmaz
+        self.SANCTION_INDEX_COMPLETE = os.environ.get('SANCTION_INDEX_COMPLETE', '0') == '1'
         self.MAX_GTIP_CHECK = 3
+        self.MAX_CRAWL_CONCURRENCY = 6
+        self.PER_HOST_CONCURRENCY = 2
+        # uddg parametresi olmayan yönlendirmeler için arama başına en fazla HEAD
+        self.REDIRECT_MAX_HEADS = 4
+        self.MAX_PARSE_BYTES = 2 * 1024 * 1024
+        self.MAX_PARSE_CHARS = 500000
+        self.STREAM_CHUNK_SIZE = 64 * 1024
+        self.BATCH_WORKERS = 4
         self.USER_AGENTS = [
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -39,140 +100,298 @@ class Config:
 class SmartCrawler:
     def __init__(self, config):
         self.config = config
-        self.scraper = cloudscraper.create_scraper()
+        self.crawl_cache = crawl_cache.CrawlCache(config)
+        # host -> [semafor, bekleyen + çalışan sayısı]; kullanan kalmayınca silinir
+        self._host_slots = {}
+        self._host_slots_lock = threading.Lock()
+    
+    @property
+    def scraper(self):
+        """Paylaşılan cloudscraper oturumu - ilk kullanımda oluşturulur"""
+        return transport.get_scraper(self.config)
+    
+    def crawl_many(self, urls, target_country, max_concurrency=None):
+        """Toplu crawl - sonuçları bittikçe (url, sonuç) olarak döndürür"""
+        max_concurrency = max_concurrency or self.config.MAX_CRAWL_CONCURRENCY
+        ordered_urls = self._interleave_by_host(urls)
+        if not ordered_urls:
+            return
+        
+        executor = ThreadPoolExecutor(max_workers=min(max_concurrency, len(ordered_urls)))
+        try:
+            futures = {
+                log_config.submit_with_context(
+                    executor, profiler.traced(self._crawl_with_host_limit), url, target_country
+                ): url
+                for url in ordered_urls
+            }
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logging.warning("❌ Toplu crawl hatası: %s", e, extra=log_config.sampled(url=url))
+                    result = {'country_found': False, 'gtip_codes': [], 'content_preview': '', 'status_code': 'ERROR'}
+                yield url, result
+        finally:
+            # Tüketici erken durursa bekleyen işleri iptal et
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _interleave_by_host(self, urls):
+        """Aynı host'a ait URL'leri sıraya dağıt - host limiti havuzu tıkamasın"""
+        by_host = {}
+        for url in dict.fromkeys(u for u in urls if u):
+            by_host.setdefault(urllib.parse.urlparse(url).netloc.lower(), []).append(url)
+        
+        ordered = []
+        queues = list(by_host.values())
+        while queues:
+            ordered.extend(queue.pop(0) for queue in queues)
+            queues = [queue for queue in queues if queue]
+        return ordered
+    
+    def _acquire_host_slot(self, host):
+        """Host semaforunu al (yoksa oluştur) ve kullanıcı sayısını artır"""
+        with self._host_slots_lock:
+            entry = self._host_slots.get(host)
+            if entry is None:
+                entry = self._host_slots[host] = [threading.BoundedSemaphore(self.config.PER_HOST_CONCURRENCY), 0]
+            entry[1] += 1
+            return entry[0]
+    
+    def _release_host_slot(self, host):
+        """Son kullanıcı çıkınca host kaydını sil - uzun ömürlü analyzer'da birikmesin"""
+        with self._host_slots_lock:
+            entry = self._host_slots[host]
+            entry[1] -= 1
+            if not entry[1]:
+                del self._host_slots[host]
+    
+    def _crawl_with_host_limit(self, url, target_country):
+        """Host başına eşzamanlılık limitiyle crawl"""
+        host = urllib.parse.urlparse(url).netloc.lower()
+        slot = self._acquire_host_slot(host)
+        try:
+            with slot:
+                return self.smart_crawl(url, target_country)
+        finally:
+            self._release_host_slot(host)
     
     def smart_crawl(self, url, target_country):
         """Akıllı crawl"""
-        print(f"   🌐 Crawl: {url[:60]}...")
+        page, content = self.crawl_cache.lookup(url, target_country)
+        if page is not None and self.crawl_cache.is_fresh(page):
+            logging.info("📦 Önbellekten crawl: %s", url, extra=log_config.sampled(url=url))
+            return crawl_cache.result_from_content(content, target_country)
+        cached = (page, content) if page is not None else None
+        
+        logging.info("🌐 Crawl: %s", url, extra=log_config.sampled(url=url))
         
         # Önce cloudscraper ile dene
-        result = self._try_cloudscraper(url, target_country)
+        result = self._try_cloudscraper(url, target_country, cached)
         if result['status_code'] == 200:
             return result
         
         # Cloudscraper başarısızsa normal requests ile dene
-        result = self._try_requests(url, target_country)
+        result = self._try_requests(url, target_country, cached)
         if result['status_code'] == 200:
             return result
         
-        print(f"   🔍 Sayfa erişilemiyor")
+        logging.info("🔍 Sayfa erişilemiyor: %s", url, extra=log_config.sampled(url=url))
         return {'country_found': False, 'gtip_codes': [], 'content_preview': '', 'status_code': 'BLOCKED'}
     
-    def _try_cloudscraper(self, url, target_country):
+    def _try_cloudscraper(self, url, target_country, cached=None):
         """Cloudscraper ile dene"""
         try:
             headers = {
                 'User-Agent': random.choice(self.config.USER_AGENTS),
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             }
+            if cached:
+                headers.update(self.crawl_cache.conditional_headers(cached[0]))
             
-            response = self.scraper.get(url, headers=headers, timeout=15)
+            response = self.scraper.get(url, headers=headers, timeout=15, stream=True)
             
-            if response.status_code == 200:
-                print(f"   ✅ Cloudscraper başarılı: {url}")
-                return self._parse_content(response.text, target_country, response.status_code)
+            if response.status_code == 304 and cached:
+                response.close()
+                logging.info("♻️ Sayfa değişmemiş (304): %s", url, extra=log_config.sampled(url=url))
+                self.crawl_cache.touch(url, cached[0], response.headers)
+                return crawl_cache.result_from_content(cached[1], target_country)
+            elif response.status_code == 200:
+                logging.info("✅ Cloudscraper başarılı: %s", url, extra=log_config.sampled(url=url))
+                return self._parse_response(url, response, target_country)
             else:
-                print(f"   ❌ Cloudscraper hatası {response.status_code}: {url}")
+                logging.warning("❌ Cloudscraper hatası %s: %s", response.status_code, url,
+                                extra=log_config.sampled(url=url, status=response.status_code))
                 return {'country_found': False, 'gtip_codes': [], 'content_preview': '', 'status_code': response.status_code}
                 
         except Exception as e:
-            print(f"   ❌ Cloudscraper hatası: {e}")
+            logging.warning("❌ Cloudscraper hatası: %s", e, extra=log_config.sampled(url=url))
             return {'country_found': False, 'gtip_codes': [], 'content_preview': '', 'status_code': 'ERROR'}
     
-    def _try_requests(self, url, target_country):
+    def _try_requests(self, url, target_country, cached=None):
         """Normal requests ile dene"""
         try:
             headers = {
                 'User-Agent': random.choice(self.config.USER_AGENTS),
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             }
+            if cached:
+                headers.update(self.crawl_cache.conditional_headers(cached[0]))
             
-            response = requests.get(url, headers=headers, timeout=15)
+            response = transport.get_session(self.config).get(url, headers=headers, timeout=15, stream=True)
             
-            if response.status_code == 200:
-                print(f"   ✅ Requests başarılı: {url}")
-                return self._parse_content(response.text, target_country, response.status_code)
+            if response.status_code == 304 and cached:
+                response.close()
+                logging.info("♻️ Sayfa değişmemiş (304): %s", url, extra=log_config.sampled(url=url))
+                self.crawl_cache.touch(url, cached[0], response.headers)
+                return crawl_cache.result_from_content(cached[1], target_country)
+            elif response.status_code == 200:
+                logging.info("✅ Requests başarılı: %s", url, extra=log_config.sampled(url=url))
+                return self._parse_response(url, response, target_country)
             else:
-                print(f"   ❌ Requests hatası {response.status_code}: {url}")
+                logging.warning("❌ Requests hatası %s: %s", response.status_code, url,
+                                extra=log_config.sampled(url=url, status=response.status_code))
                 return {'country_found': False, 'gtip_codes': [], 'content_preview': '', 'status_code': response.status_code}
                 
         except Exception as e:
-            print(f"   ❌ Requests hatası: {e}")
+            logging.warning("❌ Requests hatası: %s", e, extra=log_config.sampled(url=url))
             return {'country_found': False, 'gtip_codes': [], 'content_preview': '', 'status_code': 'ERROR'}
     
-    def _parse_content(self, html, target_country, status_code):
-        """İçerik analizi"""
+    def _parse_response(self, url, response, target_country):
+        """Yanıtı bütçe dahilinde oku; aynı içerik daha önce ayrıştırıldıysa tekrar ayrıştırma"""
         try:
-            soup = BeautifulSoup(html, 'html.parser')
-            text_content = soup.get_text()
-            text_lower = text_content.lower()
+            # Charset başlıkta yoksa lxml sayfadaki meta etiketinden tespit etsin
+            content_type = response.headers.get('Content-Type', '').lower()
+            encoding = response.encoding if 'charset=' in content_type else None
+            body = self._read_body(response)
+        finally:
+            response.close()
+        
+        digest = crawl_cache.content_hash(body)
+        content = self.crawl_cache.get_content(digest, target_country)
+        if content is not None:
+            logging.info("📦 Aynı içerik önbellekte: %s", url, extra=log_config.sampled(url=url))
+            self.crawl_cache.store(url, target_country, response.headers, digest)
+            return crawl_cache.result_from_content(content, target_country, response.status_code)
+        
+        result = self._parse_content(body, target_country, response.status_code, encoding=encoding)
+        if result['status_code'] != 'PARSE_ERROR':
+            content = {key: result[key] for key in ('countries', 'gtip_codes', 'gtip_context', 'gtip_full_codes', 'content_preview')}
+            self.crawl_cache.store(url, target_country, response.headers, digest, content)
+        return result
+    
+    def _read_body(self, response):
+        """Gövdeyi MAX_PARSE_BYTES'a kadar oku - kalan kısım indirilmez"""
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=self.config.STREAM_CHUNK_SIZE):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.config.MAX_PARSE_BYTES:
+                break
+        return b''.join(chunks)[:self.config.MAX_PARSE_BYTES]
+    
+    def _parse_content(self, html, target_country, status_code, encoding=None):
+        """İçerik analizi - metin parçaları bütçe dahilinde tek geçişte dedektörlere akar"""
+        try:
+            matcher = country_matcher.get_matcher(target_country)
+            target_key = country_matcher.country_key(target_country)
+            country_hits = Counter()
+            gtip_matches = {}
+            gtip_full_codes = {}
+            preview = ''
             
-            country_found = self._check_country(text_lower, target_country)
-            gtip_codes = self.extract_gtip_codes(text_content)
+            text_chunks = html_stream.iter_text_chunks(
+                html,
+                max_bytes=self.config.MAX_PARSE_BYTES,
+                max_chars=self.config.MAX_PARSE_CHARS,
+                chunk_size=self.config.STREAM_CHUNK_SIZE,
+                encoding=encoding
+            )
+            for chunk in text_chunks:
+                country_hits.update(matcher.scan(chunk))
+                
+                # Pozisyon (4 hane) gösterim için, tam kod yaptırım kontrolü için
+                for heading, full_code, context in gtip_extractor.iter_gtip_matches(chunk):
+                    if gtip_matches.get(heading) != gtip_extractor.EXPLICIT:
+                        gtip_matches[heading] = context
+                    gtip_full_codes[full_code] = None
+                
+                if len(preview) <= 200:
+                    preview += chunk[:201 - len(preview)]
             
-            print(f"   🔍 Sayfa analizi: Ülke={country_found}, GTIP={gtip_codes[:3]}")
+            gtip_codes = list(gtip_matches)
+            country_found = country_hits[target_key] > 0
+            
+            logging.info("🔍 Sayfa analizi: Ülke=%s, GTIP=%s", country_found, gtip_codes[:3],
+                         extra=log_config.sampled(country_found=country_found, gtip_codes=gtip_codes))
             
             return {
                 'country_found': country_found,
+                'countries': dict(country_hits),
                 'gtip_codes': gtip_codes,
-                'content_preview': text_content[:200] + "..." if len(text_content) > 200 else text_content,
+                'gtip_context': gtip_matches,
+                'gtip_full_codes': gtip_extractor.most_specific(gtip_full_codes),
+                'content_preview': preview[:200] + "..." if len(preview) > 200 else preview,
                 'status_code': status_code
             }
         except Exception as e:
-            print(f"   ❌ Parse hatası: {e}")
+            logging.error("❌ Parse hatası: %s", e)
             return {'country_found': False, 'gtip_codes': [], 'content_preview': '', 'status_code': 'PARSE_ERROR'}
     
     def _check_country(self, text_lower, target_country):
-        """Ülke kontrolü"""
-        country_variations = [
-            target_country.lower(),
-            'russia', 'rusya', 'rusian', 'rus'
-        ]
-        
-        for country_var in country_variations:
-            if country_var in text_lower:
-                return True
-        
-        return False
+        """Ülke kontrolü - kelime sınırlı takma ad eşleşmesi"""
+        hits = country_matcher.get_matcher(target_country).scan(text_lower)
+        return hits[country_matcher.country_key(target_country)] > 0
     
     def extract_gtip_codes(self, text):
-        """GTIP kod çıkarma"""
-        patterns = [
-            r'\b\d{4}\.?\d{0,4}\b',
-            r'\b\d{6}\b',
-            r'\bHS\s?CODE\s?:?\s?(\d{4,8})\b',
-            r'\bGTIP\s?:?\s?(\d{4,8})\b',
-        ]
-        
-        all_codes = set()
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            for match in matches:
-                if isinstance(match, tuple):
-                    match = match[0]
-                
-                code = re.sub(r'[^\d]', '', match)
-                if len(code) >= 4:
-                    all_codes.add(code[:4])
-        
-        return list(all_codes)
+        """GTIP kod çıkarma - tek geçişli, doğrulanmış pozisyonlar"""
+        return gtip_extractor.extract_gtip_codes(text)
+    
+    def extract_gtip_matches(self, text):
+        """GTIP kodları ve bağlamları (açık etiketli / çıplak sayı)"""
+        return gtip_extractor.extract_gtip_matches(text)
+
+class SearchError(Exception):
+    """Canlı modda arama yapılamadı (HTTP hatası, hız sınırı, bağlantı hatası)"""
 
 class SimpleDuckDuckGoSearcher:
     def __init__(self, config):
         self.config = config
-        self.scraper = cloudscraper.create_scraper()
-        print("   🦆 DuckDuckGo arama motoru hazır!")
+        self.search_cache = disk_cache.get_cache(
+            config.SEARCH_CACHE_PATH,
+            'search_results',
+            config.SEARCH_CACHE_TTL,
+            config.SEARCH_CACHE_MAX_ENTRIES
+        )
+        logging.info("🦆 DuckDuckGo arama motoru hazır!")
+    
+    @property
+    def scraper(self):
+        """Paylaşılan cloudscraper oturumu - ilk kullanımda oluşturulur"""
+        return transport.get_scraper(self.config)
     
     def search_simple(self, query, max_results=10):
-        """Basit DuckDuckGo arama - DEMO MOD"""
+        """Arama sonuçları - canlı modda arama başarısızsa boş liste"""
         try:
-            print(f"   🔍 Arama: {query}")
-            
-            time.sleep(2)
+            return self.search(query, max_results)
+        except SearchError:
+            return []
+    
+    def search(self, query, max_results=10):
+        """DuckDuckGo arama - başarısızsa DEMO modda örnek sonuçlar, canlı modda SearchError"""
+        cache_key = f"{normalize_key(query)}|{max_results}"
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            logging.info("📦 Önbellekten arama: %s (%d sonuç)", query, len(cached))
+            return cached
+        
+        try:
+            logging.info("🔍 Arama: %s", query)
             
             # DuckDuckGo'yu deneyelim
-            url = "https://duckduckgo.com/html/"
+            url = self.config.SEARCH_URL
             data = {
                 'q': query,
                 'b': '',
@@ -189,28 +408,37 @@ class SimpleDuckDuckGoSearcher:
             
             if response.status_code == 200:
                 results = self._parse_results(response.text, max_results)
-                print(f"   ✅ {len(results)} sonuç buldu")
+                logging.info("✅ %d sonuç buldu", len(results))
+                self.search_cache.set(cache_key, results)
                 return results
             else:
-                print(f"   ❌ Arama hatası {response.status_code}")
-                return self._search_alternative(query, max_results)
+                logging.warning("❌ Arama hatası %s", response.status_code)
+                return self._search_failed(query, max_results, f"HTTP {response.status_code}")
                 
+        except SearchError:
+            raise
         except Exception as e:
-            print(f"   ❌ Arama hatası: {e}")
+            logging.error("❌ Arama hatası: %s", e)
+            return self._search_failed(query, max_results, str(e))
+    
+    def _search_failed(self, query, max_results, reason):
+        """Canlı modda uydurma sonuç üretilmez; örnek sonuçlar yalnızca DEMO modda"""
+        if self.config.DEMO_MODE:
             return self._search_alternative(query, max_results)
+        raise SearchError(f"{query}: {reason}")
     
     def _search_alternative(self, query, max_results):
         """Alternatif arama - DEMO SONUÇLAR"""
         try:
-            print(f"   🔍 Alternatif arama (DEMO): {query}")
+            logging.info("🔍 Alternatif arama (DEMO): %s", query)
             
             # Demo sonuçlar oluştur
             sample_results = self._generate_sample_results(query, max_results)
-            print(f"   ✅ Alternatif arama: {len(sample_results)} örnek sonuç")
+            logging.info("✅ Alternatif arama: %d örnek sonuç", len(sample_results))
             return sample_results
             
         except Exception as e:
-            print(f"   ❌ Alternatif arama hatası: {e}")
+            logging.error("❌ Alternatif arama hatası: %s", e)
             return []
     
     def _generate_sample_results(self, query, max_results):
@@ -242,12 +470,15 @@ class SimpleDuckDuckGoSearcher:
     
     def _parse_results(self, html, max_results):
         """Sonuç parsing"""
+        from bs4 import BeautifulSoup
+        
         soup = BeautifulSoup(html, 'html.parser')
         results = []
         
         # DuckDuckGo sonuç elementleri
         results_elements = soup.find_all('div', class_=lambda x: x and ('result' in x if x else False))
         
+        candidates = []
         for element in results_elements[:max_results]:
             try:
                 title_elem = element.find('a')
@@ -259,56 +490,59 @@ class SimpleDuckDuckGoSearcher:
                     continue
                     
                 url = title_elem.get('href')
-                
-                if url and ('//duckduckgo.com/l/' in url or url.startswith('/l/')):
-                    url = self._resolve_redirect(url)
-                
-                if not url or not url.startswith('http'):
-                    if url and url.startswith('/'):
-                        url = 'https://duckduckgo.com' + url
-                    else:
-                        continue
+                if not url:
+                    continue
                 
                 snippet = ""
                 snippet_elem = element.find('div', class_=lambda x: x and ('snippet' in x if x else False))
                 if snippet_elem:
                     snippet = snippet_elem.get_text(strip=True)
                 
-                results.append({
-                    'title': title,
-                    'url': url,
-                    'snippet': snippet,
-                    'full_text': f"{title} {snippet}",
-                    'domain': self._extract_domain(url),
-                    'search_engine': 'duckduckgo'
-                })
-                
-                print(f"   📄 {title[:50]}...")
+                candidates.append((title, url, snippet))
                 
             except Exception as e:
                 continue
         
-        return results
-    
-    def _resolve_redirect(self, redirect_url):
-        """Redirect çöz"""
-        try:
-            if redirect_url.startswith('/l/'):
-                redirect_url = 'https://duckduckgo.com' + redirect_url
-            
-            headers = {
-                'User-Agent': random.choice(self.config.USER_AGENTS),
-            }
-            
-            response = requests.get(redirect_url, headers=headers, timeout=5, allow_redirects=False)
+        # Yönlendirme linkleri toplu çözülür (çoğu uddg parametresinden, ağsız)
+        redirects = self._resolve_redirects(
+            url for _, url, _ in candidates if redirect_resolver.is_redirect(url)
+        )
+        
+        for title, url, snippet in candidates:
+            url = redirects.get(url, url)
+            if not url or not url.startswith('http'):
+                # Göreli URL'leri mutlak yap
+                if url and url.startswith('/'):
+                    url = 'https://duckduckgo.com' + url
+                else:
+                    continue
             
-            if response.status_code in [301, 302] and 'Location' in response.headers:
-                return response.headers['Location']
-            else:
-                return redirect_url
+            results.append({
+                'title': title,
+                'url': url,
+                'snippet': snippet,
+                'full_text': f"{title} {snippet}",
+                'domain': self._extract_domain(url),
+                'search_engine': 'duckduckgo'
+            })
             
-        except Exception:
-            return None
+            logging.info("📄 %s", title, extra=log_config.sampled(url=url))
+        
+        return results
+    
+    def _resolve_redirects(self, redirect_urls):
+        """Redirect linklerini çöz - {link: hedef URL ya da None}"""
+        headers = {
+            'User-Agent': random.choice(self.config.USER_AGENTS),
+        }
+        return redirect_resolver.resolve_many(
+            redirect_urls,
+            transport.get_redirect_session(self.config),
+            headers=headers,
+            timeout=5,
+            max_workers=self.config.MAX_CRAWL_CONCURRENCY,
+            max_heads=self.config.REDIRECT_MAX_HEADS
+        )
     
     def _extract_domain(self, url):
         """Domain çıkar"""
@@ -323,47 +557,72 @@ class SimpleQueryGenerator:
     
     @staticmethod
     def generate_queries(company, country):
-        """Sadece 5-6 önemli sorgu"""
-        
-        simple_company = ' '.join(company.split()[:2])
+        """Sadece 5-6 önemli sorgu - anlamca aynı olanlar bir kez"""
+        queries = [query for _, query in query_planner.build_queries(company, country)]
         
-        queries = [
-            f"{simple_company} {country} export",
-            f"{simple_company} {country} import", 
-            f"{simple_company} Russia",
-            f"{simple_company} trade",
-            f"{company} {country}",
-            f"{simple_company} customs",
-        ]
-        
-        print(f"   🔍 {len(queries)} sorgu: {queries}")
+        logging.info("🔍 %d sorgu: %s", len(queries), queries)
         return queries
 
 class QuickEURLexChecker:
     def __init__(self, config):
         self.config = config
-        self.sanction_cache = {}
+        self.sanction_cache = disk_cache.get_cache(
+            config.SANCTION_CACHE_PATH,
+            'sanction_codes',
+            config.SANCTION_CACHE_TTL,
+            config.SANCTION_CACHE_MAX_ENTRIES
+        )
     
     def quick_check_gtip(self, gtip_codes):
-        """GTIP kontrolü"""
+        """Kesin yaptırımlı kodlar (bkz. check_gtip)"""
+        return self.check_gtip(gtip_codes)['sanctioned']
+    
+    def check_gtip(self, gtip_codes):
+        """GTIP kontrolü - {'sanctioned', 'partial', 'unverified'} kod listeleri
+        
+        partial: kodun yalnızca bazı alt pozisyonları listede (kesin yaptırım değil).
+        unverified: yerel indekste yok ve EUR-Lex ile doğrulanamadı.
+        """
+        verdict = {'sanctioned': [], 'partial': [], 'unverified': []}
         if not gtip_codes:
-            return []
-            
-        sanctioned_codes = []
+            return verdict
+        
+        # Yerel AB yaptırım indeksi ağa çıkmadan kesin/kısmi eşleşmeleri bulur; indeks
+        # eksiksiz işaretlenmediyse listede olmayan kodlar EUR-Lex'e sorulur
+        index = sanction_index.get_index(self.config)
+        pending = []
+        for code in gtip_codes:
+            match = index.classify(code) if index is not None else None
+            if match == sanction_index.SANCTIONED:
+                verdict['sanctioned'].append(code)
+            elif match == sanction_index.PARTIAL:
+                verdict['partial'].append(code)
+            elif index is None or not self.config.SANCTION_INDEX_COMPLETE:
+                pending.append(code)
+        
+        if index is not None:
+            logging.info("🔍 AB yaptırım indeksi kontrolü: %d kod, %d yaptırımlı, %d kısmi", len(gtip_codes),
+                         len(verdict['sanctioned']), len(verdict['partial']), extra=log_config.sampled())
+        if pending:
+            self._check_eurlex(pending, verdict)
+        return verdict
+    
+    def _check_eurlex(self, gtip_codes, verdict):
+        """İlk MAX_GTIP_CHECK kodu EUR-Lex'te ara; kalanlar ve hatalılar doğrulanmamış sayılır"""
         checked_codes = gtip_codes[:self.config.MAX_GTIP_CHECK]
+        verdict['unverified'].extend(gtip_codes[self.config.MAX_GTIP_CHECK:])
         
-        print(f"   🔍 EUR-Lex kontrolü: {checked_codes}")
+        logging.info("🔍 EUR-Lex kontrolü: %s", checked_codes)
         
         for gtip_code in checked_codes:
-            if gtip_code in self.sanction_cache:
-                if self.sanction_cache[gtip_code]:
-                    sanctioned_codes.append(gtip_code)
+            cached = self.sanction_cache.get(gtip_code)
+            if cached is not None:
+                if cached:
+                    verdict['sanctioned'].append(gtip_code)
                 continue
                 
             try:
-                time.sleep(1)
-                
-                url = "https://eur-lex.europa.eu/search.html"
+                url = self.config.EURLEX_SEARCH_URL
                 params = {
                     'text': f'"{gtip_code}" sanction',
                     'type': 'advanced',
@@ -374,9 +633,11 @@ class QuickEURLexChecker:
                     'User-Agent': random.choice(self.config.USER_AGENTS),
                 }
                 
-                response = requests.get(url, params=params, headers=headers, timeout=10)
+                response = transport.get_session(self.config).get(url, params=params, headers=headers, timeout=10)
                 
                 if response.status_code == 200:
+                    from bs4 import BeautifulSoup
+                    
                     soup = BeautifulSoup(response.text, 'html.parser')
                     content = soup.get_text().lower()
                     
@@ -384,17 +645,18 @@ class QuickEURLexChecker:
                     found_sanction = any(term in content for term in sanction_terms)
                     
                     if found_sanction:
-                        sanctioned_codes.append(gtip_code)
-                        self.sanction_cache[gtip_code] = True
-                        print(f"   ⛔ Yaptırımlı kod: {gtip_code}")
+                        verdict['sanctioned'].append(gtip_code)
+                        self.sanction_cache.set(gtip_code, True)
+                        logging.info("⛔ Yaptırımlı kod: %s", gtip_code)
                     else:
-                        self.sanction_cache[gtip_code] = False
+                        self.sanction_cache.set(gtip_code, False)
+                else:
+                    logging.warning("❌ EUR-Lex kontrol hatası %s: %s", response.status_code, gtip_code)
+                    verdict['unverified'].append(gtip_code)
                 
             except Exception as e:
-                print(f"   ❌ EUR-Lex kontrol hatası: {e}")
-                continue
-        
-        return sanctioned_codes
+                logging.error("❌ EUR-Lex kontrol hatası: %s", e)
+                verdict['unverified'].append(gtip_code)
 
 class SmartTradeAnalyzer:
     def __init__(self, config):
@@ -403,20 +665,132 @@ class SmartTradeAnalyzer:
         self.crawler = SmartCrawler(config)
         self.eur_lex_checker = QuickEURLexChecker(config)
         self.query_generator = SimpleQueryGenerator()
+        self.query_planner = query_planner.QueryPlanner(config)
     
     def smart_analyze(self, company, country):
-        """Akıllı analiz - DEMO MOD"""
-        print(f"🤖 DEMO ANALİZ MODU: '{company}' ↔ {country}")
+        """Akıllı analiz - tüm sonuçları liste olarak döndür
+
+        Çağıranın (istek/iş) korelasyon kimliği varsa o, yoksa yeni bir kimlik
+        analizin tüm loglarına (crawl thread'leri dahil) eklenir.
+        """
+        with log_config.correlation(log_config.correlation_id.get()):
+            results = [
+                event['result']
+                for event in self.iter_analyze(company, country)
+                if event['type'] == 'result'
+            ]
+            
+            if results:
+                logging.info("✅ Analiz tamamlandı: %d sonuç", len(results))
+            else:
+                logging.warning("❌ Analiz sonucu bulunamadı")
+        return results
+    
+    def iter_analyze(self, company, country):
+        """Analiz olaylarını üretildikçe döndür: stage, search_hit, crawl, sanction, result"""
+        if self.config.DEMO_MODE:
+            logging.info("🤖 DEMO ANALİZ MODU: '%s' ↔ %s", company, country)
+            yield {'type': 'stage', 'stage': 'demo'}
+            
+            # Demo modda çalış - gerçek arama yapmadan örnek sonuçlar döndür
+            for result in self._generate_demo_results(company, country):
+                yield {'type': 'result', 'result': result_record.ResultRecord.from_dict(result)}
+            return
         
-        # Demo modda çalış - gerçek arama yapmadan örnek sonuçlar döndür
-        demo_results = self._generate_demo_results(company, country)
+        yield from self._iter_live_analysis(company, country)
+    
+    def _iter_live_analysis(self, company, country):
+        """Gerçek boru hattı: sorgu -> arama -> crawl -> yaptırım kontrolü"""
+        plan = self.query_planner.plan(company, country)
+        yield {'type': 'stage', 'stage': 'search', 'queries': [query for _, query in plan]}
         
-        if demo_results:
-            print(f"   ✅ Demo analiz tamamlandı: {len(demo_results)} sonuç")
-            return demo_results
+        hits = {}
+        strong_hits = 0
+        for template_id, query in plan:
+            new_hits = new_strong = 0
+            try:
+                search_hits = self.searcher.search(query, self.config.MAX_RESULTS)
+            except SearchError as e:
+                # Başarısız arama şablonun verimini düşürmesin; çağıran hatayı görsün
+                yield {'type': 'search_error', 'query': query, 'error': str(e)}
+                continue
+            for hit in search_hits:
+                if hit['url'] in hits:
+                    continue
+                hits[hit['url']] = hit
+                new_hits += 1
+                if self.query_planner.is_strong(hit, company, country):
+                    new_strong += 1
+                yield {'type': 'search_hit', 'query': query, 'hit': hit}
+            
+            self.query_planner.record(template_id, new_hits, new_strong)
+            strong_hits += new_strong
+            if strong_hits >= self.config.QUERY_TARGET_STRONG_HITS:
+                logging.info("⏹️ Yeterli güçlü sonuç (%s), kalan sorgular atlandı", strong_hits)
+                break
+        
+        yield {'type': 'stage', 'stage': 'crawl', 'urls': len(hits)}
+        
+        for url, crawl in self.crawler.crawl_many(list(hits), country):
+            yield {'type': 'crawl', 'url': url, 'crawl': crawl}
+            
+            sanction = self.eur_lex_checker.check_gtip(crawl.get('gtip_full_codes', crawl['gtip_codes']))
+            yield {
+                'type': 'sanction',
+                'url': url,
+                'gtip_codes': crawl['gtip_codes'],
+                'sanctioned_codes': sanction['sanctioned'],
+                'partial_codes': sanction['partial'],
+                'unverified_codes': sanction['unverified']
+            }
+            
+            yield {
+                'type': 'result',
+                'result': self._build_result(company, country, hits.pop(url), crawl, sanction)
+            }
+    
+    def _build_result(self, company, country, hit, crawl, sanction):
+        """Arama sonucu + crawl + yaptırım kontrolünden (check_gtip) rapor satırı (ResultRecord)"""
+        snippet_hits = country_matcher.get_matcher(country).scan(hit.get('full_text', ''))
+        country_connection = crawl['country_found'] or snippet_hits[country_matcher.country_key(country)] > 0
+        
+        confidence = 40
+        if crawl['status_code'] == 200:
+            confidence += 20
+        if country_connection:
+            confidence += 15
+        if gtip_extractor.EXPLICIT in crawl.get('gtip_context', {}).values():
+            confidence += 15
+        confidence = min(confidence, 95)
+        
+        explanation = None
+        if sanction['sanctioned']:
+            status = result_record.HIGH_RISK
+        elif sanction['partial']:
+            status = result_record.PARTIAL_MATCH
+            explanation = result_record.describe_codes(status, company, country, sanction['partial'])
+        elif sanction['unverified']:
+            status = result_record.UNVERIFIED
+            explanation = result_record.describe_codes(status, company, country, sanction['unverified'])
+        elif country_connection:
+            status = result_record.RISK_FOUND
         else:
-            print("   ❌ Demo analiz başarısız")
-            return []
+            status = result_record.CLEAN
+        
+        return result_record.ResultRecord(
+            company=company,
+            country=country,
+            status=status,
+            country_connection=country_connection,
+            gtip_codes=crawl['gtip_codes'],
+            sanctioned_codes=sanction['sanctioned'],
+            explanation=explanation,
+            confidence=confidence,
+            title=hit.get('title', ''),
+            url=hit.get('url', ''),
+            snippet=hit.get('snippet', ''),
+            search_engine=hit.get('search_engine', '')
+        )
     
     def _generate_demo_results(self, company, country):
         """Demo sonuçlar oluştur"""
@@ -473,59 +847,25 @@ class SmartTradeAnalyzer:
         
         return demo_data
 
-def create_excel_report(results, company, country):
-    """Excel raporu"""
+def export_report(results, company, country, fmt='xlsx'):
+    """Raporu istenen formatta dosyaya yaz (xlsx, csv, ndjson, parquet)"""
     try:
-        filename = f"{company.replace(' ', '_')}_{country}_ticaret_analiz.xlsx"
-        
-        wb = Workbook()
-        ws1 = wb.active
-        ws1.title = "Analiz Sonuçları"
+        exporter = exporters.get_exporter(fmt)
+        filename = f"{company.replace(' ', '_')}_{country}_ticaret_analiz.{exporter.extension}"
         
-        headers = [
-            'ŞİRKET', 'ÜLKE', 'DURUM', 'YAPTIRIM_RISKI', 'ULKE_BAGLANTISI',
-            'TESPIT_EDILEN_GTIPLER', 'YAPTIRIMLI_GTIPLER', 'GÜVEN_SEVİYESİ',
-            'AI_AÇIKLAMA', 'AI_TAVSIYE', 'BAŞLIK', 'URL'
-        ]
-        
-        for col, header in enumerate(headers, 1):
-            cell = ws1.cell(row=1, column=col, value=header)
-            cell.font = Font(bold=True)
-        
-        for row, result in enumerate(results, 2):
-            ws1.cell(row=row, column=1, value=str(result.get('ŞİRKET', '')))
-            ws1.cell(row=row, column=2, value=str(result.get('ÜLKE', '')))
-            ws1.cell(row=row, column=3, value=str(result.get('DURUM', '')))
-            ws1.cell(row=row, column=4, value=str(result.get('YAPTIRIM_RISKI', '')))
-            ws1.cell(row=row, column=5, value=str(result.get('ULKE_BAGLANTISI', '')))
-            ws1.cell(row=row, column=6, value=str(result.get('TESPIT_EDILEN_GTIPLER', '')))
-            ws1.cell(row=row, column=7, value=str(result.get('YAPTIRIMLI_GTIPLER', '')))
-            ws1.cell(row=row, column=8, value=str(result.get('GÜVEN_SEVİYESİ', '')))
-            ws1.cell(row=row, column=9, value=str(result.get('AI_AÇIKLAMA', '')))
-            ws1.cell(row=row, column=10, value=str(result.get('AI_TAVSIYE', '')))
-            ws1.cell(row=row, column=11, value=str(result.get('BAŞLIK', '')))
-            ws1.cell(row=row, column=12, value=str(result.get('URL', '')))
-        
-        for column in ws1.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws1.column_dimensions[column_letter].width = adjusted_width
-        
-        wb.save(filename)
-        print(f"✅ Excel raporu oluşturuldu: {filename}")
+        with open(filename, 'wb') as f:
+            rows = exporter.write(results, f)
+        print(f"✅ {exporter.name.upper()} raporu oluşturuldu: {filename} ({rows} satır)")
         return filename
         
     except Exception as e:
-        print(f"❌ Excel rapor hatası: {e}")
+        print(f"❌ Rapor hatası ({fmt}): {e}")
         return None
 
+def create_excel_report(results, company, country):
+    """Excel raporu - satırlar akışla yazılır (results herhangi bir iterable olabilir)"""
+    return export_report(results, company, country, 'xlsx')
+
 def display_results(results, company, country):
     """Sonuçları göster"""
     print(f"\n{'='*80}")
@@ -575,7 +915,105 @@ def display_results(results, company, country):
     print(f"\n💡 NOT: Bu sonuçlar DEMO modda oluşturulmuştur.")
     print("   Gerçek verilere ulaşılamadığı için örnek sonuçlar gösterilmektedir.")
 
+def parse_args(argv=None):
+    """Komut satırı seçenekleri"""
+    parser = argparse.ArgumentParser(description="Otomatik risk analizli ticaret sistemi")
+    parser.add_argument('--batch', metavar='DOSYA', help='CSV/XLSX şirket listesi ile toplu tarama')
+    parser.add_argument('--country', help='Listede ülke kolonu yoksa kullanılacak ülke')
+    parser.add_argument('--workers', type=int, help='Aynı anda analiz edilecek şirket sayısı')
+    parser.add_argument('--format', default='xlsx', choices=exporters.available_formats(),
+                        help='Toplu tarama rapor formatı')
+    parser.add_argument('--profile', nargs='?', const=profiler.FULL, choices=profiler.MODES,
+                        help='Analiz ve rapor yazımını profille (varsayılan: full = cProfile + tracemalloc)')
+    return parser.parse_args(argv)
+
+@contextmanager
+def profiling(mode):
+    """mode verilirse bloğu profille; profil_<zaman>.json/.prof/.collapsed.txt dosyalarına yaz"""
+    if not mode:
+        yield
+        return
+    
+    active = profiler.Capture(mode).start()
+    try:
+        yield
+    finally:
+        result = active.stop()
+        paths = result.write_files(f'profil_{datetime.now().strftime("%Y%m%d_%H%M%S")}')
+        summary = result.summary
+        print(f"\n🔬 PROFİL ({summary['mode']}): {summary['wall_seconds']:.2f} saniye")
+        for entry in summary.get('top_cumulative', [])[:10]:
+            if 'cumulative_seconds' in entry:
+                print(f"   {entry['cumulative_seconds']:8.3f}s  {entry['calls']:>7}  {entry['function']}")
+            else:
+                print(f"   %{entry['percent']:6.2f}  {entry['function']}")
+        for path in paths:
+            print(f"   📁 {path}")
+
+def run_batch_cli(path, country=None, workers=None, fmt='xlsx', profile=None):
+    """Toplu tarama - tek konsolide rapor (varsayılan Excel)"""
+    config = Config()
+    analyzer = SmartTradeAnalyzer(config)
+    
+    try:
+        with open(path, 'rb') as f:
+            pairs = batch.read_company_list(f, path, country)
+    except (OSError, batch.BatchInputError) as e:
+        print(f"❌ Şirket listesi okunamadı: {e}")
+        return
+    
+    print(f"\n🚀 TOPLU TARAMA BAŞLATILIYOR: {len(pairs)} satır")
+    
+    def show_progress(event):
+        print(f"   [{event['done']}/{event['total']}] {event['company']} ↔ {event['country']}: {event['results']} sonuç")
+    
+    # Rapor girdi sırasıyla yazılsın diye satırlar şirket sırasına göre tutulur
+    per_company = {}
+    
+    def save_rows(rows, part=0):
+        per_company[part] = rows
+    
+    with profiling(profile):
+        summary = batch.run_batch(analyzer, pairs, workers or config.BATCH_WORKERS, save_rows, emit=show_progress)
+        results = (row for part in sorted(per_company) for row in per_company[part])
+        filename = export_report(results, 'toplu_tarama', datetime.now().strftime('%Y%m%d_%H%M%S'), fmt)
+    
+    print(f"\n📈 TOPLU TARAMA ÖZETİ:")
+    print(f"   • Toplam Satır: {summary['total_rows']}")
+    print(f"   • Benzersiz Şirket: {summary['unique_companies']}")
+    print(f"   • Toplam Sonuç: {summary['total_results']}")
+    print(f"   • Hatalı Şirket: {len(summary['errors'])}")
+    print(f"   • Süre: {summary['duration']:.2f} saniye")
+    print(f"   • Hız: {summary['companies_per_minute']:.1f} şirket/dakika")
+    if filename:
+        print(f"\n✅ Konsolide rapor oluşturuldu: {filename}")
+    else:
+        print("❌ Rapor oluşturulamadı!")
+
+def setup_logging():
+    """CLI çalıştırmasına özel log dosyası - import eden modüller (streamlit) dosya açmaz
+
+    Etkileşimli kullanımda varsayılan düz metin ve örneklemesiz (tüm URL olayları);
+    LOG_FORMAT=json / LOG_SAMPLE_RATE ile değiştirilebilir.
+    """
+    log_config.configure(
+        fmt=os.environ.get('LOG_FORMAT', 'text'),
+        sample_rate=float(os.environ.get('LOG_SAMPLE_RATE', 1.0)),
+        handlers=[
+            logging.FileHandler(f'analysis_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'),
+            logging.StreamHandler()
+        ]
+    )
+
 def main():
+    print("🚀 OTOMATİK RİSK ANALİZLİ TİCARET SİSTEMİ")
+    setup_logging()
+    
+    args = parse_args()
+    if args.batch:
+        run_batch_cli(args.batch, args.country, args.workers, args.format, args.profile)
+        return
+    
     print("📊 OTOMATİK RİSK ANALİZLİ TİCARET SİSTEMİ")
     print("🎯 HEDEF: Demo mod - örnek sonuçlarla test")
     print("💡 AVANTAJ: Arama motorları çalışmazsa bile sistem çalışır")
@@ -595,15 +1033,16 @@ def main():
     print("⏳ Örnek sonuçlar oluşturuluyor...")
     print("   💡 DEMO MOD: Gerçek veriler yerine örnek sonuçlar gösterilecek\n")
     
-    start_time = time.time()
-    results = analyzer.smart_analyze(company, country)
-    execution_time = time.time() - start_time
+    with profiling(args.profile):
+        start_time = time.time()
+        results = analyzer.smart_analyze(company, country)
+        execution_time = time.time() - start_time
+        
+        if results:
+            display_results(results, company, country)
+            filename = create_excel_report(results, company, country)
     
     if results:
-        display_results(results, company, country)
-        
-        filename = create_excel_report(results, company, country)
-        
         if filename:
             print(f"\n✅ Excel raporu oluşturuldu: {filename}")
             print(f"⏱️  Toplam çalışma süresi: {execution_time:.2f} saniye")
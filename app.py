@@ -1,34 +1,140 @@
-from flask import Flask, request, jsonify, render_template, send_file
-import requests
-from bs4 import BeautifulSoup
 import time
+# Soğuk başlangıç ölçümü: modül importunun başladığı an
+BOOT_STARTED = time.perf_counter()
+from flask import Flask, request, jsonify, render_template, Response, stream_with_context, g
+import json
 import random
-import re
-from openpyxl import Workbook
-from openpyxl.styles import Font
 import sys
 import logging
 import os
+import tempfile
 from datetime import datetime
-import cloudscraper
 import urllib.parse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import transport
+import rate_limiter
+import disk_cache
+import sanction_index
+import gtip_extractor
+import html_stream
+import country_matcher
+import redirect_resolver
+import query_planner
+import crawl_cache
+import exporters
+import result_record
+import report_store
+import metrics
+import log_config
+import profiler
+from normalize import normalize_key
+import jobs
+import batch
+from collections import Counter
 
 app = Flask(__name__)
 
 print("🚀 OTOMATİK RİSK ANALİZLİ TİCARET SİSTEMİ BAŞLATILIYOR...")
 
-# Logging setup
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+# Logging setup - JSON satırları, kuyruklu handler (bkz. log_config)
+log_config.configure()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 class Config:
     def __init__(self):
+        self.DEMO_MODE = os.environ.get('DEMO_MODE', '1') != '0'
         self.MAX_RESULTS = 10
         self.REQUEST_TIMEOUT = 30
         self.RETRY_ATTEMPTS = 1
+        self.RETRY_BACKOFF = 0.5
+        self.POOL_CONNECTIONS = 10
+        self.POOL_MAXSIZE = 10
+        self.HOST_POOL_SIZES = {
+            'duckduckgo.com': 4,
+            'eur-lex.europa.eu': 4,
+        }
+        # Uç noktalar ortamdan değiştirilebilir (ör. benchmark için yerel fixture_server)
+        self.SEARCH_URL = os.environ.get('SEARCH_URL', 'https://duckduckgo.com/html/')
+        self.EURLEX_SEARCH_URL = os.environ.get('EURLEX_SEARCH_URL', 'https://eur-lex.europa.eu/search.html')
+        self.SANCTION_CACHE_PATH = os.environ.get(
+            'SANCTION_CACHE_PATH',
+            os.path.join(tempfile.gettempdir(), 'ticaret_analiz_cache.sqlite3')
+        )
+        self.SANCTION_CACHE_TTL = 7 * 24 * 3600
+        self.SANCTION_CACHE_MAX_ENTRIES = 5000
+        # Boş bırakılırsa arama önbelleği yalnız bellekte tutulur
+        self.SEARCH_CACHE_PATH = os.environ.get('SEARCH_CACHE_PATH', self.SANCTION_CACHE_PATH)
+        self.SEARCH_CACHE_TTL = 6 * 3600
+        self.SEARCH_CACHE_MAX_ENTRIES = 2000
+        # Host bazlı hız sınırı: (istek/saniye, burst); 429/403'te otomatik düşer.
+        # Tanımsız host'lar (ör. yerel mock sunucu) için varsayılan ortamdan '2.0,4' biçiminde verilebilir
+        self.RATE_LIMIT_PATH = os.environ.get('RATE_LIMIT_PATH', self.SANCTION_CACHE_PATH)
+        self.RATE_LIMIT_DEFAULT = rate_limiter.parse_limit(os.environ.get('RATE_LIMIT_DEFAULT'), (2.0, 4))
+        self.HOST_RATE_LIMITS = {
+            'duckduckgo.com': (0.5, 1),
+            'eur-lex.europa.eu': (1.0, 2),
+        }
+        self.RATE_LIMIT_MIN_RATE = 0.05
+        self.RATE_LIMIT_MAX_WAIT = 30
+        # Sorgu şablonu verim istatistikleri; bu kadar güçlü URL bulununca arama durur
+        self.QUERY_STATS_PATH = os.environ.get('QUERY_STATS_PATH', self.SANCTION_CACHE_PATH)
+        self.QUERY_TARGET_STRONG_HITS = 8
+        # Crawl önbelleği: taze kayıt ağa çıkmaz, eskisi koşullu GET ile doğrulanır
+        self.CRAWL_CACHE_PATH = os.environ.get('CRAWL_CACHE_PATH', self.SANCTION_CACHE_PATH)
+        self.CRAWL_CACHE_FRESH = 3600
+        self.CRAWL_CACHE_TTL = 7 * 24 * 3600
+        self.CRAWL_CACHE_MAX_ENTRIES = 20000
+        self.SANCTION_LIST_PATH = os.environ.get(
+            'SANCTION_LIST_PATH',
+            os.path.join(BASE_DIR, 'data', 'eu_russia_sanction_annex.txt')
+        )
+        self.SANCTION_LIST_URL = os.environ.get('SANCTION_LIST_URL', '')
+        self.SANCTION_LIST_REFRESH = 24 * 3600
+        # Anlık görüntü tüm eki kapsıyorsa listede olmayan kodlar EUR-Lex'e sorulmaz
+        self.SANCTION_INDEX_COMPLETE = os.environ.get('SANCTION_INDEX_COMPLETE', '0') == '1'
+        self.JOB_DB_PATH = os.environ.get(
+            'JOB_DB_PATH',
+            os.path.join(tempfile.gettempdir(), 'ticaret_analiz_jobs.sqlite3')
+        )
+        self.JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 4))
+        self.MAX_PENDING_JOBS = 50
+        self.JOB_TIMEOUT = 600
+        self.JOB_RETENTION = 3600
+        self.BATCH_WORKERS = 4
+        self.MAX_BATCH_COMPANIES = 5000
+        self.BATCH_JOB_TIMEOUT = 6 * 3600
+        # /jobs/<id>/result sayfa boyutu (?limit= ile en fazla JOB_RESULT_MAX_PAGE)
+        self.JOB_RESULT_PAGE_SIZE = 500
+        self.JOB_RESULT_MAX_PAGE = 5000
+        self.SSE_POLL_INTERVAL = 0.5
+        self.SSE_KEEPALIVE_INTERVAL = 15
+        # Tek SSE yanıtının azami süresi - sonra kapanır, EventSource Last-Event-ID
+        # ile yeniden bağlanır (worker thread'i uzun süre tutulmaz)
+        self.SSE_MAX_STREAM_SECONDS = 55
+        self.SSE_RETRY_MS = 1000
+        # Import + ısınma süresi bu bütçeyi aşarsa uyarı loglanır (saniye)
+        self.STARTUP_BUDGET = float(os.environ.get('STARTUP_BUDGET', 3.0))
+        # /metrics sayaçları worker'lar arasında bu dosyada toplanır (boşsa yalnız bu süreç)
+        self.METRICS_PATH = os.environ.get('METRICS_PATH', self.SANCTION_CACHE_PATH)
+        # Excel raporları indirildiğinde üretilir ve worker belleğinde tutulur
+        self.REPORT_STORE_MAX_BYTES = 64 * 1024 * 1024
+        self.REPORT_STORE_MAX_AGE = self.JOB_RETENTION
+        self.REPORT_SPOOL_SIZE = 4 * 1024 * 1024
+        # İstek başına profil (X-Profile: sample|full ya da ?profile=); üretimde
+        # işlerin bu oranı kendiliğinden 'sample' moduyla profillenir
+        self.PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0.0))
+        self.PROFILE_INTERVAL = profiler.DEFAULT_INTERVAL
+        self.PROFILE_DB_PATH = os.environ.get('PROFILE_DB_PATH', self.JOB_DB_PATH)
         self.MAX_GTIP_CHECK = 3
+        self.MAX_CRAWL_CONCURRENCY = 6
+        self.PER_HOST_CONCURRENCY = 2
+        # uddg parametresi olmayan yönlendirmeler için arama başına en fazla HEAD
+        self.REDIRECT_MAX_HEADS = 4
+        self.MAX_PARSE_BYTES = 2 * 1024 * 1024
+        self.MAX_PARSE_CHARS = 500000
+        self.STREAM_CHUNK_SIZE = 64 * 1024
         self.USER_AGENTS = [
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -38,27 +144,109 @@ class Config:
 class SmartCrawler:
     def __init__(self, config):
         self.config = config
-        self.scraper = cloudscraper.create_scraper()
+        self.crawl_cache = crawl_cache.CrawlCache(config)
+        # host -> [semafor, bekleyen + çalışan sayısı]; kullanan kalmayınca silinir
+        self._host_slots = {}
+        self._host_slots_lock = threading.Lock()
+    
+    @property
+    def scraper(self):
+        """Paylaşılan cloudscraper oturumu - ilk kullanımda oluşturulur"""
+        return transport.get_scraper(self.config)
+    
+    def crawl_many(self, urls, target_country, max_concurrency=None):
+        """Toplu crawl - sonuçları bittikçe (url, sonuç) olarak döndürür"""
+        max_concurrency = max_concurrency or self.config.MAX_CRAWL_CONCURRENCY
+        ordered_urls = self._interleave_by_host(urls)
+        if not ordered_urls:
+            return
+        
+        executor = ThreadPoolExecutor(max_workers=min(max_concurrency, len(ordered_urls)))
+        try:
+            futures = {
+                log_config.submit_with_context(
+                    executor, profiler.traced(self._crawl_with_host_limit), url, target_country
+                ): url
+                for url in ordered_urls
+            }
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logging.warning("❌ Toplu crawl hatası: %s", e, extra=log_config.sampled(url=url))
+                    result = {'country_found': False, 'gtip_codes': [], 'content_preview': '', 'status_code': 'ERROR'}
+                yield url, result
+        finally:
+            # Tüketici erken durursa bekleyen işleri iptal et
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _interleave_by_host(self, urls):
+        """Aynı host'a ait URL'leri sıraya dağıt - host limiti havuzu tıkamasın"""
+        by_host = {}
+        for url in dict.fromkeys(u for u in urls if u):
+            by_host.setdefault(urllib.parse.urlparse(url).netloc.lower(), []).append(url)
+        
+        ordered = []
+        queues = list(by_host.values())
+        while queues:
+            ordered.extend(queue.pop(0) for queue in queues)
+            queues = [queue for queue in queues if queue]
+        return ordered
+    
+    def _acquire_host_slot(self, host):
+        """Host semaforunu al (yoksa oluştur) ve kullanıcı sayısını artır"""
+        with self._host_slots_lock:
+            entry = self._host_slots.get(host)
+            if entry is None:
+                entry = self._host_slots[host] = [threading.BoundedSemaphore(self.config.PER_HOST_CONCURRENCY), 0]
+            entry[1] += 1
+            return entry[0]
+    
+    def _release_host_slot(self, host):
+        """Son kullanıcı çıkınca host kaydını sil - uzun ömürlü analyzer'da birikmesin"""
+        with self._host_slots_lock:
+            entry = self._host_slots[host]
+            entry[1] -= 1
+            if not entry[1]:
+                del self._host_slots[host]
+    
+    def _crawl_with_host_limit(self, url, target_country):
+        """Host başına eşzamanlılık limitiyle crawl"""
+        host = urllib.parse.urlparse(url).netloc.lower()
+        slot = self._acquire_host_slot(host)
+        try:
+            with slot:
+                with metrics.span('crawl'):
+                    return self.smart_crawl(url, target_country)
+        finally:
+            self._release_host_slot(host)
     
     def smart_crawl(self, url, target_country):
         """Akıllı crawl - 403 hatalarını aşmak için"""
-        logging.info(f"🌐 Crawl: {url[:60]}...")
+        page, content = self.crawl_cache.lookup(url, target_country)
+        if page is not None and self.crawl_cache.is_fresh(page):
+            logging.info("📦 Önbellekten crawl: %s", url, extra=log_config.sampled(url=url))
+            return crawl_cache.result_from_content(content, target_country)
+        cached = (page, content) if page is not None else None
+        
+        logging.info("🌐 Crawl: %s", url, extra=log_config.sampled(url=url))
         
         # Önce cloudscraper ile dene
-        result = self._try_cloudscraper(url, target_country)
+        result = self._try_cloudscraper(url, target_country, cached)
         if result['status_code'] == 200:
             return result
         
         # Cloudscraper başarısızsa normal requests ile dene
-        result = self._try_requests(url, target_country)
+        result = self._try_requests(url, target_country, cached)
         if result['status_code'] == 200:
             return result
         
         # Her ikisi de başarısızsa snippet analizi yap
-        logging.info(f"🔍 Sayfa erişilemiyor, snippet analizi yapılıyor...")
+        logging.info("🔍 Sayfa erişilemiyor, snippet analizi yapılıyor: %s", url, extra=log_config.sampled(url=url))
         return {'country_found': False, 'gtip_codes': [], 'content_preview': '', 'status_code': 'BLOCKED'}
     
-    def _try_cloudscraper(self, url, target_country):
+    def _try_cloudscraper(self, url, target_country, cached=None):
         """Cloudscraper ile dene"""
         try:
             headers = {
@@ -69,114 +257,196 @@ class SmartCrawler:
                 'Connection': 'keep-alive',
                 'Upgrade-Insecure-Requests': '1',
             }
+            if cached:
+                headers.update(self.crawl_cache.conditional_headers(cached[0]))
             
-            response = self.scraper.get(url, headers=headers, timeout=15)
+            response = self.scraper.get(url, headers=headers, timeout=15, stream=True)
             
-            if response.status_code == 200:
-                logging.info(f"✅ Cloudscraper başarılı: {url}")
-                return self._parse_content(response.text, target_country, response.status_code)
+            if response.status_code == 304 and cached:
+                response.close()
+                logging.info("♻️ Sayfa değişmemiş (304): %s", url, extra=log_config.sampled(url=url))
+                self.crawl_cache.touch(url, cached[0], response.headers)
+                return crawl_cache.result_from_content(cached[1], target_country)
+            elif response.status_code == 200:
+                logging.info("✅ Cloudscraper başarılı: %s", url, extra=log_config.sampled(url=url))
+                return self._parse_response(url, response, target_country)
             else:
-                logging.warning(f"❌ Cloudscraper hatası {response.status_code}: {url}")
+                logging.warning("❌ Cloudscraper hatası %s: %s", response.status_code, url,
+                                extra=log_config.sampled(url=url, status=response.status_code))
                 return {'country_found': False, 'gtip_codes': [], 'content_preview': '', 'status_code': response.status_code}
                 
         except Exception as e:
-            logging.warning(f"❌ Cloudscraper hatası: {e}")
+            logging.warning("❌ Cloudscraper hatası: %s", e, extra=log_config.sampled(url=url))
             return {'country_found': False, 'gtip_codes': [], 'content_preview': '', 'status_code': 'ERROR'}
     
-    def _try_requests(self, url, target_country):
+    def _try_requests(self, url, target_country, cached=None):
         """Normal requests ile dene"""
         try:
             headers = {
                 'User-Agent': random.choice(self.config.USER_AGENTS),
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             }
+            if cached:
+                headers.update(self.crawl_cache.conditional_headers(cached[0]))
             
-            response = requests.get(url, headers=headers, timeout=15)
+            response = transport.get_session(self.config).get(url, headers=headers, timeout=15, stream=True)
             
-            if response.status_code == 200:
-                logging.info(f"✅ Requests başarılı: {url}")
-                return self._parse_content(response.text, target_country, response.status_code)
+            if response.status_code == 304 and cached:
+                response.close()
+                logging.info("♻️ Sayfa değişmemiş (304): %s", url, extra=log_config.sampled(url=url))
+                self.crawl_cache.touch(url, cached[0], response.headers)
+                return crawl_cache.result_from_content(cached[1], target_country)
+            elif response.status_code == 200:
+                logging.info("✅ Requests başarılı: %s", url, extra=log_config.sampled(url=url))
+                return self._parse_response(url, response, target_country)
             else:
-                logging.warning(f"❌ Requests hatası {response.status_code}: {url}")
+                logging.warning("❌ Requests hatası %s: %s", response.status_code, url,
+                                extra=log_config.sampled(url=url, status=response.status_code))
                 return {'country_found': False, 'gtip_codes': [], 'content_preview': '', 'status_code': response.status_code}
                 
         except Exception as e:
-            logging.warning(f"❌ Requests hatası: {e}")
+            logging.warning("❌ Requests hatası: %s", e, extra=log_config.sampled(url=url))
             return {'country_found': False, 'gtip_codes': [], 'content_preview': '', 'status_code': 'ERROR'}
     
-    def _parse_content(self, html, target_country, status_code):
-        """İçerik analizi"""
+    def _parse_response(self, url, response, target_country):
+        """Yanıtı bütçe dahilinde oku; aynı içerik daha önce ayrıştırıldıysa tekrar ayrıştırma"""
+        try:
+            # Charset başlıkta yoksa lxml sayfadaki meta etiketinden tespit etsin
+            content_type = response.headers.get('Content-Type', '').lower()
+            encoding = response.encoding if 'charset=' in content_type else None
+            body = self._read_body(response)
+        finally:
+            response.close()
+        
+        digest = crawl_cache.content_hash(body)
+        content = self.crawl_cache.get_content(digest, target_country)
+        if content is not None:
+            logging.info("📦 Aynı içerik önbellekte: %s", url, extra=log_config.sampled(url=url))
+            self.crawl_cache.store(url, target_country, response.headers, digest)
+            return crawl_cache.result_from_content(content, target_country, response.status_code)
+        
+        with metrics.span('parse'):
+            result = self._parse_content(body, target_country, response.status_code, encoding=encoding)
+        if result['status_code'] != 'PARSE_ERROR':
+            content = {key: result[key] for key in ('countries', 'gtip_codes', 'gtip_context', 'gtip_full_codes', 'content_preview')}
+            self.crawl_cache.store(url, target_country, response.headers, digest, content)
+        return result
+    
+    def _read_body(self, response):
+        """Gövdeyi MAX_PARSE_BYTES'a kadar oku - kalan kısım indirilmez"""
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=self.config.STREAM_CHUNK_SIZE):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.config.MAX_PARSE_BYTES:
+                break
+        return b''.join(chunks)[:self.config.MAX_PARSE_BYTES]
+    
+    def _parse_content(self, html, target_country, status_code, encoding=None):
+        """İçerik analizi - metin parçaları bütçe dahilinde tek geçişte dedektörlere akar"""
         try:
-            soup = BeautifulSoup(html, 'html.parser')
-            text_content = soup.get_text()
-            text_lower = text_content.lower()
+            matcher = country_matcher.get_matcher(target_country)
+            target_key = country_matcher.country_key(target_country)
+            country_hits = Counter()
+            gtip_matches = {}
+            gtip_full_codes = {}
+            preview = ''
+            gtip_seconds = 0.0
             
-            country_found = self._check_country(text_lower, target_country)
-            gtip_codes = self.extract_gtip_codes(text_content)
+            text_chunks = html_stream.iter_text_chunks(
+                html,
+                max_bytes=self.config.MAX_PARSE_BYTES,
+                max_chars=self.config.MAX_PARSE_CHARS,
+                chunk_size=self.config.STREAM_CHUNK_SIZE,
+                encoding=encoding
+            )
+            for chunk in text_chunks:
+                country_hits.update(matcher.scan(chunk))
+                
+                extract_started = time.perf_counter()
+                # Pozisyon (4 hane) gösterim için, tam kod yaptırım kontrolü için
+                for heading, full_code, context in gtip_extractor.iter_gtip_matches(chunk):
+                    if gtip_matches.get(heading) != gtip_extractor.EXPLICIT:
+                        gtip_matches[heading] = context
+                    gtip_full_codes[full_code] = None
+                gtip_seconds += time.perf_counter() - extract_started
+                
+                if len(preview) <= 200:
+                    preview += chunk[:201 - len(preview)]
+            
+            metrics.observe(metrics.STAGE_SECONDS, gtip_seconds, {'stage': 'gtip_extract'})
+            gtip_codes = list(gtip_matches)
+            country_found = country_hits[target_key] > 0
             
-            logging.info(f"🔍 Sayfa analizi: Ülke={country_found}, GTIP={gtip_codes[:3]}")
+            logging.info("🔍 Sayfa analizi: Ülke=%s, GTIP=%s", country_found, gtip_codes[:3],
+                         extra=log_config.sampled(country_found=country_found, gtip_codes=gtip_codes))
             
             return {
                 'country_found': country_found,
+                'countries': dict(country_hits),
                 'gtip_codes': gtip_codes,
-                'content_preview': text_content[:200] + "..." if len(text_content) > 200 else text_content,
+                'gtip_context': gtip_matches,
+                'gtip_full_codes': gtip_extractor.most_specific(gtip_full_codes),
+                'content_preview': preview[:200] + "..." if len(preview) > 200 else preview,
                 'status_code': status_code
             }
         except Exception as e:
-            logging.error(f"❌ Parse hatası: {e}")
+            logging.error("❌ Parse hatası: %s", e)
             return {'country_found': False, 'gtip_codes': [], 'content_preview': '', 'status_code': 'PARSE_ERROR'}
     
     def _check_country(self, text_lower, target_country):
-        """Ülke kontrolü"""
-        country_variations = [
-            target_country.lower(),
-            'russia', 'rusya', 'rusian', 'rus'
-        ]
-        
-        for country_var in country_variations:
-            if country_var in text_lower:
-                return True
-        
-        return False
+        """Ülke kontrolü - kelime sınırlı takma ad eşleşmesi"""
+        hits = country_matcher.get_matcher(target_country).scan(text_lower)
+        return hits[country_matcher.country_key(target_country)] > 0
     
     def extract_gtip_codes(self, text):
-        """GTIP kod çıkarma"""
-        patterns = [
-            r'\b\d{4}\.?\d{0,4}\b',
-            r'\b\d{6}\b',
-            r'\bHS\s?CODE\s?:?\s?(\d{4,8})\b',
-            r'\bGTIP\s?:?\s?(\d{4,8})\b',
-        ]
-        
-        all_codes = set()
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            for match in matches:
-                if isinstance(match, tuple):
-                    match = match[0]
-                
-                code = re.sub(r'[^\d]', '', match)
-                if len(code) >= 4:
-                    all_codes.add(code[:4])
-        
-        return list(all_codes)
+        """GTIP kod çıkarma - tek geçişli, doğrulanmış pozisyonlar"""
+        return gtip_extractor.extract_gtip_codes(text)
+    
+    def extract_gtip_matches(self, text):
+        """GTIP kodları ve bağlamları (açık etiketli / çıplak sayı)"""
+        return gtip_extractor.extract_gtip_matches(text)
+
+class SearchError(Exception):
+    """Canlı modda arama yapılamadı (HTTP hatası, hız sınırı, bağlantı hatası)"""
 
 class SimpleDuckDuckGoSearcher:
     def __init__(self, config):
         self.config = config
-        self.scraper = cloudscraper.create_scraper()
+        self.search_cache = disk_cache.get_cache(
+            config.SEARCH_CACHE_PATH,
+            'search_results',
+            config.SEARCH_CACHE_TTL,
+            config.SEARCH_CACHE_MAX_ENTRIES
+        )
         logging.info("🦆 DuckDuckGo arama motoru hazır!")
     
+    @property
+    def scraper(self):
+        """Paylaşılan cloudscraper oturumu - ilk kullanımda oluşturulur"""
+        return transport.get_scraper(self.config)
+    
     def search_simple(self, query, max_results=10):
-        """Basit DuckDuckGo arama - DÜZELTİLMİŞ VERSİYON"""
+        """Arama sonuçları - canlı modda arama başarısızsa boş liste"""
         try:
-            logging.info(f"🔍 Arama: {query}")
-            
-            time.sleep(2)
+            return self.search(query, max_results)
+        except SearchError:
+            return []
+    
+    def search(self, query, max_results=10):
+        """DuckDuckGo arama - başarısızsa DEMO modda örnek sonuçlar, canlı modda SearchError"""
+        cache_key = f"{normalize_key(query)}|{max_results}"
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            logging.info("📦 Önbellekten arama: %s (%d sonuç)", query, len(cached))
+            return cached
+        
+        try:
+            logging.info("🔍 Arama: %s", query)
             
             # DuckDuckGo'nun farklı endpoint'ini deneyelim
-            url = "https://duckduckgo.com/html/"
+            url = self.config.SEARCH_URL
             data = {
                 'q': query,
                 'b': '',
@@ -195,29 +465,37 @@ class SimpleDuckDuckGoSearcher:
             
             if response.status_code == 200:
                 results = self._parse_results(response.text, max_results)
-                logging.info(f"✅ {len(results)} sonuç buldu")
+                logging.info("✅ %d sonuç buldu", len(results))
+                self.search_cache.set(cache_key, results)
                 return results
             else:
-                logging.warning(f"❌ Arama hatası {response.status_code}")
-                # Hata durumunda alternatif arama yöntemi
-                return self._search_alternative(query, max_results)
+                logging.warning("❌ Arama hatası %s", response.status_code)
+                return self._search_failed(query, max_results, f"HTTP {response.status_code}")
                 
+        except SearchError:
+            raise
         except Exception as e:
-            logging.error(f"❌ Arama hatası: {e}")
+            logging.error("❌ Arama hatası: %s", e)
+            return self._search_failed(query, max_results, str(e))
+    
+    def _search_failed(self, query, max_results, reason):
+        """Canlı modda uydurma sonuç üretilmez; örnek sonuçlar yalnızca DEMO modda"""
+        if self.config.DEMO_MODE:
             return self._search_alternative(query, max_results)
+        raise SearchError(f"{query}: {reason}")
     
     def _search_alternative(self, query, max_results):
         """Alternatif arama yöntemi - Basit Google benzeri"""
         try:
-            logging.info(f"🔍 Alternatif arama: {query}")
+            logging.info("🔍 Alternatif arama: %s", query)
             
             # Basit bir arama simülasyonu - örnek sonuçlar döndür
             sample_results = self._generate_sample_results(query, max_results)
-            logging.info(f"✅ Alternatif arama: {len(sample_results)} örnek sonuç")
+            logging.info("✅ Alternatif arama: %d örnek sonuç", len(sample_results))
             return sample_results
             
         except Exception as e:
-            logging.error(f"❌ Alternatif arama hatası: {e}")
+            logging.error("❌ Alternatif arama hatası: %s", e)
             return []
     
     def _generate_sample_results(self, query, max_results):
@@ -249,6 +527,8 @@ class SimpleDuckDuckGoSearcher:
     
     def _parse_results(self, html, max_results):
         """Sonuç parsing - GÜNCELLENMİŞ"""
+        from bs4 import BeautifulSoup
+        
         soup = BeautifulSoup(html, 'html.parser')
         results = []
         
@@ -261,6 +541,7 @@ class SimpleDuckDuckGoSearcher:
         if not results_elements:
             results_elements = soup.find_all('div', class_=lambda x: x and ('links_main' in x if x else False))
         
+        candidates = []
         for element in results_elements[:max_results]:
             try:
                 # Başlık bul
@@ -273,17 +554,8 @@ class SimpleDuckDuckGoSearcher:
                     continue
                     
                 url = title_elem.get('href')
-                
-                # URL düzelt
-                if url and ('//duckduckgo.com/l/' in url or url.startswith('/l/')):
-                    url = self._resolve_redirect(url)
-                
-                if not url or not url.startswith('http'):
-                    # Göreli URL'leri mutlak yap
-                    if url and url.startswith('/'):
-                        url = 'https://duckduckgo.com' + url
-                    else:
-                        continue
+                if not url:
+                    continue
                 
                 # Snippet bul
                 snippet = ""
@@ -294,42 +566,53 @@ class SimpleDuckDuckGoSearcher:
                 if snippet_elem:
                     snippet = snippet_elem.get_text(strip=True)
                 
-                results.append({
-                    'title': title,
-                    'url': url,
-                    'snippet': snippet,
-                    'full_text': f"{title} {snippet}",
-                    'domain': self._extract_domain(url),
-                    'search_engine': 'duckduckgo'
-                })
-                
-                logging.info(f"📄 {title[:50]}...")
+                candidates.append((title, url, snippet))
                 
             except Exception as e:
-                logging.warning(f"❌ Sonuç parse hatası: {e}")
+                logging.warning("❌ Sonuç parse hatası: %s", e, extra=log_config.sampled())
                 continue
         
-        return results
-    
-    def _resolve_redirect(self, redirect_url):
-        """Redirect çöz"""
-        try:
-            if redirect_url.startswith('/l/'):
-                redirect_url = 'https://duckduckgo.com' + redirect_url
-            
-            headers = {
-                'User-Agent': random.choice(self.config.USER_AGENTS),
-            }
-            
-            response = requests.get(redirect_url, headers=headers, timeout=5, allow_redirects=False)
+        # Yönlendirme linkleri toplu çözülür (çoğu uddg parametresinden, ağsız)
+        redirects = self._resolve_redirects(
+            url for _, url, _ in candidates if redirect_resolver.is_redirect(url)
+        )
+        
+        for title, url, snippet in candidates:
+            url = redirects.get(url, url)
+            if not url or not url.startswith('http'):
+                # Göreli URL'leri mutlak yap
+                if url and url.startswith('/'):
+                    url = 'https://duckduckgo.com' + url
+                else:
+                    continue
             
-            if response.status_code in [301, 302] and 'Location' in response.headers:
-                return response.headers['Location']
-            else:
-                return redirect_url
+            results.append({
+                'title': title,
+                'url': url,
+                'snippet': snippet,
+                'full_text': f"{title} {snippet}",
+                'domain': self._extract_domain(url),
+                'search_engine': 'duckduckgo'
+            })
             
-        except Exception:
-            return None
+            logging.info("📄 %s", title, extra=log_config.sampled(url=url))
+        
+        return results
+    
+    def _resolve_redirects(self, redirect_urls):
+        """Redirect linklerini çöz - {link: hedef URL ya da None}"""
+        headers = {
+            'User-Agent': random.choice(self.config.USER_AGENTS),
+        }
+        with metrics.span('redirect'):
+            return redirect_resolver.resolve_many(
+                redirect_urls,
+                transport.get_redirect_session(self.config),
+                headers=headers,
+                timeout=5,
+                max_workers=self.config.MAX_CRAWL_CONCURRENCY,
+                max_heads=self.config.REDIRECT_MAX_HEADS
+            )
     
     def _extract_domain(self, url):
         """Domain çıkar"""
@@ -344,47 +627,72 @@ class SimpleQueryGenerator:
     
     @staticmethod
     def generate_queries(company, country):
-        """Sadece 5-6 önemli sorgu"""
-        
-        simple_company = ' '.join(company.split()[:2])
+        """Sadece 5-6 önemli sorgu - anlamca aynı olanlar bir kez"""
+        queries = [query for _, query in query_planner.build_queries(company, country)]
         
-        queries = [
-            f"{simple_company} {country} export",
-            f"{simple_company} {country} import", 
-            f"{simple_company} Russia",
-            f"{simple_company} trade",
-            f"{company} {country}",
-            f"{simple_company} customs",
-        ]
-        
-        logging.info(f"🔍 {len(queries)} sorgu: {queries}")
+        logging.info("🔍 %d sorgu: %s", len(queries), queries)
         return queries
 
 class QuickEURLexChecker:
     def __init__(self, config):
         self.config = config
-        self.sanction_cache = {}
+        self.sanction_cache = disk_cache.get_cache(
+            config.SANCTION_CACHE_PATH,
+            'sanction_codes',
+            config.SANCTION_CACHE_TTL,
+            config.SANCTION_CACHE_MAX_ENTRIES
+        )
     
     def quick_check_gtip(self, gtip_codes):
-        """GTIP kontrolü"""
+        """Kesin yaptırımlı kodlar (bkz. check_gtip)"""
+        return self.check_gtip(gtip_codes)['sanctioned']
+    
+    def check_gtip(self, gtip_codes):
+        """GTIP kontrolü - {'sanctioned', 'partial', 'unverified'} kod listeleri
+        
+        partial: kodun yalnızca bazı alt pozisyonları listede (kesin yaptırım değil).
+        unverified: yerel indekste yok ve EUR-Lex ile doğrulanamadı.
+        """
+        verdict = {'sanctioned': [], 'partial': [], 'unverified': []}
         if not gtip_codes:
-            return []
-            
-        sanctioned_codes = []
+            return verdict
+        
+        # Yerel AB yaptırım indeksi ağa çıkmadan kesin/kısmi eşleşmeleri bulur; indeks
+        # eksiksiz işaretlenmediyse listede olmayan kodlar EUR-Lex'e sorulur
+        index = sanction_index.get_index(self.config)
+        pending = []
+        for code in gtip_codes:
+            match = index.classify(code) if index is not None else None
+            if match == sanction_index.SANCTIONED:
+                verdict['sanctioned'].append(code)
+            elif match == sanction_index.PARTIAL:
+                verdict['partial'].append(code)
+            elif index is None or not self.config.SANCTION_INDEX_COMPLETE:
+                pending.append(code)
+        
+        if index is not None:
+            logging.info("🔍 AB yaptırım indeksi kontrolü: %d kod, %d yaptırımlı, %d kısmi", len(gtip_codes),
+                         len(verdict['sanctioned']), len(verdict['partial']), extra=log_config.sampled())
+        if pending:
+            self._check_eurlex(pending, verdict)
+        return verdict
+    
+    def _check_eurlex(self, gtip_codes, verdict):
+        """İlk MAX_GTIP_CHECK kodu EUR-Lex'te ara; kalanlar ve hatalılar doğrulanmamış sayılır"""
         checked_codes = gtip_codes[:self.config.MAX_GTIP_CHECK]
+        verdict['unverified'].extend(gtip_codes[self.config.MAX_GTIP_CHECK:])
         
-        logging.info(f"🔍 EUR-Lex kontrolü: {checked_codes}")
+        logging.info("🔍 EUR-Lex kontrolü: %s", checked_codes)
         
         for gtip_code in checked_codes:
-            if gtip_code in self.sanction_cache:
-                if self.sanction_cache[gtip_code]:
-                    sanctioned_codes.append(gtip_code)
+            cached = self.sanction_cache.get(gtip_code)
+            if cached is not None:
+                if cached:
+                    verdict['sanctioned'].append(gtip_code)
                 continue
                 
             try:
-                time.sleep(1)
-                
-                url = "https://eur-lex.europa.eu/search.html"
+                url = self.config.EURLEX_SEARCH_URL
                 params = {
                     'text': f'"{gtip_code}" sanction',
                     'type': 'advanced',
@@ -395,9 +703,11 @@ class QuickEURLexChecker:
                     'User-Agent': random.choice(self.config.USER_AGENTS),
                 }
                 
-                response = requests.get(url, params=params, headers=headers, timeout=10)
+                response = transport.get_session(self.config).get(url, params=params, headers=headers, timeout=10)
                 
                 if response.status_code == 200:
+                    from bs4 import BeautifulSoup
+                    
                     soup = BeautifulSoup(response.text, 'html.parser')
                     content = soup.get_text().lower()
                     
@@ -405,17 +715,18 @@ class QuickEURLexChecker:
                     found_sanction = any(term in content for term in sanction_terms)
                     
                     if found_sanction:
-                        sanctioned_codes.append(gtip_code)
-                        self.sanction_cache[gtip_code] = True
-                        logging.info(f"⛔ Yaptırımlı kod: {gtip_code}")
+                        verdict['sanctioned'].append(gtip_code)
+                        self.sanction_cache.set(gtip_code, True)
+                        logging.info("⛔ Yaptırımlı kod: %s", gtip_code)
                     else:
-                        self.sanction_cache[gtip_code] = False
+                        self.sanction_cache.set(gtip_code, False)
+                else:
+                    logging.warning("❌ EUR-Lex kontrol hatası %s: %s", response.status_code, gtip_code)
+                    verdict['unverified'].append(gtip_code)
                 
             except Exception as e:
-                logging.error(f"❌ EUR-Lex kontrol hatası: {e}")
-                continue
-        
-        return sanctioned_codes
+                logging.error("❌ EUR-Lex kontrol hatası: %s", e)
+                verdict['unverified'].append(gtip_code)
 
 class SmartTradeAnalyzer:
     def __init__(self, config):
@@ -424,20 +735,135 @@ class SmartTradeAnalyzer:
         self.crawler = SmartCrawler(config)
         self.eur_lex_checker = QuickEURLexChecker(config)
         self.query_generator = SimpleQueryGenerator()
+        self.query_planner = query_planner.QueryPlanner(config)
     
     def smart_analyze(self, company, country):
-        """Akıllı analiz - DEMO MOD"""
-        logging.info(f"🤖 DEMO ANALİZ MODU: {company} ↔ {country}")
+        """Akıllı analiz - tüm sonuçları liste olarak döndür
+
+        Çağıranın (istek/iş) korelasyon kimliği varsa o, yoksa yeni bir kimlik
+        analizin tüm loglarına (crawl thread'leri dahil) eklenir.
+        """
+        with log_config.correlation(log_config.correlation_id.get()):
+            results = [
+                event['result']
+                for event in self.iter_analyze(company, country)
+                if event['type'] == 'result'
+            ]
+            
+            if results:
+                logging.info("✅ Analiz tamamlandı: %d sonuç", len(results))
+            else:
+                logging.warning("❌ Analiz sonucu bulunamadı")
+        return results
+    
+    def iter_analyze(self, company, country):
+        """Analiz olaylarını üretildikçe döndür: stage, search_hit, crawl, sanction, result"""
+        if self.config.DEMO_MODE:
+            logging.info("🤖 DEMO ANALİZ MODU: %s ↔ %s", company, country)
+            yield {'type': 'stage', 'stage': 'demo'}
+            
+            # Demo modda çalış - gerçek arama yapmadan örnek sonuçlar döndür
+            for result in self._generate_demo_results(company, country):
+                yield {'type': 'result', 'result': result_record.ResultRecord.from_dict(result)}
+            return
+        
+        yield from self._iter_live_analysis(company, country)
+    
+    def _iter_live_analysis(self, company, country):
+        """Gerçek boru hattı: sorgu -> arama -> crawl -> yaptırım kontrolü"""
+        with metrics.span('query_plan'):
+            plan = self.query_planner.plan(company, country)
+        yield {'type': 'stage', 'stage': 'search', 'queries': [query for _, query in plan]}
+        
+        hits = {}
+        strong_hits = 0
+        for template_id, query in plan:
+            new_hits = new_strong = 0
+            try:
+                with metrics.span('search'):
+                    search_hits = self.searcher.search(query, self.config.MAX_RESULTS)
+            except SearchError as e:
+                # Başarısız arama şablonun verimini düşürmesin; istemci hatayı görsün
+                yield {'type': 'search_error', 'query': query, 'error': str(e)}
+                continue
+            for hit in search_hits:
+                if hit['url'] in hits:
+                    continue
+                hits[hit['url']] = hit
+                new_hits += 1
+                if self.query_planner.is_strong(hit, company, country):
+                    new_strong += 1
+                yield {'type': 'search_hit', 'query': query, 'hit': hit}
+            
+            self.query_planner.record(template_id, new_hits, new_strong)
+            strong_hits += new_strong
+            if strong_hits >= self.config.QUERY_TARGET_STRONG_HITS:
+                logging.info("⏹️ Yeterli güçlü sonuç (%d), kalan sorgular atlandı", strong_hits)
+                break
+        
+        yield {'type': 'stage', 'stage': 'crawl', 'urls': len(hits)}
+        
+        for url, crawl in self.crawler.crawl_many(list(hits), country):
+            yield {'type': 'crawl', 'url': url, 'crawl': crawl}
+            
+            with metrics.span('sanction_check'):
+                sanction = self.eur_lex_checker.check_gtip(crawl.get('gtip_full_codes', crawl['gtip_codes']))
+            yield {
+                'type': 'sanction',
+                'url': url,
+                'gtip_codes': crawl['gtip_codes'],
+                'sanctioned_codes': sanction['sanctioned'],
+                'partial_codes': sanction['partial'],
+                'unverified_codes': sanction['unverified']
+            }
+            
+            yield {
+                'type': 'result',
+                'result': self._build_result(company, country, hits.pop(url), crawl, sanction)
+            }
+    
+    def _build_result(self, company, country, hit, crawl, sanction):
+        """Arama sonucu + crawl + yaptırım kontrolünden (check_gtip) rapor satırı (ResultRecord)"""
+        snippet_hits = country_matcher.get_matcher(country).scan(hit.get('full_text', ''))
+        country_connection = crawl['country_found'] or snippet_hits[country_matcher.country_key(country)] > 0
         
-        # Demo modda çalış - gerçek arama yapmadan örnek sonuçlar döndür
-        demo_results = self._generate_demo_results(company, country)
+        confidence = 40
+        if crawl['status_code'] == 200:
+            confidence += 20
+        if country_connection:
+            confidence += 15
+        if gtip_extractor.EXPLICIT in crawl.get('gtip_context', {}).values():
+            confidence += 15
+        confidence = min(confidence, 95)
         
-        if demo_results:
-            logging.info(f"✅ Demo analiz tamamlandı: {len(demo_results)} sonuç")
-            return demo_results
+        explanation = None
+        if sanction['sanctioned']:
+            status = result_record.HIGH_RISK
+        elif sanction['partial']:
+            status = result_record.PARTIAL_MATCH
+            explanation = result_record.describe_codes(status, company, country, sanction['partial'])
+        elif sanction['unverified']:
+            status = result_record.UNVERIFIED
+            explanation = result_record.describe_codes(status, company, country, sanction['unverified'])
+        elif country_connection:
+            status = result_record.RISK_FOUND
         else:
-            logging.warning("❌ Demo analiz başarısız")
-            return []
+            status = result_record.CLEAN
+        
+        return result_record.ResultRecord(
+            company=company,
+            country=country,
+            status=status,
+            country_connection=country_connection,
+            gtip_codes=crawl['gtip_codes'],
+            sanctioned_codes=sanction['sanctioned'],
+            explanation=explanation,
+            confidence=confidence,
+            title=hit.get('title', ''),
+            url=hit.get('url', ''),
+            snippet=hit.get('snippet', ''),
+            search_engine=hit.get('search_engine', '')
+        )
     
     def _generate_demo_results(self, company, country):
         """Demo sonuçlar oluştur"""
@@ -478,70 +904,247 @@ class SmartTradeAnalyzer:
         
         return demo_data
 
-def create_excel_report(results, company, country):
-    """Excel raporu"""
-    try:
-        filename = f"{company.replace(' ', '_')}_{country}_ticaret_analiz.xlsx"
-        filepath = os.path.join('/tmp', filename)
-        
-        wb = Workbook()
-        ws1 = wb.active
-        ws1.title = "Analiz Sonuçları"
-        
-        headers = [
-            'ŞİRKET', 'ÜLKE', 'DURUM', 'YAPTIRIM_RISKI', 'ULKE_BAGLANTISI',
-            'TESPIT_EDILEN_GTIPLER', 'YAPTIRIMLI_GTIPLER', 'GÜVEN_SEVİYESİ',
-            'AI_AÇIKLAMA', 'AI_TAVSIYE', 'BAŞLIK', 'URL'
-        ]
-        
-        for col, header in enumerate(headers, 1):
-            cell = ws1.cell(row=1, column=col, value=header)
-            cell.font = Font(bold=True)
-        
-        for row, result in enumerate(results, 2):
-            ws1.cell(row=row, column=1, value=str(result.get('ŞİRKET', '')))
-            ws1.cell(row=row, column=2, value=str(result.get('ÜLKE', '')))
-            ws1.cell(row=row, column=3, value=str(result.get('DURUM', '')))
-            ws1.cell(row=row, column=4, value=str(result.get('YAPTIRIM_RISKI', '')))
-            ws1.cell(row=row, column=5, value=str(result.get('ULKE_BAGLANTISI', '')))
-            ws1.cell(row=row, column=6, value=str(result.get('TESPIT_EDILEN_GTIPLER', '')))
-            ws1.cell(row=row, column=7, value=str(result.get('YAPTIRIMLI_GTIPLER', '')))
-            ws1.cell(row=row, column=8, value=str(result.get('GÜVEN_SEVİYESİ', '')))
-            ws1.cell(row=row, column=9, value=str(result.get('AI_AÇIKLAMA', '')))
-            ws1.cell(row=row, column=10, value=str(result.get('AI_TAVSIYE', '')))
-            ws1.cell(row=row, column=11, value=str(result.get('BAŞLIK', '')))
-            ws1.cell(row=row, column=12, value=str(result.get('URL', '')))
-        
-        for column in ws1.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws1.column_dimensions[column_letter].width = adjusted_width
-        
-        wb.save(filepath)
-        logging.info(f"✅ Excel raporu oluşturuldu: {filepath}")
-        return filepath
-        
-    except Exception as e:
-        logging.error(f"❌ Excel rapor hatası: {e}")
-        return None
-
 # Flask Route'ları
+@app.before_request
+def _bind_correlation_id():
+    """İstek boyunca loglara X-Request-ID (yoksa yeni kimlik) eklenir"""
+    g.correlation_token = log_config.correlation_id.set(
+        request.headers.get('X-Request-ID') or log_config.new_correlation_id()
+    )
+
+@app.after_request
+def _expose_correlation_id(response):
+    response.headers['X-Request-ID'] = log_config.correlation_id.get() or ''
+    return response
+
+@app.teardown_request
+def _reset_correlation_id(exc=None):
+    token = g.pop('correlation_token', None)
+    if token is not None:
+        log_config.correlation_id.reset(token)
+
 @app.route('/')
 def home():
     return render_template('index.html')
 
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue():
+    """Bu worker'ın iş kuyruğu (ilk kullanımda oluşturulur)"""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            config = Config()
+            store = jobs.JobStore(
+                config.JOB_DB_PATH,
+                config.JOB_TIMEOUT,
+                kind_timeouts={'batch': config.BATCH_JOB_TIMEOUT}
+            )
+            _job_queue = jobs.JobQueue(
+                store,
+                max_workers=config.JOB_WORKERS,
+                max_pending=config.MAX_PENDING_JOBS,
+                retention=config.JOB_RETENTION
+            )
+        return _job_queue
+
+_report_store = None
+_report_store_lock = threading.Lock()
+
+def get_report_store():
+    """Bu worker'ın rapor deposu"""
+    global _report_store
+    with _report_store_lock:
+        if _report_store is None:
+            config = Config()
+            _report_store = report_store.ReportStore(
+                max_bytes=config.REPORT_STORE_MAX_BYTES,
+                max_age=config.REPORT_STORE_MAX_AGE,
+                spool_size=config.REPORT_SPOOL_SIZE
+            )
+        return _report_store
+
+_profile_store = None
+_profile_store_lock = threading.Lock()
+
+def get_profile_store():
+    """Profiller tüm worker'ların okuyabildiği SQLite'ta, iş saklama süresi kadar tutulur"""
+    global _profile_store
+    with _profile_store_lock:
+        if _profile_store is None:
+            config = Config()
+            _profile_store = profiler.ProfileStore(config.PROFILE_DB_PATH, config.JOB_RETENTION)
+        return _profile_store
+
+_analyzer = None
+_analyzer_lock = threading.Lock()
+_startup = {}
+
+def get_analyzer():
+    """Bu worker'ın paylaşılan analyzer'ı - oturumlar, önbellekler ve host limitleri ortak"""
+    global _analyzer
+    with _analyzer_lock:
+        if _analyzer is None:
+            _analyzer = SmartTradeAnalyzer(Config())
+            _configure_metrics(_analyzer)
+        return _analyzer
+
+def _configure_metrics(analyzer):
+    """Ortak metrik deposu, izlenen önbellekler, host etiketleri ve iş gauge'ı"""
+    config = analyzer.config
+    metrics.configure(config.METRICS_PATH)
+    metrics.watch_hosts(
+        [rate_limiter.host_key(config.SEARCH_URL), rate_limiter.host_key(config.EURLEX_SEARCH_URL)]
+        + list(config.HOST_RATE_LIMITS) + list(config.HOST_POOL_SIZES)
+    )
+    metrics.watch_cache('search', analyzer.searcher.search_cache)
+    metrics.watch_cache('sanction', analyzer.eur_lex_checker.sanction_cache)
+    metrics.watch_cache('crawl_pages', analyzer.crawler.crawl_cache.pages)
+    metrics.watch_cache('crawl_content', analyzer.crawler.crawl_cache.contents)
+    metrics.register_gauge(metrics.JOBS_IN_FLIGHT, lambda: get_job_queue().in_flight)
+
+def warm_up():
+    """Worker başlangıcı (gunicorn post_fork): ilk istek beklemesin diye her şeyi hazırla"""
+    started = time.perf_counter()
+    analyzer = get_analyzer()
+    config = analyzer.config
+    get_job_queue()
+    get_report_store()
+    if not config.DEMO_MODE:
+        sanction_index.get_index(config)
+        country_matcher.get_matcher()
+        transport.get_session(config)
+        transport.get_scraper(config)
+    
+    warmup_seconds = time.perf_counter() - started
+    total_seconds = IMPORT_SECONDS + warmup_seconds
+    _startup.update({
+        "import_seconds": round(IMPORT_SECONDS, 3),
+        "warmup_seconds": round(warmup_seconds, 3),
+        "budget_seconds": config.STARTUP_BUDGET,
+        "within_budget": total_seconds <= config.STARTUP_BUDGET
+    })
+    if total_seconds > config.STARTUP_BUDGET:
+        logging.warning("⏱️ Başlangıç bütçesi aşıldı: %.2fs > %ss", total_seconds, config.STARTUP_BUDGET)
+    else:
+        logging.info("🔥 Worker hazır: import %.2fs + ısınma %.2fs", IMPORT_SECONDS, warmup_seconds)
+    return _startup
+
+def _run_profiled(mode, profile_id, func, *args, **kwargs):
+    """func'ı istenen profil modunda çalıştır; profil (iş hata verse de) saklanır"""
+    if not mode:
+        return func(*args, **kwargs)
+    
+    active = profiler.Capture(mode, get_analyzer().config.PROFILE_INTERVAL).start()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        result = active.stop()
+        try:
+            get_profile_store().save(profile_id, result)
+            logging.info("🔬 Profil kaydedildi: %s (%s, %.2fs)", profile_id, active.mode,
+                         result.summary['wall_seconds'])
+        except Exception as e:
+            logging.warning("❌ Profil kaydedilemedi %s: %s", profile_id, e)
+
+def run_analysis(company, country, emit=None, save_rows=None, profile=None):
+    """Analiz işi - profile verilirse iş kimliğiyle profillenir (bkz. /profiles/<id>)"""
+    return _run_profiled(profile, log_config.correlation_id.get(), _run_analysis, company, country, emit, save_rows)
+
+def _run_analysis(company, country, emit=None, save_rows=None):
+    """Analiz işi - olayları emit ile yayınlar, satırları save_rows ile iş deposuna yazar"""
+    start_time = time.time()
+    
+    logging.info("🚀 ANALİZ BAŞLATILIYOR: %s - %s", company, country)
+    
+    analyzer = get_analyzer()
+    config = analyzer.config
+    
+    total_results = 0
+    search_errors = []
+    for event in analyzer.iter_analyze(company, country):
+        if emit:
+            emit(event)
+        if event['type'] == 'result':
+            total_results += 1
+            if save_rows:
+                save_rows([result_record.to_row(event['result'])])
+        elif event['type'] == 'search_error':
+            search_errors.append({'query': event['query'], 'error': event['error']})
+    
+    execution_time = time.time() - start_time
+    metrics.observe(metrics.STAGE_SECONDS, execution_time, {'stage': 'analysis'})
+    
+    return {
+        "success": True,
+        "company": company,
+        "country": country,
+        "execution_time": f"{execution_time:.2f}s",
+        "total_results": total_results,
+        "search_errors": search_errors,
+        "note": _analysis_note(config, search_errors)
+    }
+
+def _analysis_note(config, search_errors):
+    if config.DEMO_MODE:
+        return "⚠️ DEMO MOD: Gerçek veriler yerine örnek sonuçlar gösteriliyor"
+    if search_errors:
+        return f"⚠️ {len(search_errors)} arama başarısız oldu; sonuçlar eksik olabilir"
+    return None
+
+def run_batch_analysis(pairs, emit=None, save_rows=None, profile=None):
+    """Toplu tarama işi - profile verilirse iş kimliğiyle profillenir"""
+    return _run_profiled(profile, log_config.correlation_id.get(), _run_batch_analysis, pairs, emit, save_rows)
+
+def _run_batch_analysis(pairs, emit=None, save_rows=None):
+    """Toplu tarama işi - tek analyzer, tek konsolide rapor (satırlar şirket bittikçe iş deposuna)"""
+    analyzer = get_analyzer()
+    config = analyzer.config
+    
+    def save_company_rows(rows, part=0):
+        if save_rows:
+            save_rows([result_record.to_row(row) for row in rows], part=part)
+    
+    summary = batch.run_batch(analyzer, pairs, config.BATCH_WORKERS, save_company_rows, emit=emit)
+    metrics.observe(metrics.STAGE_SECONDS, summary['duration'], {'stage': 'batch'})
+    
+    return {
+        "success": True,
+        "total_rows": summary['total_rows'],
+        "unique_companies": summary['unique_companies'],
+        "execution_time": f"{summary['duration']:.2f}s",
+        "companies_per_minute": round(summary['companies_per_minute'], 2),
+        "total_results": summary['total_results'],
+        "errors": summary['errors']
+    }
+
+def _requested_profile_mode(allow_sampling=True):
+    """X-Profile başlığı / ?profile= bayrağı; yoksa PROFILE_SAMPLE_RATE oranında 'sample'"""
+    mode = profiler.parse_mode(request.headers.get('X-Profile') or request.args.get('profile'))
+    if mode is None and allow_sampling:
+        rate = get_analyzer().config.PROFILE_SAMPLE_RATE
+        if rate > 0 and random.random() < rate:
+            mode = profiler.SAMPLE
+    return mode
+
+def _job_status_payload(job):
+    return {
+        "job_id": job['id'],
+        "status": job['status'],
+        "error": job['error'],
+        "created_at": datetime.fromtimestamp(job['created']).isoformat(),
+        "started_at": datetime.fromtimestamp(job['started']).isoformat() if job['started'] else None,
+        "finished_at": datetime.fromtimestamp(job['finished']).isoformat() if job['finished'] else None,
+        "status_url": f"/jobs/{job['id']}",
+        "result_url": f"/jobs/{job['id']}/result",
+        "events_url": f"/jobs/{job['id']}/events",
+        "profile_url": f"/profiles/{job['id']}" if job['params'].get('profile') else None
+    }
+
 @app.route('/analyze', methods=['POST'])
 def analyze():
     try:
-        start_time = time.time()
-        
         data = request.get_json()
         company = data.get('company', '').strip()
         country = data.get('country', '').strip()
@@ -549,60 +1152,265 @@ def analyze():
         if not company or not country:
             return jsonify({"error": "Şirket ve ülke bilgisi gereklidir"}), 400
         
-        logging.info(f"🚀 DEMO ANALİZ BAŞLATILIYOR: {company} - {country}")
+        params = {'company': company, 'country': country}
+        profile = _requested_profile_mode()
+        if profile:
+            params['profile'] = profile
+        
+        job_id = get_job_queue().submit('analyze', params, run_analysis)
+        logging.info("📥 Analiz kuyruğa alındı: %s (%s - %s)", job_id, company, country, extra={'job_id': job_id})
+        
+        return jsonify({
+            "success": True,
+            "job_id": job_id,
+            "status": jobs.QUEUED,
+            "status_url": f"/jobs/{job_id}",
+            "result_url": f"/jobs/{job_id}/result",
+            "events_url": f"/jobs/{job_id}/events",
+            "profile_url": f"/profiles/{job_id}" if profile else None
+        }), 202
+        
+    except jobs.QueueFullError as e:
+        logging.warning("❌ Kuyruk dolu: %s", e)
+        return jsonify({"error": "Sunucu meşgul, lütfen biraz sonra tekrar deneyin"}), 503
+    except Exception as e:
+        logging.error("❌ Analiz hatası: %s", e)
+        return jsonify({"error": f"Sunucu hatası: {str(e)}"}), 500
+
+@app.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """CSV/XLSX şirket listesi ile toplu tarama"""
+    try:
+        upload = request.files.get('file')
+        if upload is None or not upload.filename:
+            return jsonify({"error": "Şirket listesi dosyası (file) gereklidir"}), 400
         
         config = Config()
-        analyzer = SmartTradeAnalyzer(config)
+        default_country = request.form.get('country', '').strip()
+        pairs = batch.read_company_list(upload.stream, upload.filename, default_country)
         
-        results = analyzer.smart_analyze(company, country)
+        if len(pairs) > config.MAX_BATCH_COMPANIES:
+            return jsonify({"error": f"En fazla {config.MAX_BATCH_COMPANIES} şirket taranabilir"}), 400
         
-        excel_filepath = create_excel_report(results, company, country)
+        params = {'pairs': pairs}
+        profile = _requested_profile_mode()
+        if profile:
+            params['profile'] = profile
         
-        execution_time = time.time() - start_time
+        job_id = get_job_queue().submit('batch', params, run_batch_analysis)
+        logging.info("📥 Toplu tarama kuyruğa alındı: %s (%d satır)", job_id, len(pairs), extra={'job_id': job_id})
         
-        response_data = {
+        return jsonify({
             "success": True,
-            "company": company,
-            "country": country,
-            "execution_time": f"{execution_time:.2f}s",
-            "total_results": len(results),
-            "analysis": results,
-            "excel_download_url": f"/download-excel?company={company}&country={country}" if excel_filepath else None,
-            "note": "⚠️ DEMO MOD: Gerçek veriler yerine örnek sonuçlar gösteriliyor"
-        }
-        
-        return jsonify(response_data)
+            "job_id": job_id,
+            "status": jobs.QUEUED,
+            "total_rows": len(pairs),
+            "status_url": f"/jobs/{job_id}",
+            "result_url": f"/jobs/{job_id}/result",
+            "events_url": f"/jobs/{job_id}/events",
+            "profile_url": f"/profiles/{job_id}" if profile else None
+        }), 202
         
+    except batch.BatchInputError as e:
+        return jsonify({"error": str(e)}), 400
+    except jobs.QueueFullError as e:
+        logging.warning("❌ Kuyruk dolu: %s", e)
+        return jsonify({"error": "Sunucu meşgul, lütfen biraz sonra tekrar deneyin"}), 503
     except Exception as e:
-        logging.error(f"❌ Analiz hatası: {e}")
+        logging.error("❌ Toplu tarama hatası: %s", e)
         return jsonify({"error": f"Sunucu hatası: {str(e)}"}), 500
 
-@app.route('/download-excel')
-def download_excel():
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = get_job_queue().store.get(job_id)
+    if job is None:
+        return jsonify({"error": "İş bulunamadı"}), 404
+    return jsonify(_job_status_payload(job))
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    job = get_job_queue().store.get(job_id, with_result=True)
+    if job is None:
+        return jsonify({"error": "İş bulunamadı"}), 404
+    if job['status'] == jobs.FAILED:
+        return jsonify({"success": False, "error": job['error'], "job_id": job_id}), 500
+    if job['status'] != jobs.DONE:
+        return jsonify(_job_status_payload(job)), 202
+    
+    # Satırlar sayfa sayfa döner: ?offset=&limit= (sonraki sayfa next_url'de)
+    config = Config()
     try:
-        company = request.args.get('company', '')
-        country = request.args.get('country', '')
-        
-        filename = f"{company.replace(' ', '_')}_{country}_ticaret_analiz.xlsx"
-        filepath = os.path.join('/tmp', filename)
-        
-        if os.path.exists(filepath):
-            return send_file(
-                filepath,
-                as_attachment=True,
-                download_name=filename,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-        else:
-            return jsonify({"error": "Excel dosyası bulunamadı"}), 404
+        offset = max(int(request.args.get('offset', 0)), 0)
+        limit = min(max(int(request.args.get('limit', config.JOB_RESULT_PAGE_SIZE)), 1), config.JOB_RESULT_MAX_PAGE)
+    except ValueError:
+        return jsonify({"error": "offset ve limit tamsayı olmalıdır"}), 400
+    
+    store = get_job_queue().store
+    result = job['result']
+    total = result.get('total_results', 0)
+    result['analysis'] = [
+        result_record.ResultRecord.from_row(row).to_dict() for row in store.get_rows(job_id, offset, limit)
+    ]
+    result['offset'] = offset
+    result['limit'] = limit
+    result['next_url'] = f"/jobs/{job_id}/result?offset={offset + limit}&limit={limit}" if offset + limit < total else None
+    
+    has_rows = total > 0
+    result['excel_download_url'] = f"/jobs/{job_id}/excel" if has_rows else None
+    result['export_urls'] = {
+        fmt: f"/jobs/{job_id}/export/{fmt}" for fmt in exporters.available_formats()
+    } if has_rows else {}
+    return jsonify(result)
+
+def _report_filename(job, extension):
+    if job['kind'] == 'batch':
+        return f"toplu_tarama_{datetime.fromtimestamp(job['created']):%Y%m%d_%H%M%S}_ticaret_analiz.{extension}"
+    params = job['params']
+    return f"{params['company'].replace(' ', '_')}_{params['country']}_ticaret_analiz.{extension}"
+
+@app.route('/jobs/<job_id>/export/<fmt>')
+def job_export(job_id, fmt):
+    """Raporu istenen formatta bellekten akıt - yoksa iş satırlarından şimdi üret"""
+    try:
+        try:
+            exporter = exporters.get_exporter(fmt)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        reports = get_report_store()
+        report_id = f"{job_id}.{exporter.name}"
+        # Profil istenirse rapor bellekte olsa da yeniden üretilir (yalnız açık istekle)
+        profile = _requested_profile_mode(allow_sampling=False)
+        if profile:
+            reports.discard(report_id)
+        report = reports.get(report_id)
+        if report is None:
+            store = get_job_queue().store
+            job = store.get(job_id, with_result=True)
+            if job is None or job['status'] != jobs.DONE or not job['result'].get('total_results'):
+                return jsonify({"error": "Rapor bulunamadı"}), 404
             
+            def build(buffer):
+                # Satırlar iş deposundan parça parça, paketli kayıt olarak okunur - sözlüğe dönmez
+                records = map(result_record.ResultRecord.from_row, store.iter_rows(job_id))
+                with metrics.span('report_write'):
+                    rows = exporter.write(records, buffer)
+                logging.info("✅ %s raporu oluşturuldu: %s (%d satır)", exporter.name.upper(), job_id, rows)
+                return _report_filename(job, exporter.extension)
+            
+            report = _run_profiled(profile, report_id, reports.get_or_build, report_id, build)
+        
+        headers = {
+            'Content-Disposition': f"attachment; filename*=UTF-8''{urllib.parse.quote(report.filename)}",
+            'Content-Length': str(report.size)
+        }
+        if profile:
+            headers['X-Profile-URL'] = f"/profiles/{report_id}"
+        return Response(report.iter_chunks(), mimetype=exporter.mimetype, headers=headers)
+        
     except Exception as e:
-        logging.error(f"❌ Excel indirme hatası: {e}")
+        logging.error("❌ Rapor indirme hatası: %s", e)
         return jsonify({"error": f"İndirme hatası: {str(e)}"}), 500
 
+@app.route('/jobs/<job_id>/excel')
+def job_excel(job_id):
+    return job_export(job_id, 'xlsx')
+
+def _sse_message(event_type, payload, event_id=None):
+    """Tek bir server-sent event bloğu"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {payload}")
+    return '\n'.join(lines) + '\n\n'
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """İş ilerlemesini SSE olarak aktar - olaylar SQLite'tan okunur, bellekte tutulmaz"""
+    store = get_job_queue().store
+    if store.get(job_id) is None:
+        return jsonify({"error": "İş bulunamadı"}), 404
+    
+    config = Config()
+    try:
+        last_seq = int(request.headers.get('Last-Event-ID', -1))
+    except ValueError:
+        last_seq = -1
+    
+    def generate():
+        seq = last_seq
+        started = last_write = time.time()
+        yield f"retry: {config.SSE_RETRY_MS}\n\n"
+        while True:
+            job = store.get(job_id)
+            events = store.get_events(job_id, seq)
+            for seq, event_type, payload in events:
+                yield _sse_message(event_type, payload, seq)
+                last_write = time.time()
+            
+            # Durum olaylardan önce okundu: bitmişse tüm olaylar zaten yazılmıştı
+            if not events and job['status'] in (jobs.DONE, jobs.FAILED):
+                yield _sse_message('end', json.dumps(_job_status_payload(job), ensure_ascii=False))
+                return
+            
+            if time.time() - started > config.SSE_MAX_STREAM_SECONDS:
+                # İstemci kaldığı olaydan (Last-Event-ID) yeniden bağlanır
+                return
+            
+            if time.time() - last_write > config.SSE_KEEPALIVE_INTERVAL:
+                yield ': keep-alive\n\n'
+                last_write = time.time()
+            if not events:
+                time.sleep(config.SSE_POLL_INTERVAL)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/profiles/<profile_id>')
+def profile_download(profile_id):
+    """Profil indirme - ?format=json (özet, varsayılan) | pstats (cProfile) | collapsed (flamegraph)"""
+    result = get_profile_store().get(profile_id)
+    if result is None:
+        return jsonify({"error": "Profil bulunamadı"}), 404
+    
+    fmt = request.args.get('format', 'json')
+    if fmt == 'json':
+        return jsonify(result.summary)
+    if fmt == 'pstats' and result.pstats is not None:
+        return Response(result.pstats, mimetype='application/octet-stream', headers={
+            'Content-Disposition': f'attachment; filename="{profile_id}.prof"'
+        })
+    if fmt == 'collapsed' and result.collapsed is not None:
+        return Response(result.collapsed, mimetype='text/plain; charset=utf-8', headers={
+            'Content-Disposition': f'attachment; filename="{profile_id}.collapsed.txt"'
+        })
+    return jsonify({"error": f"Bu profil için '{fmt}' formatı yok ({result.summary['mode']} modu)"}), 404
+
+@app.route('/download-excel')
+def download_excel():
+    """Eski indirme adresi - ?job_id= ile /jobs/<id>/excel'e yönlendirir"""
+    return job_excel(request.args.get('job_id', ''))
+
 @app.route('/health')
 def health():
-    return jsonify({"status": "healthy", "timestamp": datetime.now().isoformat()})
+    return jsonify({
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "startup": _startup or None,
+        "jobs_in_flight": get_job_queue().in_flight
+    })
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus metin formatı - aşama histogramları, önbellek, upstream ve iş metrikleri"""
+    get_analyzer()
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+IMPORT_SECONDS = time.perf_counter() - BOOT_STARTED
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
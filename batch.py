@@ -0,0 +1,152 @@
+"""Toplu şirket taraması - CSV/XLSX tedarikçi listeleri
+
+Liste okunur, aynı şirket/ülke çiftleri tekilleştirilir ve tüm çiftler tek
+bir analyzer üzerinden (arama/crawl/yaptırım önbellekleri ortak) sınırlı
+paralellikle analiz edilir. Her şirketin satırları bittiği anda save_rows'a
+verilir; tarama boyunca bellekte yalnızca sayaçlar kalır.
+"""
+import csv
+import io
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import profiler
+from log_config import submit_with_context
+from normalize import normalize_key
+
+COMPANY_COLUMNS = ('company', 'şirket', 'sirket', 'şirket adı', 'sirket adi', 'firma', 'supplier')
+COUNTRY_COLUMNS = ('country', 'ülke', 'ulke', 'hedef ülke', 'target country')
+
+
+class BatchInputError(ValueError):
+    """Okunamayan ya da boş şirket listesi"""
+
+
+def _find_column(header, candidates):
+    wanted = {normalize_key(candidate) for candidate in candidates}
+    for index, name in enumerate(header):
+        if normalize_key(name) in wanted:
+            return index
+    return None
+
+
+def _rows_to_pairs(rows, default_country):
+    """Başlık satırı varsa kolonları adından, yoksa sırasından bul"""
+    rows = [[str(cell).strip() if cell is not None else '' for cell in row] for row in rows]
+    rows = [row for row in rows if any(row)]
+    if not rows:
+        return []
+
+    company_index = _find_column(rows[0], COMPANY_COLUMNS)
+    country_index = _find_column(rows[0], COUNTRY_COLUMNS)
+    if company_index is None:
+        company_index, country_index = 0, (1 if len(rows[0]) > 1 else None)
+    else:
+        rows = rows[1:]
+
+    pairs = []
+    for row in rows:
+        company = row[company_index] if company_index < len(row) else ''
+        country = row[country_index] if country_index is not None and country_index < len(row) else ''
+        country = country or default_country or ''
+        if company and country:
+            pairs.append((company, country))
+    return pairs
+
+
+def read_company_list(stream, filename, default_country=None):
+    """CSV ya da XLSX dosyasından (şirket, ülke) çiftleri"""
+    extension = os.path.splitext(filename or '')[1].lower()
+    data = stream.read()
+
+    if extension in ('.xlsx', '.xlsm'):
+        from openpyxl import load_workbook
+
+        wb = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+        try:
+            rows = list(wb.active.iter_rows(values_only=True))
+        finally:
+            wb.close()
+    elif extension in ('.csv', '.txt', ''):
+        text = data.decode('utf-8-sig') if isinstance(data, bytes) else data
+        try:
+            dialect = csv.Sniffer().sniff(text[:4096], delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        rows = list(csv.reader(io.StringIO(text), dialect))
+    else:
+        raise BatchInputError(f"Desteklenmeyen dosya türü: {extension}")
+
+    pairs = _rows_to_pairs(rows, default_country)
+    if not pairs:
+        raise BatchInputError("Listede şirket bulunamadı")
+    return pairs
+
+
+def dedupe_pairs(pairs):
+    """Aynı şirket/ülke çiftini bir kez tut (ilk görülen yazım korunur)"""
+    unique = {}
+    for company, country in pairs:
+        key = (normalize_key(company), normalize_key(country))
+        unique.setdefault(key, (company, country))
+    return list(unique.values())
+
+
+def run_batch(analyzer, pairs, max_workers, save_rows, emit=None):
+    """Tüm çiftleri ortak analyzer ile analiz et
+
+    Şirket bitince save_rows(rows, part=girdi sırası) çağrılır; satırları girdi
+    sırasıyla okumak için part kullanılır. Dönüşte yalnızca özet sayaçlar vardır.
+    """
+    start_time = time.time()
+    unique_pairs = dedupe_pairs(pairs)
+    total_results = 0
+    errors = []
+
+    logging.info("📋 Toplu tarama: %d satır, %d benzersiz şirket", len(pairs), len(unique_pairs))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            submit_with_context(executor, profiler.traced(analyzer.smart_analyze), company, country): index
+            for index, (company, country) in enumerate(unique_pairs)
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            index = futures[future]
+            company, country = unique_pairs[index]
+            try:
+                rows = future.result()
+            except Exception as e:
+                logging.error("❌ Toplu tarama hatası (%s): %s", company, e)
+                errors.append({'company': company, 'country': country, 'error': str(e)})
+                rows = []
+            # Futures sözlüğü sonucu tutmasın - satırlar yazıldıktan sonra bırakılır
+            del futures[future]
+
+            save_rows(rows, part=index)
+            total_results += len(rows)
+
+            if emit:
+                emit({
+                    'type': 'company_done',
+                    'company': company,
+                    'country': country,
+                    'results': len(rows),
+                    'done': done,
+                    'total': len(unique_pairs)
+                })
+
+    duration = time.time() - start_time
+    throughput = len(unique_pairs) / (duration / 60) if duration > 0 else 0.0
+
+    logging.info("✅ Toplu tarama tamamlandı: %d şirket, %.1f şirket/dakika", len(unique_pairs), throughput)
+
+    return {
+        'total_results': total_results,
+        'errors': errors,
+        'total_rows': len(pairs),
+        'unique_companies': len(unique_pairs),
+        'duration': duration,
+        'companies_per_minute': throughput,
+    }
@@ -0,0 +1,360 @@
+"""Çevrimdışı benchmark - kayıtlı fikstürlerle boru hattının verim ve gecikme ölçümü
+
+Ağa çıkılmaz: DuckDuckGo, ticaret sayfaları ve EUR-Lex yerel fixture_server
+üzerinden sunulur, önbellekler geçici bir dizinde soğuk başlar. Her ölçüm için
+işlem/saniye ve p50/p95/p99 gecikmeleri JSON olarak yazdırılır; sonuçlar
+sürümler arasında karşılaştırılabilir.
+
+Kullanım:
+    python benchmark.py
+    python benchmark.py --only parse_results,e2e_analyze --iterations 500
+    python benchmark.py --output bench.json
+"""
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+import fixture_server
+
+BENCH_COMPANY = 'Genel Oto Sanayi ve Ticaret'
+BENCH_COUNTRY = 'Russia'
+TRADE_PAGES = ('trade-1.html', 'trade-2.html', 'trade-3.html', 'customs-1.html')
+BENCH_GTIPS = ['870829', '8708', '870323', '841330', '3926', '7304', '8471', '850440']
+
+JOB_POLL_INTERVAL = 0.005
+JOB_WAIT_TIMEOUT = 120
+
+
+def percentile(sorted_values, pct):
+    """En yakın sıra yöntemiyle yüzdelik"""
+    if not sorted_values:
+        return None
+    rank = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def summarize(durations, wall_seconds=None, units=1):
+    """Gecikme listesi (saniye) -> JSON özeti; wall_seconds verilmezse ölçümler toplanır"""
+    ordered = sorted(durations)
+    wall_seconds = wall_seconds if wall_seconds is not None else sum(durations)
+
+    def ms(value):
+        return round(value * 1000, 3) if value is not None else None
+
+    return {
+        "iterations": len(durations),
+        "total_seconds": round(wall_seconds, 4),
+        "ops_per_sec": round(len(durations) * units / wall_seconds, 2) if wall_seconds else None,
+        "mean_ms": ms(sum(durations) / len(durations)) if durations else None,
+        "min_ms": ms(ordered[0]) if ordered else None,
+        "p50_ms": ms(percentile(ordered, 50)),
+        "p95_ms": ms(percentile(ordered, 95)),
+        "p99_ms": ms(percentile(ordered, 99)),
+        "max_ms": ms(ordered[-1]) if ordered else None,
+    }
+
+
+def measure(func, iterations, warmup=3, setup=None):
+    """func'ı iterations kez çalıştır; setup (varsa) ölçüm dışında her turdan önce çağrılır"""
+    for i in range(warmup):
+        if setup:
+            setup(i)
+        func(i)
+
+    durations = []
+    for i in range(iterations):
+        if setup:
+            setup(i)
+        started = time.perf_counter()
+        func(i)
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+@contextmanager
+def without_sanction_index():
+    """EUR-Lex yolunu ölçmek için yerel yaptırım indeksini geçici olarak devre dışı bırak"""
+    import sanction_index
+
+    original = sanction_index.get_index
+    sanction_index.get_index = lambda config: None
+    try:
+        yield
+    finally:
+        sanction_index.get_index = original
+
+
+class Bench:
+    """Fikstür sunucusuna bağlı analyzer ve ölçüm fonksiyonları"""
+
+    def __init__(self, server, workdir, args):
+        self.server = server
+        self.args = args
+
+        # Config ortamdan okunur - app importundan önce ayarlanmalı
+        os.environ['DEMO_MODE'] = '0'
+        os.environ['SEARCH_URL'] = server.search_url
+        os.environ['EURLEX_SEARCH_URL'] = server.eurlex_url
+        os.environ['SANCTION_CACHE_PATH'] = os.path.join(workdir, 'cache.sqlite3')
+        os.environ['JOB_DB_PATH'] = os.path.join(workdir, 'jobs.sqlite3')
+        # Yerel sunucu için host limiti ölçümü bozmasın; sınırlayıcının kendi maliyeti ölçümde kalır
+        os.environ['RATE_LIMIT_DEFAULT'] = '10000,10000'
+
+        import app
+
+        self.app = app
+        logging_level = 'INFO' if args.verbose else 'WARNING'
+        app.logging.getLogger().setLevel(logging_level)
+
+        self.analyzer = app.get_analyzer()
+        self.config = self.analyzer.config
+
+        self.search_html = (
+            fixture_server.load_fixture(fixture_server.SEARCH_FIXTURE)
+            .replace(b'{{BASE}}', server.base_url.encode('ascii'))
+            .replace(b'{{SLUG}}', b'bench')
+            .decode('utf-8')
+        )
+        self.pages = [fixture_server.load_fixture(name) for name in TRADE_PAGES]
+        self.page_texts = [self._page_text(body) for body in self.pages]
+
+    def _page_text(self, body):
+        import html_stream
+
+        return ''.join(html_stream.iter_text_chunks(
+            body,
+            max_bytes=self.config.MAX_PARSE_BYTES,
+            max_chars=self.config.MAX_PARSE_CHARS,
+            chunk_size=self.config.STREAM_CHUNK_SIZE
+        ))
+
+    def _sample_results(self, rows):
+        import result_record
+
+        return [
+            result_record.ResultRecord(
+                company=BENCH_COMPANY,
+                country=BENCH_COUNTRY,
+                status=(result_record.HIGH_RISK, result_record.RISK_FOUND, result_record.CLEAN)[i % 3],
+                country_connection=i % 3 != 2,
+                gtip_codes=BENCH_GTIPS[:1 + i % len(BENCH_GTIPS)],
+                sanctioned_codes=BENCH_GTIPS[:1] if i % 3 == 0 else (),
+                confidence=40 + i % 55,
+                title=f'{BENCH_COMPANY} ticaret kaydı {i}',
+                url=f'{self.server.base_url}/pages/bench/trade-{i}.html',
+                snippet=f'{BENCH_COMPANY} şirketinin {BENCH_COUNTRY} ile ticaret verileri, satır {i}',
+                search_engine='duckduckgo'
+            )
+            for i in range(rows)
+        ]
+
+    def bench_parse_results(self):
+        searcher = self.analyzer.searcher
+        durations = measure(
+            lambda i: searcher._parse_results(self.search_html, self.config.MAX_RESULTS),
+            self.args.iterations
+        )
+        return summarize(durations)
+
+    def bench_parse_content(self):
+        crawler = self.analyzer.crawler
+        pages = self.pages
+        durations = measure(
+            lambda i: crawler._parse_content(pages[i % len(pages)], BENCH_COUNTRY, 200),
+            self.args.iterations
+        )
+        result = summarize(durations)
+        total_bytes = sum(len(pages[i % len(pages)]) for i in range(len(durations)))
+        result["mb_per_sec"] = round(total_bytes / sum(durations) / 1e6, 2)
+        return result
+
+    def bench_extract_gtip_codes(self):
+        crawler = self.analyzer.crawler
+        texts = self.page_texts
+        durations = measure(
+            lambda i: crawler.extract_gtip_codes(texts[i % len(texts)]),
+            self.args.iterations
+        )
+        return summarize(durations)
+
+    def bench_quick_check_gtip(self):
+        checker = self.analyzer.eur_lex_checker
+        durations = measure(lambda i: checker.quick_check_gtip(BENCH_GTIPS), self.args.iterations)
+        return summarize(durations)
+
+    def bench_quick_check_gtip_eurlex(self):
+        """İndeks yokken EUR-Lex'e giden yol - önbellek her turda boşaltılır"""
+        import disk_cache
+
+        checker = self.analyzer.eur_lex_checker
+
+        def reset_cache(i):
+            checker.sanction_cache = disk_cache.MemoryCache(
+                'sanction_codes', self.config.SANCTION_CACHE_TTL, self.config.SANCTION_CACHE_MAX_ENTRIES
+            )
+
+        original_cache = checker.sanction_cache
+        try:
+            with without_sanction_index():
+                durations = measure(
+                    lambda i: checker.quick_check_gtip(BENCH_GTIPS),
+                    self.args.iterations,
+                    setup=reset_cache
+                )
+        finally:
+            checker.sanction_cache = original_cache
+        return summarize(durations)
+
+    def bench_exports(self):
+        """Her format için --rows satırlık rapor (create_excel_report yerine exporters)"""
+        import exporters
+
+        results = self._sample_results(self.args.rows)
+        summaries = {}
+        for fmt in exporters.available_formats():
+            exporter = exporters.get_exporter(fmt)
+            sizes = []
+
+            def write(i):
+                buffer = io.BytesIO()
+                exporter.write(results, buffer)
+                sizes.append(buffer.tell())
+
+            durations = measure(write, self.args.export_iterations, warmup=1)
+            summary = summarize(durations)
+            summary["rows"] = self.args.rows
+            summary["rows_per_sec"] = round(self.args.rows * len(durations) / sum(durations), 1)
+            summary["bytes"] = sizes[-1]
+            summaries[f"export_{fmt}"] = summary
+        return summaries
+
+    def bench_e2e_analyze(self):
+        """POST /analyze -> iş bitene kadar yoklama; her iş farklı şirket adıyla (soğuk arama)"""
+        flask_app = self.app.app
+        iterations = self.args.e2e_iterations
+        failures = []
+
+        def run_job(i):
+            client = flask_app.test_client()
+            started = time.perf_counter()
+            response = client.post('/analyze', json={
+                # Önek ilk iki kelimeye girer - her iş kendi sorgularıyla soğuk aramaya gider
+                'company': f'B{i} {BENCH_COMPANY}',
+                'country': BENCH_COUNTRY
+            })
+            if response.status_code != 202:
+                failures.append(response.status_code)
+                return None
+            job_id = response.get_json()['job_id']
+            deadline = started + JOB_WAIT_TIMEOUT
+            while time.perf_counter() < deadline:
+                result = client.get(f'/jobs/{job_id}/result')
+                if result.status_code != 202:
+                    elapsed = time.perf_counter() - started
+                    if result.status_code != 200:
+                        failures.append(result.status_code)
+                        return None
+                    return elapsed, result.get_json()['total_results']
+                time.sleep(JOB_POLL_INTERVAL)
+            failures.append('timeout')
+            return None
+
+        run_job(-1)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.args.concurrency) as executor:
+            outcomes = [outcome for outcome in executor.map(run_job, range(iterations)) if outcome]
+        wall_seconds = time.perf_counter() - started
+
+        summary = summarize([elapsed for elapsed, _ in outcomes], wall_seconds)
+        summary["concurrency"] = self.args.concurrency
+        summary["results_per_job"] = round(sum(rows for _, rows in outcomes) / len(outcomes), 2) if outcomes else 0
+        summary["failures"] = len(failures)
+        return summary
+
+
+BENCHMARKS = (
+    'parse_results',
+    'parse_content',
+    'extract_gtip_codes',
+    'quick_check_gtip',
+    'quick_check_gtip_eurlex',
+    'exports',
+    'e2e_analyze',
+)
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(args):
+    selected = [name.strip() for name in args.only.split(',')] if args.only else list(BENCHMARKS)
+    unknown = [name for name in selected if name not in BENCHMARKS]
+    if unknown:
+        raise SystemExit(f"Bilinmeyen benchmark: {', '.join(unknown)} (seçenekler: {', '.join(BENCHMARKS)})")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "e2e_iterations": args.e2e_iterations,
+            "concurrency": args.concurrency,
+        },
+        "benchmarks": {},
+    }
+
+    with tempfile.TemporaryDirectory(prefix='ticaret_bench_') as workdir:
+        with fixture_server.FixtureServer() as server:
+            bench = Bench(server, workdir, args)
+            for name in selected:
+                print(f"⏱️ {name}...", file=sys.stderr)
+                result = getattr(bench, f"bench_{name}")()
+                if name == 'exports':
+                    report["benchmarks"].update(result)
+                else:
+                    report["benchmarks"][name] = result
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Kayıtlı fikstürlerle çevrimdışı performans ölçümü')
+    parser.add_argument('--only', default='', help=f"Virgülle ayrılmış alt küme: {', '.join(BENCHMARKS)}")
+    parser.add_argument('--iterations', type=int, default=200, help='Mikro ölçümlerin tur sayısı')
+    parser.add_argument('--e2e-iterations', type=int, default=20, help='Uçtan uca /analyze iş sayısı')
+    parser.add_argument('--concurrency', type=int, default=4, help='Eşzamanlı /analyze istemcisi')
+    parser.add_argument('--rows', type=int, default=5000, help='Dışa aktarım ölçümünde satır sayısı')
+    parser.add_argument('--export-iterations', type=int, default=5)
+    parser.add_argument('--output', help='JSON sonucu bu dosyaya da yaz')
+    parser.add_argument('--verbose', action='store_true', help='Uygulama loglarını göster')
+    args = parser.parse_args()
+
+    report = run(args)
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""Çoklu ülke anahtar kelime eşleştirici - Aho-Corasick otomatı
+
+Tüm ülke takma adları tek bir otomata derlenir; metin bir kez taranır ve
+eşleşen her ülke için isabet sayısı döner. Eşleşmeler kelime sınırıyla
+kontrol edilir ('rus' kelimesi "virus" ya da "trust" içinde eşleşmez).
+"""
+import threading
+from collections import Counter
+
+# Arayüzde sunulan ülkeler ve takma adları (küçük harf)
+COUNTRY_ALIASES = {
+    'Russia': [
+        'russia', 'russian', 'russians', 'russian federation', 'rusya',
+        'rusya federasyonu', 'rus', 'россия', 'российская федерация',
+    ],
+    'China': [
+        'china', 'chinese', "people's republic of china", 'prc', 'çin',
+        'çin halk cumhuriyeti', 'китай',
+    ],
+    'Iran': [
+        'iran', 'iranian', 'islamic republic of iran', 'iran islam cumhuriyeti',
+    ],
+    'Turkey': [
+        'turkey', 'turkish', 'türkiye', 'turkiye', 'türkiye cumhuriyeti', 'türk',
+    ],
+    'Belarus': [
+        'belarus', 'belarusian', 'beyaz rusya', 'беларусь',
+    ],
+}
+
+# Bu uzunluktan kısa takma adlar sağdan da kelime sınırı ister;
+# daha uzunları ek alabilir ("rusya'dan", "rusyadan", "russians")
+MIN_PREFIX_ALIAS_LENGTH = 5
+
+# Serbest metin ülke girdileri için derlenmiş otomat sayısı sınırı
+MAX_CACHED_MATCHERS = 64
+
+_matchers = {}
+_matchers_lock = threading.Lock()
+
+
+def normalize(text):
+    """Küçük harf + Türkçe 'İ' küçültmesinden kalan birleşik noktayı at"""
+    return text.lower().replace('\u0307', '')
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == '_'
+
+
+class CountryMatcher:
+    def __init__(self, aliases_by_country):
+        # Düğüm başına geçiş tablosu, hata bağlantısı ve çıktı listesi
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        self._patterns = []
+
+        for country, aliases in aliases_by_country.items():
+            for alias in aliases:
+                alias = normalize(alias)
+                if alias:
+                    self._add(alias, country)
+        self._build()
+
+    def _add(self, alias, country):
+        node = 0
+        for ch in alias:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = nxt
+        self._output[node].append(len(self._patterns))
+        self._patterns.append((alias, country, len(alias) >= MIN_PREFIX_ALIAS_LENGTH))
+
+    def _build(self):
+        """BFS ile hata bağlantılarını kur"""
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+    def _iter_raw_matches(self, text):
+        """(başlangıç, bitiş, desen no) - sınır kontrolü öncesi tüm eşleşmeler"""
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        root = goto[0]
+        node = 0
+
+        for index, ch in enumerate(text):
+            if node == 0 and ch not in root:
+                continue
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for pattern_id in output[node]:
+                length = len(self._patterns[pattern_id][0])
+                yield index - length + 1, index + 1, pattern_id
+
+    def scan(self, text):
+        """Metindeki ülke isabetleri: Counter({'Russia': 3, ...})"""
+        text = normalize(text)
+        text_length = len(text)
+        candidates = []
+
+        for start, end, pattern_id in self._iter_raw_matches(text):
+            if start > 0 and _is_word_char(text[start - 1]):
+                continue
+            alias, country, allows_suffix = self._patterns[pattern_id]
+            if not allows_suffix and end < text_length and _is_word_char(text[end]):
+                continue
+            candidates.append((start, -end, country))
+
+        # Çakışanlarda en uzun eşleşme kazanır ("beyaz rusya" -> yalnız Belarus)
+        hits = Counter()
+        covered_until = -1
+        for start, neg_end, country in sorted(candidates):
+            if start < covered_until:
+                continue
+            hits[country] += 1
+            covered_until = -neg_end
+        return hits
+
+
+def country_key(country):
+    """Kullanıcının girdiği ülke adını kanonik anahtara çevir ('Rusya' -> 'Russia')"""
+    name = normalize(country.strip())
+    for key, aliases in COUNTRY_ALIASES.items():
+        if name == key.lower() or name in (normalize(alias) for alias in aliases):
+            return key
+    return country.strip()
+
+
+def matcher_variant(target_country=None):
+    """Otomatı belirleyen ek ülke - bilinen ülkeler için None"""
+    key = country_key(target_country) if target_country else None
+    return key if key and key not in COUNTRY_ALIASES else None
+
+
+def get_matcher(target_country=None):
+    """Bilinen ülkeler (+ listede olmayan hedef ülke) için önbelleğe alınmış otomat"""
+    extra = matcher_variant(target_country)
+
+    with _matchers_lock:
+        matcher = _matchers.get(extra)
+        if matcher is None:
+            if len(_matchers) >= MAX_CACHED_MATCHERS:
+                _matchers.clear()
+            aliases = dict(COUNTRY_ALIASES)
+            if extra:
+                aliases[extra] = [extra]
+            matcher = CountryMatcher(aliases)
+            _matchers[extra] = matcher
+        return matcher
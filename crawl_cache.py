@@ -0,0 +1,111 @@
+"""Crawl önbelleği - kanonik URL + içerik özeti
+
+Ham HTML değil, sayfadan çıkarılmış sonuç (ülke isabetleri, GTIP kodları,
+önizleme) saklanır. İki tablo kullanılır:
+
+- crawl_pages:   kanonik URL -> ETag / Last-Modified / içerik özeti
+- crawl_content: içerik özeti -> çıkarılmış sonuç
+
+Taze sayfalar ağa çıkmadan döner; süresi geçenler koşullu GET ile doğrulanır
+(304 gelirse tekrar indirilmez). Aynı içeriğe farklı URL'lerden ulaşılırsa
+yalnızca bir kez ayrıştırılır.
+"""
+import hashlib
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import country_matcher
+import disk_cache
+
+TRACKING_PREFIXES = ('utm_',)
+TRACKING_PARAMS = frozenset(['gclid', 'fbclid', 'yclid', 'mc_cid', 'mc_eid', 'ref', 'ref_src'])
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonical_url(url):
+    """Şema/host küçük harf, varsayılan port, fragment ve izleme parametreleri atılır"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f'{host}:{parts.port}'
+
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_PARAMS and not name.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit((scheme, host, parts.path or '/', urlencode(query), ''))
+
+
+def content_hash(body):
+    return hashlib.sha256(body).hexdigest()
+
+
+class CrawlCache:
+    def __init__(self, config):
+        self.fresh_for = config.CRAWL_CACHE_FRESH
+        self.pages = disk_cache.get_cache(
+            config.CRAWL_CACHE_PATH, 'crawl_pages', config.CRAWL_CACHE_TTL, config.CRAWL_CACHE_MAX_ENTRIES
+        )
+        self.contents = disk_cache.get_cache(
+            config.CRAWL_CACHE_PATH, 'crawl_content', config.CRAWL_CACHE_TTL, config.CRAWL_CACHE_MAX_ENTRIES
+        )
+
+    @staticmethod
+    def _content_key(digest, target_country):
+        # Bilinen ülkeler tek otomatla taranır; listede olmayan hedef ülke ayrı sonuç üretir
+        return f'{digest}|{country_matcher.matcher_variant(target_country)}'
+
+    def lookup(self, url, target_country):
+        """(sayfa kaydı, çıkarılmış sonuç) ya da (None, None)"""
+        page = self.pages.get(canonical_url(url))
+        if page is None:
+            return None, None
+        content = self.contents.get(self._content_key(page['hash'], target_country))
+        if content is None:
+            return None, None
+        return page, content
+
+    def is_fresh(self, page):
+        return time.time() - page['checked'] < self.fresh_for
+
+    @staticmethod
+    def conditional_headers(page):
+        """Koşullu GET başlıkları"""
+        headers = {}
+        if page.get('etag'):
+            headers['If-None-Match'] = page['etag']
+        if page.get('last_modified'):
+            headers['If-Modified-Since'] = page['last_modified']
+        return headers
+
+    def get_content(self, digest, target_country):
+        return self.contents.get(self._content_key(digest, target_country))
+
+    def store(self, url, target_country, response_headers, digest, content=None):
+        """Sayfa doğrulayıcılarını (ve yeni ayrıştırıldıysa sonucu) kaydet"""
+        if content is not None:
+            self.contents.set(self._content_key(digest, target_country), content)
+        self.pages.set(canonical_url(url), {
+            'etag': response_headers.get('ETag'),
+            'last_modified': response_headers.get('Last-Modified'),
+            'hash': digest,
+            'checked': time.time(),
+        })
+
+    def touch(self, url, page, response_headers):
+        """304 sonrası: içerik aynı, doğrulama zamanını yenile"""
+        page = dict(page, checked=time.time())
+        page['etag'] = response_headers.get('ETag') or page.get('etag')
+        page['last_modified'] = response_headers.get('Last-Modified') or page.get('last_modified')
+        self.pages.set(canonical_url(url), page)
+
+
+def result_from_content(content, target_country, status_code=200):
+    """Önbellekteki çıkarılmış sonuçtan crawl sonucu"""
+    countries = content.get('countries', {})
+    return dict(
+        content,
+        country_found=countries.get(country_matcher.country_key(target_country), 0) > 0,
+        status_code=status_code
+    )
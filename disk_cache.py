@@ -0,0 +1,249 @@
+"""SQLite tabanlı kalıcı önbellek - TTL, LRU boyut sınırı ve isabet sayaçları
+
+Aynı dosyayı açan tüm gunicorn worker'ları aynı önbelleği görür.
+Değerler JSON olarak saklanır. Dosya yolu verilmezse aynı arayüzle
+süreç içi MemoryCache kullanılır.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# LRU zaman damgasını her okumada yazmamak için hassasiyet (saniye)
+ACCESS_RESOLUTION = 60
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def open_connection(path):
+    """Worker'lar arası paylaşıma uygun (WAL, autocommit) SQLite bağlantısı"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+class DiskCache:
+    def __init__(self, path, table, ttl, max_entries):
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+
+    def _connect(self):
+        """Thread ve süreç başına bağlantı"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        conn = open_connection(self.path)
+        conn.execute(
+            f'CREATE TABLE IF NOT EXISTS {self.table} ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+            'created REAL NOT NULL, last_access REAL NOT NULL)'
+        )
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {self.table}_lru ON {self.table} (last_access)')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key, default=None):
+        """Değeri getir - süresi dolmuşsa silinir ve ıska sayılır"""
+        now = time.time()
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                f'SELECT value, created FROM {self.table} WHERE key = ?', (key,)
+            ).fetchone()
+
+            if row is None:
+                self._count(False)
+                return default
+
+            value, created = row
+            if self.ttl and now - created > self.ttl:
+                conn.execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+                self._count(False)
+                return default
+
+            conn.execute(
+                f'UPDATE {self.table} SET last_access = ? WHERE key = ? AND last_access < ?',
+                (now, key, now - ACCESS_RESOLUTION)
+            )
+            self._count(True)
+            return json.loads(value)
+
+        except sqlite3.Error as e:
+            logging.warning("❌ Önbellek okuma hatası (%s): %s", self.table, e)
+            self._count(False)
+            return default
+
+    def set(self, key, value):
+        """Değeri yaz ve boyut sınırını aşan en eski kayıtları at"""
+        now = time.time()
+        try:
+            conn = self._connect()
+            conn.execute(
+                f'INSERT OR REPLACE INTO {self.table} (key, value, created, last_access) VALUES (?, ?, ?, ?)',
+                (key, json.dumps(value, ensure_ascii=False), now, now)
+            )
+            self._evict(conn)
+        except sqlite3.Error as e:
+            logging.warning("❌ Önbellek yazma hatası (%s): %s", self.table, e)
+
+    def update(self, key, func, default=None):
+        """func(mevcut değer ya da default) sonucunu yaz ve döndür
+
+        Okuma ve yazma tek bir BEGIN IMMEDIATE işleminde yapılır; aynı anahtarı
+        güncelleyen worker'lar sıraya girer, artışlar kaybolmaz.
+        """
+        now = time.time()
+        try:
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute(
+                    f'SELECT value, created FROM {self.table} WHERE key = ?', (key,)
+                ).fetchone()
+                created = now
+                current = default
+                if row is not None and not (self.ttl and now - row[1] > self.ttl):
+                    current, created = json.loads(row[0]), row[1]
+
+                value = func(current)
+                conn.execute(
+                    f'INSERT OR REPLACE INTO {self.table} (key, value, created, last_access) VALUES (?, ?, ?, ?)',
+                    (key, json.dumps(value, ensure_ascii=False), created, now)
+                )
+                self._evict(conn)
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            return value
+        except sqlite3.Error as e:
+            logging.warning("❌ Önbellek güncelleme hatası (%s): %s", self.table, e)
+            return None
+
+    def _evict(self, conn):
+        """LRU tahliyesi"""
+        if not self.max_entries:
+            return
+        (size,) = conn.execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()
+        overflow = size - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                f'DELETE FROM {self.table} WHERE key IN '
+                f'(SELECT key FROM {self.table} ORDER BY last_access ASC LIMIT ?)',
+                (overflow,)
+            )
+
+    def __len__(self):
+        try:
+            (size,) = self._connect().execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()
+            return size
+        except sqlite3.Error:
+            return 0
+
+    def stats(self):
+        """İsabet/ıska sayaçları (bu süreç için)"""
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else 0.0,
+            'size': len(self),
+        }
+
+
+class MemoryCache:
+    """Süreç içi TTL + LRU önbellek - DiskCache ile aynı arayüz"""
+
+    def __init__(self, table, ttl, max_entries):
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (self.ttl and now - entry[1] > self.ttl):
+                self._entries.pop(key, None)
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while self.max_entries and len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def update(self, key, func, default=None):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            current = default if entry is None or (self.ttl and now - entry[1] > self.ttl) else entry[0]
+            value = func(current)
+            self._entries[key] = (value, now if current is default else entry[1])
+            self._entries.move_to_end(key)
+            while self.max_entries and len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return value
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else 0.0,
+            'size': len(self),
+        }
+
+
+def get_cache(path, table, ttl, max_entries):
+    """Aynı dosya/tablo için süreç içinde tek önbellek örneği (path boşsa bellek içi)"""
+    key = (path, table)
+    with _registry_lock:
+        cache = _registry.get(key)
+        if cache is None:
+            if path:
+                cache = DiskCache(path, table, ttl, max_entries)
+            else:
+                cache = MemoryCache(table, ttl, max_entries)
+            _registry[key] = cache
+        return cache
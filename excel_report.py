@@ -0,0 +1,87 @@
+"""Akışlı Excel rapor yazıcı - openpyxl write-only modu
+
+Satırlar geldikçe diske yazılır; bellek kullanımı satır sayısından bağımsızdır.
+Write-only sayfada kolon genişlikleri ilk satırdan önce belirlenmek zorunda
+olduğundan ilk WIDTH_SAMPLE_ROWS satır tamponlanır, genişlikler bu örnek
+üzerinden artımlı hesaplanır ve ardından tüm satırlar akışla yazılır.
+"""
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+
+REPORT_COLUMNS = [
+    'ŞİRKET', 'ÜLKE', 'DURUM', 'YAPTIRIM_RISKI', 'ULKE_BAGLANTISI',
+    'TESPIT_EDILEN_GTIPLER', 'YAPTIRIMLI_GTIPLER', 'GÜVEN_SEVİYESİ',
+    'AI_AÇIKLAMA', 'AI_TAVSIYE', 'BAŞLIK', 'URL'
+]
+
+SHEET_TITLE = "Analiz Sonuçları"
+MAX_COLUMN_WIDTH = 50
+WIDTH_SAMPLE_ROWS = 500
+
+
+class ReportWriter:
+    """Sonuç sözlüklerini tek tek ekle, close() ile dosyayı kapat"""
+
+    def __init__(self, filepath, columns=None, sample_rows=WIDTH_SAMPLE_ROWS):
+        self.filepath = filepath
+        self.columns = list(columns or REPORT_COLUMNS)
+        self.sample_rows = sample_rows
+        self.rows_written = 0
+        self._widths = [len(column) for column in self.columns]
+        self._pending = []
+        self._wb = Workbook(write_only=True)
+        self._ws = self._wb.create_sheet(SHEET_TITLE)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+    def append(self, result):
+        row = [str(result.get(column, '')) for column in self.columns]
+        if self._pending is None:
+            self._ws.append(row)
+            self.rows_written += 1
+            return
+
+        for index, value in enumerate(row):
+            if len(value) > self._widths[index]:
+                self._widths[index] = len(value)
+        self._pending.append(row)
+        if len(self._pending) >= self.sample_rows:
+            self._flush_sample()
+
+    def _flush_sample(self):
+        """Genişlikleri sabitle, başlığı ve tamponlanan satırları yaz"""
+        for index, width in enumerate(self._widths, 1):
+            self._ws.column_dimensions[get_column_letter(index)].width = min(width + 2, MAX_COLUMN_WIDTH)
+
+        header = []
+        for column in self.columns:
+            cell = WriteOnlyCell(self._ws, value=column)
+            cell.font = Font(bold=True)
+            header.append(cell)
+        self._ws.append(header)
+
+        for row in self._pending:
+            self._ws.append(row)
+        self.rows_written += len(self._pending)
+        self._pending = None
+
+    def close(self):
+        if self._pending is not None:
+            self._flush_sample()
+        self._wb.save(self.filepath)
+        return self.filepath
+
+
+def write_report(results, filepath):
+    """Sonuç iterable'ını dosyaya akışla yaz - satır sayısını döndürür"""
+    with ReportWriter(filepath) as writer:
+        for result in results:
+            writer.append(result)
+    return writer.rows_written
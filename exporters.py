@@ -0,0 +1,159 @@
+"""Sonuç şeması ve dışa aktarıcılar - XLSX, CSV, NDJSON, Parquet
+
+Analiz satırları ResultRecord ya da Türkçe anahtarlı sözlüklerdir. Veri
+ambarına giden formatlar bunları RESULT_SCHEMA ile tipli kayıtlara çevirir:
+GTIP listeleri dizi, ülke bağlantısı bool, güven seviyesi tamsayı olur.
+Parquet için pyarrow gerekir; kurulu değilse format listelenmez.
+"""
+import csv
+import importlib.util
+import io
+import json
+from collections import namedtuple
+
+from result_record import ResultRecord
+
+# Ağır bağımlılıklar (openpyxl, pyarrow) yalnızca o format yazılırken yüklenir
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+# (sonuç anahtarı, dışa aktarım kolonu, tip)
+Field = namedtuple('Field', 'key name type')
+
+RESULT_SCHEMA = (
+    Field('ŞİRKET', 'company', 'str'),
+    Field('ÜLKE', 'country', 'str'),
+    Field('DURUM', 'status', 'str'),
+    Field('YAPTIRIM_RISKI', 'sanction_risk', 'str'),
+    Field('ULKE_BAGLANTISI', 'country_connection', 'bool'),
+    Field('TESPIT_EDILEN_GTIPLER', 'detected_gtips', 'list'),
+    Field('YAPTIRIMLI_GTIPLER', 'sanctioned_gtips', 'list'),
+    Field('GÜVEN_SEVİYESİ', 'confidence', 'int'),
+    Field('AI_AÇIKLAMA', 'explanation', 'str'),
+    Field('AI_TAVSIYE', 'advice', 'str'),
+    Field('BAŞLIK', 'title', 'str'),
+    Field('URL', 'url', 'str'),
+    Field('ÖZET', 'snippet', 'str'),
+    Field('ARAMA_MOTORU', 'search_engine', 'str'),
+)
+
+COLUMN_NAMES = [field.name for field in RESULT_SCHEMA]
+
+# Parquet yazarken bellekte tutulacak satır sayısı
+PARQUET_BATCH_ROWS = 10000
+# CSV satırları bu boyutta parçalar halinde yazılır
+CSV_CHUNK_CHARS = 64 * 1024
+
+Exporter = namedtuple('Exporter', 'name mimetype extension write')
+
+EXPORTERS = {}
+
+
+def _convert(value, kind):
+    if kind == 'list':
+        if isinstance(value, (list, tuple)):
+            return [str(item) for item in value]
+        return [item.strip() for item in str(value or '').split(',') if item.strip()]
+    if kind == 'bool':
+        return value is True or str(value).upper() in ('EVET', 'TRUE', '1')
+    if kind == 'int':
+        digits = ''.join(ch for ch in str(value or '') if ch.isdigit())
+        return int(digits) if digits else None
+    return '' if value is None else str(value)
+
+
+def to_record(result):
+    """Türkçe anahtarlı sonuç ya da ResultRecord -> tipli kayıt"""
+    if isinstance(result, ResultRecord):
+        # Kayıt alanları şema kolon adlarıyla aynı - metin ayrıştırma yok
+        return {field.name: getattr(result, field.name) for field in RESULT_SCHEMA}
+    return {field.name: _convert(result.get(field.key), field.type) for field in RESULT_SCHEMA}
+
+
+def register_exporter(name, mimetype, extension, write):
+    """Yeni format ekle - write(results, fileobj) ikili dosyaya yazar"""
+    EXPORTERS[name] = Exporter(name, mimetype, extension, write)
+
+
+def available_formats():
+    return list(EXPORTERS)
+
+
+def get_exporter(name):
+    """Format adından dışa aktarıcı; bilinmiyorsa ValueError"""
+    exporter = EXPORTERS.get((name or '').lower())
+    if exporter is None:
+        raise ValueError(f"Desteklenmeyen format: {name} (desteklenenler: {', '.join(EXPORTERS)})")
+    return exporter
+
+
+def _write_xlsx(results, fileobj):
+    import excel_report
+
+    return excel_report.write_report(results, fileobj)
+
+
+def _write_csv(results, fileobj):
+    # TextIOWrapper yerine metin tamponu: fileobj'den yalnızca write() beklenir
+    # (3.9'daki SpooledTemporaryFile'da readable()/writable() yok)
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(COLUMN_NAMES)
+    rows = 0
+    for result in results:
+        record = to_record(result)
+        writer.writerow([
+            ', '.join(value) if isinstance(value, list) else value
+            for value in record.values()
+        ])
+        rows += 1
+        if text.tell() >= CSV_CHUNK_CHARS:
+            _flush_text(text, fileobj)
+    _flush_text(text, fileobj)
+    return rows
+
+
+def _flush_text(text, fileobj):
+    fileobj.write(text.getvalue().encode('utf-8'))
+    text.seek(0)
+    text.truncate()
+
+
+def _write_ndjson(results, fileobj):
+    rows = 0
+    for result in results:
+        fileobj.write(json.dumps(to_record(result), ensure_ascii=False).encode('utf-8'))
+        fileobj.write(b'\n')
+        rows += 1
+    return rows
+
+
+def _arrow_schema(pa):
+    types = {'str': pa.string(), 'bool': pa.bool_(), 'int': pa.int32(), 'list': pa.list_(pa.string())}
+    return pa.schema([(field.name, types[field.type]) for field in RESULT_SCHEMA])
+
+
+def _write_parquet(results, fileobj):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(pa)
+    rows = 0
+    batch = []
+    with pq.ParquetWriter(fileobj, schema, compression='snappy') as writer:
+        for result in results:
+            batch.append(to_record(result))
+            if len(batch) >= PARQUET_BATCH_ROWS:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                rows += len(batch)
+                batch = []
+        if batch or not rows:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            rows += len(batch)
+    return rows
+
+
+register_exporter('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx', _write_xlsx)
+register_exporter('csv', 'text/csv', 'csv', _write_csv)
+register_exporter('ndjson', 'application/x-ndjson', 'ndjson', _write_ndjson)
+if HAS_PYARROW:
+    register_exporter('parquet', 'application/vnd.apache.parquet', 'parquet', _write_parquet)
@@ -0,0 +1,321 @@
+"""Yerel mock arama/crawl/EUR-Lex sunucusu - çevrimdışı benchmark ve yük testi için
+
+DuckDuckGo HTML araması, ticaret sayfaları ve EUR-Lex araması data/fixtures
+altındaki kayıtlı yanıtlardan sunulur; ağa çıkılmaz. Arama sonuçlarındaki
+linkler sorguya özgü yollara gider ({{SLUG}}), böylece farklı sorgular farklı
+URL'ler crawl eder. Sayfalar ETag ile sunulur, If-None-Match gelirse 304 döner.
+
+Gecikme, 500/403/429 enjeksiyonu ve sayfa boyutu Faults ile ayarlanır; --seed
+verilirse hata dizisi tekrarlanabilir. İstek/durum sayaçları /__stats adresinde.
+
+Kullanım:
+    python fixture_server.py --port 8765 --latency-ms 150 --jitter-ms 50 --throttle-rate 0.05
+    SEARCH_URL=http://127.0.0.1:8765/html/ EURLEX_SEARCH_URL=http://127.0.0.1:8765/search.html \
+        DEMO_MODE=0 RATE_LIMIT_DEFAULT=50,50 gunicorn --config gunicorn_config.py app:app
+    python loadgen.py --url http://127.0.0.1:5000 --mock-url http://127.0.0.1:8765
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'fixtures')
+
+SEARCH_PATH = '/html/'
+EURLEX_PATH = '/search.html'
+PAGES_PREFIX = '/pages/'
+STATS_PATH = '/__stats'
+
+ROUTES = ('search', 'pages', 'eurlex')
+
+SEARCH_FIXTURE = 'ddg_results.html'
+EURLEX_FIXTURE = 'eurlex_search.html'
+
+# Windows-1254 ile kaydedilmiş sayfalar (charset başlıkta verilmez, meta etiketinden okunur)
+LEGACY_ENCODED = frozenset(['customs-1.html'])
+
+
+# --page-kb ile sayfalara eklenen görünür dolgu metni
+FILLER = '<p>Ürün kataloğu, teknik özellikler ve teslimat koşulları için satış ekibimizle iletişime geçiniz.</p>\n'
+
+
+class Faults:
+    """Yanıt davranışı - gecikme, hata oranları, sayfa boyutu (oranlar 0-1)"""
+
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, forbidden_rate=0.0,
+                 throttle_rate=0.0, retry_after=1, page_kb=0, routes=ROUTES, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.forbidden_rate = forbidden_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.page_kb = page_kb
+        self.routes = frozenset(routes)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self):
+        """Bu yanıt için bekleme süresi (saniye)"""
+        with self._lock:
+            jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+        return max(self.latency_ms + jitter, 0) / 1000
+
+    def inject(self, route):
+        """Enjekte edilecek hata durumu ya da None - tek zar, oranlar toplamı kadar hata"""
+        if route not in self.routes:
+            return None
+        with self._lock:
+            roll = self._random.random()
+        for status, rate in ((429, self.throttle_rate), (403, self.forbidden_rate), (500, self.error_rate)):
+            if roll < rate:
+                return status
+            roll -= rate
+        return None
+
+    def pad(self, body):
+        """Sayfayı en az page_kb KB olacak şekilde </body> öncesine dolgu ile büyüt"""
+        missing = self.page_kb * 1024 - len(body)
+        if missing <= 0:
+            return body
+        filler = FILLER.encode('utf-8')
+        padding = filler * (missing // len(filler) + 1)
+        index = body.rfind(b'</body>')
+        if index < 0:
+            return body + padding
+        return body[:index] + padding + body[index:]
+
+    def describe(self):
+        return {
+            "latency_ms": self.latency_ms,
+            "jitter_ms": self.jitter_ms,
+            "error_rate": self.error_rate,
+            "forbidden_rate": self.forbidden_rate,
+            "throttle_rate": self.throttle_rate,
+            "retry_after": self.retry_after,
+            "page_kb": self.page_kb,
+            "routes": sorted(self.routes),
+        }
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), 'rb') as f:
+        return f.read()
+
+
+def query_slug(query):
+    """Sorguya özgü kısa yol parçası"""
+    return hashlib.sha1(query.encode('utf-8')).hexdigest()[:10]
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FixtureServer/1.0'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        parsed = urllib.parse.urlsplit(self.path)
+        params = urllib.parse.parse_qs(parsed.query)
+        if parsed.path == STATS_PATH:
+            return self._send(200, json.dumps(self.server.snapshot()).encode('utf-8'), 'application/json', route=None)
+        if parsed.path == SEARCH_PATH:
+            if not self._faulted('search'):
+                self._search(params.get('q', [''])[0])
+            return
+        if parsed.path == EURLEX_PATH:
+            if not self._faulted('eurlex'):
+                self._send(200, self.server.fixtures[EURLEX_FIXTURE], route='eurlex')
+            return
+        if parsed.path.startswith(PAGES_PREFIX):
+            if not self._faulted('pages'):
+                self._page(parsed.path.rsplit('/', 1)[-1])
+            return
+        return self._send(404, b'not found', 'text/plain')
+
+    def do_HEAD(self):
+        # Yönlendirme çözücüsü HEAD atar; fikstür linkleri doğrudan hedefi gösterir
+        self._send(200, b'', head=True, route='head')
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        form = urllib.parse.parse_qs(self.rfile.read(length).decode('utf-8', 'replace'))
+        if urllib.parse.urlsplit(self.path).path != SEARCH_PATH:
+            return self._send(404, b'not found', 'text/plain')
+        if not self._faulted('search'):
+            self._search(form.get('q', [''])[0])
+
+    def _faulted(self, route):
+        """Gecikmeyi uygula; hata enjekte edildiyse yanıtı gönderip True döndür"""
+        faults = self.server.faults
+        delay = faults.delay()
+        if delay:
+            time.sleep(delay)
+        status = faults.inject(route)
+        if status is None:
+            return False
+        headers = {'Retry-After': str(faults.retry_after)} if status == 429 else None
+        self._send(status, f'injected {status}'.encode('ascii'), 'text/plain', headers=headers, route=route)
+        return True
+
+    def _search(self, query):
+        body = self.server.fixtures[SEARCH_FIXTURE]
+        body = body.replace(b'{{BASE}}', self.server.base_url.encode('ascii'))
+        body = body.replace(b'{{SLUG}}', query_slug(query).encode('ascii'))
+        self._send(200, body, route='search')
+
+    def _page(self, name):
+        body = self.server.pages.get(name)
+        if body is None:
+            return self._send(404, b'not found', 'text/plain', route='pages')
+
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if self.headers.get('If-None-Match') == etag:
+            return self._send(304, b'', headers={'ETag': etag}, route='pages')
+        content_type = 'text/html' if name in LEGACY_ENCODED else 'text/html; charset=utf-8'
+        self._send(200, body, content_type, headers={'ETag': etag}, route='pages')
+
+    def _send(self, status, body, content_type='text/html; charset=utf-8', headers=None, head=False, route='other'):
+        if route:
+            self.server.count(route, status)
+        self.send_response(status)
+        if status != 304:
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body and not head:
+            self.wfile.write(body)
+
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Yük testinde bağlantı patlamalarında SYN kuyruğu taşmasın
+    request_queue_size = 128
+
+    def __init__(self, address, faults):
+        super().__init__(address, _FixtureHandler)
+        self.faults = faults
+        self.fixtures = {
+            name: load_fixture(name) for name in os.listdir(FIXTURE_DIR) if name.endswith('.html')
+        }
+        self.pages = {
+            name: faults.pad(body)
+            for name, body in self.fixtures.items()
+            if name not in (SEARCH_FIXTURE, EURLEX_FIXTURE)
+        }
+        self.started = time.time()
+        self._stats = Counter()
+        self._stats_lock = threading.Lock()
+
+    def count(self, route, status):
+        with self._stats_lock:
+            self._stats[f'{route} {status}'] += 1
+
+    def snapshot(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        return {
+            "uptime_seconds": round(time.time() - self.started, 3),
+            "requests": stats,
+            "faults": self.faults.describe(),
+        }
+
+
+class FixtureServer:
+    """Arka plan thread'inde çalışan mock sunucu - port 0 ise boş port seçilir"""
+
+    def __init__(self, host='127.0.0.1', port=0, faults=None):
+        self._httpd = _MockHTTPServer((host, port), faults or Faults())
+        self._httpd.base_url = self.base_url
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def search_url(self):
+        return self.base_url + SEARCH_PATH
+
+    @property
+    def eurlex_url(self):
+        return self.base_url + EURLEX_PATH
+
+    def stats(self):
+        return self._httpd.snapshot()
+
+    def serve_forever(self):
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Kayıtlı fikstürlerle yerel mock arama/crawl/EUR-Lex sunucusu')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0, help='Her yanıta eklenen gecikme')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='Gecikmeye eklenen ± rastgele sapma')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='500 yanıt oranı (0-1)')
+    parser.add_argument('--forbidden-rate', type=float, default=0.0, help='403 yanıt oranı (0-1)')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='429 yanıt oranı (0-1)')
+    parser.add_argument('--retry-after', type=int, default=1, help='429 yanıtlarındaki Retry-After (saniye)')
+    parser.add_argument('--page-kb', type=int, default=0, help='Ticaret sayfalarının en küçük boyutu (KB)')
+    parser.add_argument('--fault-routes', default=','.join(ROUTES), help=f"Hata enjekte edilecek yollar: {', '.join(ROUTES)}")
+    parser.add_argument('--seed', type=int, default=None, help='Tekrarlanabilir hata dizisi için tohum')
+    args = parser.parse_args()
+
+    routes = [route.strip() for route in args.fault_routes.split(',') if route.strip()]
+    unknown = [route for route in routes if route not in ROUTES]
+    if unknown:
+        parser.error(f"Bilinmeyen yol: {', '.join(unknown)}")
+
+    faults = Faults(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        forbidden_rate=args.forbidden_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        page_kb=args.page_kb,
+        routes=routes,
+        seed=args.seed
+    )
+    server = FixtureServer(args.host, args.port, faults)
+    print(f"🧪 Mock sunucu: {server.base_url} {json.dumps(faults.describe())}")
+    print(f"   SEARCH_URL={server.search_url}")
+    print(f"   EURLEX_SEARCH_URL={server.eurlex_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""GTIP/HS kod çıkarıcı - tek derlenmiş desenle tek geçiş
+
+Metin bir kez taranır; her aday kod bilinen HS fasıl/pozisyon tablosuyla
+doğrulanır. Böylece telefon numaraları ve fiyatlar gibi rastgele 4-8
+haneli sayılar elenir. 1900-2099 arası çıplak 4 haneli sayılar (yıllar)
+ancak yakınında GTIP/HS/tarife etiketi varsa kabul edilir; birim ya da para
+birimiyle yan yana duran çıplak sayılar (ağırlık, adet, fiyat) hiç alınmaz.
+"""
+import re
+
+# Fasıl -> son pozisyon numarası (HS 2022). 77 ayrılmış, 98/99 ulusal kullanım.
+HEADING_LIMITS = {
+    1: 6, 2: 10, 3: 9, 4: 10, 5: 11, 6: 4, 7: 14, 8: 14, 9: 10, 10: 8,
+    11: 9, 12: 14, 13: 2, 14: 4, 15: 22, 16: 5, 17: 4, 18: 6, 19: 5, 20: 9,
+    21: 6, 22: 9, 23: 9, 24: 4, 25: 30, 26: 21, 27: 16, 28: 53, 29: 42, 30: 6,
+    31: 5, 32: 15, 33: 7, 34: 7, 35: 7, 36: 6, 37: 7, 38: 27, 39: 26, 40: 17,
+    41: 15, 42: 6, 43: 4, 44: 21, 45: 4, 46: 2, 47: 7, 48: 23, 49: 11, 50: 7,
+    51: 13, 52: 12, 53: 11, 54: 8, 55: 16, 56: 9, 57: 5, 58: 11, 59: 11, 60: 6,
+    61: 17, 62: 17, 63: 10, 64: 6, 65: 7, 66: 3, 67: 4, 68: 15, 69: 14, 70: 20,
+    71: 18, 72: 29, 73: 26, 74: 19, 75: 8, 76: 16, 78: 6, 79: 7, 80: 7,
+    81: 13, 82: 15, 83: 11, 84: 87, 85: 49, 86: 9, 87: 16, 88: 7, 89: 8, 90: 33,
+    91: 14, 92: 9, 93: 7, 94: 6, 95: 8, 96: 20, 97: 6,
+}
+
+VALID_HEADINGS = frozenset(
+    f"{chapter:02d}{heading:02d}"
+    for chapter, last_heading in HEADING_LIMITS.items()
+    for heading in range(1, last_heading + 1)
+)
+
+# Bağlam etiketleri - skorlama için
+EXPLICIT = 'explicit'
+BARE = 'bare'
+
+_LABELS = r'HS(?:\s?CODES?)?|CN\s?CODE|GT[İI]P|TAR[İI]FF?E?(?:\s?CODES?)?'
+
+GTIP_PATTERN = re.compile(
+    r'\b(?:' + _LABELS + r')(?:\s?NO\.?)?\s?[:#]?\s?'
+    r'(?P<explicit>\d{4}(?:[. ]?\d{2}){0,3})(?!\d)'
+    r'|(?<!\d)(?<!\d[.,/-])'
+    r'(?P<bare>\d{4}(?:\.\d{2}){1,3}|\d{10}|\d{8}|\d{6}|\d{4})'
+    r'(?!\d|[.,/-]\d)',
+    re.IGNORECASE
+)
+
+_SEPARATORS = str.maketrans('', '', '. ')
+
+# Yıl gibi görünen çıplak kodlar için geriye bakılacak etiket penceresi
+YEAR_RANGE = range(1900, 2100)
+LABEL_WINDOW = 40
+_LABEL_PATTERN = re.compile(r'\b(?:' + _LABELS + r')', re.IGNORECASE)
+
+
+# Çıplak sayının hemen yanındaki miktar/para birimi - "21 pallets 2516 kg", "USD 4405"
+_UNITS = (
+    r'kgs?|kilos?|gr|grams?|tons?|tonnes?|mt|lbs?|pcs|pieces?|units?|pallets?|'
+    r'boxes|box|cartons?|ctns?|containers?|bags?|rolls?|sets?|pairs?|m[23²³]?|'
+    r'litres?|liters?|lt|adet|koli|palet|usd|eur|euro|tl|try|rub|gbp|cny'
+)
+_UNIT_AFTER = re.compile(r'\s?(?:' + _UNITS + r')\b|\s?[$€₺£]', re.IGNORECASE)
+_UNIT_BEFORE = re.compile(r'(?:\b(?:' + _UNITS + r')|[$€₺£])\s?$', re.IGNORECASE)
+UNIT_WINDOW = 12
+
+
+def _looks_like_year(code, text, start):
+    """Etiketsiz 1900-2099 arası 4 haneli sayı büyük olasılıkla bir yıldır"""
+    if len(code) != 4 or int(code) not in YEAR_RANGE:
+        return False
+    return not _LABEL_PATTERN.search(text, max(0, start - LABEL_WINDOW), start)
+
+
+def _looks_like_quantity(text, start, end):
+    """Birim/para birimine yapışık sayı ağırlık, adet ya da fiyattır"""
+    if _UNIT_AFTER.match(text, end):
+        return True
+    return _UNIT_BEFORE.search(text, max(0, start - UNIT_WINDOW), start) is not None
+
+
+def iter_gtip_matches(text):
+    """(4 haneli pozisyon, tam kod, bağlam) üçlülerini sırayla üret"""
+    for match in GTIP_PATTERN.finditer(text):
+        raw = match.group(EXPLICIT)
+        context = EXPLICIT
+        if raw is None:
+            raw = match.group(BARE)
+            context = BARE
+
+        code = raw.translate(_SEPARATORS)
+        if context == BARE and (_looks_like_year(code, text, match.start())
+                                or _looks_like_quantity(text, match.start(), match.end())):
+            continue
+        heading = code[:4]
+        if heading in VALID_HEADINGS:
+            yield heading, code, context
+
+
+def extract_gtip_matches(text):
+    """Pozisyon -> bağlam; açık etiketli eşleşme çıplak sayıdan önceliklidir"""
+    matches = {}
+    for heading, _code, context in iter_gtip_matches(text):
+        if matches.get(heading) != EXPLICIT:
+            matches[heading] = context
+    return matches
+
+
+def extract_gtip_codes(text):
+    """Metindeki geçerli 4 haneli GTIP pozisyonları (ilk görülme sırasıyla)"""
+    return list(extract_gtip_matches(text))
+
+
+def most_specific(codes):
+    """Daha uzun bir kodun öneki olan kodları at: ['8708', '870829'] -> ['870829']"""
+    codes = list(dict.fromkeys(codes))
+    return [
+        code for code in codes
+        if not any(other != code and other.startswith(code) for other in codes)
+    ]
@@ -1,10 +1,13 @@
 import multiprocessing
+import os
 
 # Worker sayısı
 workers = 2
 
-# Worker class'ı
-worker_class = 'sync'
+# Worker class'ı - SSE akışları (/jobs/<id>/events) tüm worker'ı tutmasın diye
+# thread'li worker; her açık akış yalnızca bir thread kullanır
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
 
 # Timeout süresi (saniye) - Render'ın 30s limitinden uzun tutalım
 timeout = 300  # 5 dakika
@@ -22,4 +25,12 @@ errorlog = '-'
 loglevel = 'info'
 
 # Bind
-bind = '0.0.0.0:5000'
+# Platform (Render/Heroku) portu $PORT ile verir
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Worker başlangıcı - analyzer, iş kuyruğu ve HTTP oturumları ilk istekten önce hazırlanır
+def post_fork(server, worker):
+    import app as web_app
+
+    startup = web_app.warm_up()
+    server.log.info("Worker %s hazır: %s", worker.pid, startup)
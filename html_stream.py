@@ -0,0 +1,116 @@
+"""Akışlı HTML metin çıkarma - lxml hedef ayrıştırıcı ile ağaç kurmadan
+
+Yanıt parça parça beslenir; script/style içeriği atlanır ve metin, bayt/karakter
+bütçesi dolunca ayrıştırma durdurulur. lxml yoksa BeautifulSoup'a düşülür.
+"""
+try:
+    from lxml import etree
+except ImportError:  # pragma: no cover - lxml requirements.txt içinde
+    etree = None
+
+SKIP_TAGS = frozenset(['script', 'style', 'noscript', 'template', 'svg', 'iframe'])
+
+_WHITESPACE = (' ', '\n', '\t', '\r')
+
+
+class _TextCollector:
+    """lxml parser hedefi - yalnızca görünür metni biriktirir"""
+
+    def __init__(self):
+        self.parts = []
+        self.skip_depth = 0
+
+    def start(self, tag, attrib):
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+
+    def end(self, tag):
+        if tag in SKIP_TAGS:
+            if self.skip_depth:
+                self.skip_depth -= 1
+        elif not self.skip_depth:
+            # Komşu elementlerin metni birleşmesin ("8703Since" gibi)
+            self.parts.append(' ')
+
+    def data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        return None
+
+    def drain(self, final=False):
+        """Biriken metni döndür - kelime/kod bölünmesin diye son boşluğa kadar"""
+        text = ''.join(self.parts)
+        self.parts = []
+        if final or not text:
+            return text
+
+        cut = max(text.rfind(ch) for ch in _WHITESPACE)
+        if cut < 0:
+            self.parts.append(text)
+            return ''
+        if cut + 1 < len(text):
+            self.parts.append(text[cut + 1:])
+        return text[:cut + 1]
+
+
+def _iter_source(source, chunk_size):
+    """str/bytes tek parça ya da bayt parçaları iteratörü"""
+    if isinstance(source, (str, bytes)):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+    else:
+        for chunk in source:
+            if chunk:
+                yield chunk
+
+
+def _iter_text_bs4(source, max_bytes, max_chars):
+    """lxml yoksa yedek yol - bütçeyle kırpılmış tam ayrıştırma"""
+    from bs4 import BeautifulSoup
+
+    if not isinstance(source, (str, bytes)):
+        source = b''.join(_iter_source(source, 0))
+    soup = BeautifulSoup(source[:max_bytes], 'html.parser')
+    for tag in soup(list(SKIP_TAGS)):
+        tag.decompose()
+    yield soup.get_text(' ')[:max_chars]
+
+
+def iter_text_chunks(source, max_bytes, max_chars, chunk_size=64 * 1024, encoding=None):
+    """HTML kaynağından görünür metin parçaları üret; bütçe dolunca dur"""
+    if etree is None:
+        yield from _iter_text_bs4(source, max_bytes, max_chars)
+        return
+
+    collector = _TextCollector()
+    parser = etree.HTMLParser(target=collector, encoding=encoding, recover=True)
+    consumed = 0
+    emitted = 0
+
+    for chunk in _iter_source(source, chunk_size):
+        if consumed + len(chunk) > max_bytes:
+            chunk = chunk[:max_bytes - consumed]
+        consumed += len(chunk)
+        parser.feed(chunk)
+
+        text = collector.drain()
+        if text:
+            text = text[:max_chars - emitted]
+            emitted += len(text)
+            yield text
+
+        if consumed >= max_bytes or emitted >= max_chars:
+            return
+
+    try:
+        parser.close()
+    except etree.LxmlError:
+        pass
+    text = collector.drain(final=True)[:max_chars - emitted]
+    if text:
+        yield text
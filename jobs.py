@@ -0,0 +1,277 @@
+"""Arka plan iş kuyruğu - /analyze isteklerini HTTP worker'ından ayırır
+
+İşler, isteği alan süreçteki bir thread havuzunda çalışır; durum ve sonuç
+SQLite'a yazıldığı için /jobs/<id> isteği hangi gunicorn worker'ına
+düşerse düşsün cevaplanabilir. Sonuç satırları iş sonucuna gömülmez; iş
+ilerledikçe job_rows tablosuna yazılır, sayfa sayfa ya da akışla okunur.
+"""
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from disk_cache import open_connection
+from log_config import correlation
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class QueueFullError(Exception):
+    """Bekleyen iş sınırı aşıldı"""
+
+
+def _json_default(value):
+    """to_dict() sunan nesneler (ResultRecord) sözlük olarak, diğerleri metin olarak yazılır"""
+    to_dict = getattr(value, 'to_dict', None)
+    return to_dict() if callable(to_dict) else str(value)
+
+
+class JobStore:
+    """SQLite iş kayıtları"""
+
+    def __init__(self, path, timeout, kind_timeouts=None):
+        self.path = path
+        self.timeout = timeout
+        self.kind_timeouts = kind_timeouts or {}
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        conn = open_connection(self.path)
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            'id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, '
+            'params TEXT, result TEXT, error TEXT, '
+            'created REAL NOT NULL, started REAL, finished REAL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created)')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS job_events ('
+            'job_id TEXT NOT NULL, seq INTEGER NOT NULL, type TEXT NOT NULL, '
+            'payload TEXT NOT NULL, PRIMARY KEY (job_id, seq))'
+        )
+        # part: satır grubu (toplu taramada şirketin girdi sırası) - okuma sırası (part, seq)
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS job_rows ('
+            'job_id TEXT NOT NULL, part INTEGER NOT NULL, seq INTEGER NOT NULL, '
+            'payload TEXT NOT NULL, PRIMARY KEY (job_id, part, seq))'
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def create(self, kind, params):
+        job_id = uuid.uuid4().hex
+        self._connect().execute(
+            'INSERT INTO jobs (id, kind, status, params, created) VALUES (?, ?, ?, ?, ?)',
+            (job_id, kind, QUEUED, json.dumps(params, ensure_ascii=False), time.time())
+        )
+        return job_id
+
+    def mark_running(self, job_id):
+        self._connect().execute(
+            'UPDATE jobs SET status = ?, started = ? WHERE id = ?',
+            (RUNNING, time.time(), job_id)
+        )
+
+    def mark_done(self, job_id, result):
+        self._connect().execute(
+            'UPDATE jobs SET status = ?, result = ?, finished = ? WHERE id = ?',
+            (DONE, json.dumps(result, ensure_ascii=False, default=_json_default), time.time(), job_id)
+        )
+
+    def mark_failed(self, job_id, error):
+        self._connect().execute(
+            'UPDATE jobs SET status = ?, error = ?, finished = ? WHERE id = ?',
+            (FAILED, str(error), time.time(), job_id)
+        )
+
+    def add_event(self, job_id, seq, event):
+        """İlerleme olayı ekle - SSE akışı bunları sırayla okur"""
+        self._connect().execute(
+            'INSERT INTO job_events (job_id, seq, type, payload) VALUES (?, ?, ?, ?)',
+            (job_id, seq, event['type'], json.dumps(event, ensure_ascii=False, default=_json_default))
+        )
+
+    def get_events(self, job_id, after_seq=-1, limit=100):
+        """(seq, type, payload JSON metni) listesi"""
+        return self._connect().execute(
+            'SELECT seq, type, payload FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?',
+            (job_id, after_seq, limit)
+        ).fetchall()
+
+    def add_rows(self, job_id, part, start_seq, rows):
+        """Sonuç satırlarını ekle (JSON'a çevrilebilir değerler); eklenen satır sayısı"""
+        payloads = [
+            (job_id, part, seq, json.dumps(row, ensure_ascii=False, default=_json_default))
+            for seq, row in enumerate(rows, start_seq)
+        ]
+        if payloads:
+            self._connect().executemany(
+                'INSERT INTO job_rows (job_id, part, seq, payload) VALUES (?, ?, ?, ?)', payloads
+            )
+        return len(payloads)
+
+    def count_rows(self, job_id):
+        return self._connect().execute('SELECT COUNT(*) FROM job_rows WHERE job_id = ?', (job_id,)).fetchone()[0]
+
+    def get_rows(self, job_id, offset=0, limit=100):
+        """Bir sayfa satır (çözülmüş JSON) - /jobs/<id>/result sayfalaması"""
+        rows = self._connect().execute(
+            'SELECT payload FROM job_rows WHERE job_id = ? ORDER BY part, seq LIMIT ? OFFSET ?',
+            (job_id, limit, offset)
+        ).fetchall()
+        return [json.loads(payload) for payload, in rows]
+
+    def iter_rows(self, job_id, batch_size=1000):
+        """Tüm satırlar sırayla - bellekte en fazla batch_size satır tutulur"""
+        conn = self._connect()
+        part, seq = -1, -1
+        while True:
+            rows = conn.execute(
+                'SELECT part, seq, payload FROM job_rows '
+                'WHERE job_id = ? AND (part > ? OR (part = ? AND seq > ?)) '
+                'ORDER BY part, seq LIMIT ?',
+                (job_id, part, part, seq, batch_size)
+            ).fetchall()
+            for part, seq, payload in rows:
+                yield json.loads(payload)
+            if len(rows) < batch_size:
+                return
+
+    def get(self, job_id, with_result=False):
+        """İş kaydı (dict) ya da None"""
+        columns = 'id, kind, status, params, error, created, started, finished'
+        if with_result:
+            columns += ', result'
+        row = self._connect().execute(f'SELECT {columns} FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        job = dict(zip(columns.split(', '), row))
+        job['params'] = json.loads(job['params']) if job['params'] else {}
+        if with_result:
+            job['result'] = json.loads(job['result']) if job['result'] else None
+
+        # Worker yeniden başlarsa yarıda kalan işler sonsuza kadar 'running' görünmesin
+        timeout = self.kind_timeouts.get(job['kind'], self.timeout)
+        if job['status'] in (QUEUED, RUNNING) and time.time() - job['created'] > timeout:
+            job['status'] = FAILED
+            job['error'] = 'İş zaman aşımına uğradı'
+        return job
+
+    def purge(self, older_than):
+        """Saklama süresi dolmuş işleri ve olaylarını sil
+
+        Yalnızca older_than'dan önce bitmiş (done/failed) işler silinir; saatler
+        sürebilen toplu taramalar çalışırken silinmez. Worker ölümüyle yarıda
+        kalan işler, zaman aşımı + saklama süresi geçince temizlenir.
+        """
+        now = time.time()
+        cutoff = now - older_than
+        stale_cutoff = cutoff - max([self.timeout] + list(self.kind_timeouts.values()))
+        condition = (
+            '(status IN (?, ?) AND finished < ?) OR (status IN (?, ?) AND created < ?)'
+        )
+        args = (DONE, FAILED, cutoff, QUEUED, RUNNING, stale_cutoff)
+
+        conn = self._connect()
+        for table in ('job_events', 'job_rows'):
+            conn.execute(
+                f'DELETE FROM {table} WHERE job_id IN (SELECT id FROM jobs WHERE {condition})',
+                args
+            )
+        conn.execute(f'DELETE FROM jobs WHERE {condition}', args)
+
+
+class JobQueue:
+    """Süreç içi thread havuzu + paylaşılan JobStore"""
+
+    def __init__(self, store, max_workers, max_pending, retention):
+        self.store = store
+        self.max_pending = max_pending
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self):
+        """Bu süreçte bekleyen + çalışan iş sayısı"""
+        return self._pending
+
+    def submit(self, kind, params, func):
+        """İşi kuyruğa al ve hemen iş kimliğini döndür
+
+        func(emit=..., save_rows=..., **params) çağrılır; emit(event) ilerleme
+        olaylarını, save_rows(rows, part=0) sonuç satırlarını kaydeder. Dönüş
+        değeri (satırlar hariç özet) iş sonucu olarak saklanır.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFullError(f"Bekleyen iş sınırı aşıldı ({self.max_pending})")
+            self._pending += 1
+
+        try:
+            job_id = self.store.create(kind, params)
+            self._executor.submit(self._run, job_id, func, params)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        return job_id
+
+    def _emitter(self, job_id):
+        counter = itertools.count()
+
+        def emit(event):
+            try:
+                self.store.add_event(job_id, next(counter), event)
+            except Exception as e:
+                logging.warning("❌ İş olayı yazılamadı %s: %s", job_id, e)
+
+        return emit
+
+    def _row_saver(self, job_id):
+        next_seq = {}
+
+        def save_rows(rows, part=0):
+            # Satır kaybı işi yanlış sonuçla bitirmesin - hata işe yansır
+            start = next_seq.get(part, 0)
+            next_seq[part] = start + self.store.add_rows(job_id, part, start, rows)
+
+        return save_rows
+
+    def _run(self, job_id, func, params):
+        # İşin tüm logları (crawl thread'leri dahil) iş kimliğiyle etiketlenir
+        with correlation(job_id):
+            self._run_job(job_id, func, params)
+
+    def _run_job(self, job_id, func, params):
+        try:
+            self.store.mark_running(job_id)
+            result = func(emit=self._emitter(job_id), save_rows=self._row_saver(job_id), **params)
+            self.store.mark_done(job_id, result)
+        except Exception as e:
+            logging.error("❌ İş hatası %s: %s", job_id, e)
+            try:
+                self.store.mark_failed(job_id, e)
+            except Exception as store_error:
+                logging.error("❌ İş durumu yazılamadı %s: %s", job_id, store_error)
+        finally:
+            with self._lock:
+                self._pending -= 1
+            try:
+                self.store.purge(self.retention)
+            except Exception:
+                pass
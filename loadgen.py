@@ -0,0 +1,181 @@
+"""/analyze yük üreticisi - çalışan sunucuya eşzamanlı analiz işleri gönderir
+
+Her istemci thread'i POST /analyze ile iş açar, /jobs/<id> bitene kadar yoklar
+ve bir sonrakine geçer. Çıktı JSON'dur: tamamlanan/başarısız/reddedilen (503)
+iş sayıları, iş/saniye ve iş süresi ile kabul (POST) gecikmesinin yüzdelikleri.
+--mock-url verilirse fixture_server'ın istek/durum sayaçları da eklenir.
+
+Kullanım:
+    python loadgen.py --url http://127.0.0.1:5000 --concurrency 16 --jobs 200
+    python loadgen.py --url http://127.0.0.1:5000 --duration 60 --mock-url http://127.0.0.1:8765 --output load.json
+"""
+import argparse
+import itertools
+import json
+import sys
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+from benchmark import summarize
+
+DEFAULT_COMPANY = 'Genel Oto Sanayi ve Ticaret'
+DEFAULT_COUNTRY = 'Russia'
+
+# Kuyruk doluyken (503) yeniden denemeden önce bekleme
+REJECT_BACKOFF = 0.5
+
+
+class LoadGenerator:
+    def __init__(self, base_url, concurrency, jobs=None, duration=None, company=DEFAULT_COMPANY,
+                 country=DEFAULT_COUNTRY, poll_interval=0.1, job_timeout=600):
+        self.base_url = base_url.rstrip('/')
+        self.concurrency = concurrency
+        self.jobs = jobs
+        self.duration = duration
+        self.company = company
+        self.country = country
+        self.poll_interval = poll_interval
+        self.job_timeout = job_timeout
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._deadline = None
+        self.job_seconds = []
+        self.submit_seconds = []
+        self.outcomes = {'done': 0, 'failed': 0, 'rejected': 0, 'timeout': 0, 'error': 0}
+
+    def _next_job(self):
+        """Sıradaki iş numarası ya da iş/süre bittiyse None"""
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            return None
+        number = next(self._counter)
+        if self.jobs is not None and number >= self.jobs:
+            return None
+        return number
+
+    def _record(self, outcome, submit_seconds=None, job_seconds=None):
+        with self._lock:
+            self.outcomes[outcome] += 1
+            if submit_seconds is not None:
+                self.submit_seconds.append(submit_seconds)
+            if job_seconds is not None:
+                self.job_seconds.append(job_seconds)
+
+    def _run_job(self, session, number):
+        # Sorgular şirket adının ilk iki kelimesinden üretilir; ayırt edici önek
+        # olmadan işler birbirinin arama önbelleğine denk gelir
+        payload = {'company': f'L{number} {self.company}', 'country': self.country}
+        started = time.perf_counter()
+        response = session.post(f'{self.base_url}/analyze', json=payload, timeout=30)
+        submitted = time.perf_counter()
+        if response.status_code == 503:
+            self._record('rejected')
+            time.sleep(REJECT_BACKOFF)
+            return
+        if response.status_code != 202:
+            self._record('error')
+            return
+
+        status_url = f"{self.base_url}{response.json()['status_url']}"
+        while time.perf_counter() - started < self.job_timeout:
+            time.sleep(self.poll_interval)
+            status = session.get(status_url, timeout=30).json()['status']
+            if status in ('done', 'failed'):
+                outcome = 'done' if status == 'done' else 'failed'
+                self._record(outcome, submitted - started, time.perf_counter() - started)
+                return
+        self._record('timeout', submitted - started)
+
+    def _client(self):
+        with requests.Session() as session:
+            while True:
+                number = self._next_job()
+                if number is None:
+                    return
+                try:
+                    self._run_job(session, number)
+                except requests.RequestException as e:
+                    print(f"❌ İstek hatası: {e}", file=sys.stderr)
+                    self._record('error')
+
+    def run(self):
+        started = time.perf_counter()
+        if self.duration:
+            self._deadline = started + self.duration
+        threads = [threading.Thread(target=self._client, daemon=True) for _ in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall_seconds = time.perf_counter() - started
+
+        return {
+            "concurrency": self.concurrency,
+            "wall_seconds": round(wall_seconds, 3),
+            "outcomes": dict(self.outcomes),
+            "jobs_per_sec": round(self.outcomes['done'] / wall_seconds, 3) if wall_seconds else None,
+            "job_latency": summarize(self.job_seconds, wall_seconds),
+            "submit_latency": summarize(self.submit_seconds) if self.submit_seconds else None,
+        }
+
+
+def _mock_stats(mock_url):
+    try:
+        return requests.get(f"{mock_url.rstrip('/')}/__stats", timeout=5).json()
+    except (requests.RequestException, ValueError) as e:
+        print(f"❌ Mock sunucu istatistikleri alınamadı: {e}", file=sys.stderr)
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='/analyze için yük üreticisi')
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='Uygulama adresi')
+    parser.add_argument('--concurrency', type=int, default=8, help='Eşzamanlı istemci sayısı')
+    parser.add_argument('--jobs', type=int, default=None, help='Toplam iş sayısı (varsayılan: 100, --duration yoksa)')
+    parser.add_argument('--duration', type=float, default=None, help='Süre sınırı (saniye)')
+    parser.add_argument('--company', default=DEFAULT_COMPANY)
+    parser.add_argument('--country', default=DEFAULT_COUNTRY)
+    parser.add_argument('--poll-interval', type=float, default=0.1)
+    parser.add_argument('--job-timeout', type=float, default=600)
+    parser.add_argument('--mock-url', help='fixture_server adresi - istek sayaçları rapora eklenir')
+    parser.add_argument('--output', help='JSON sonucu bu dosyaya da yaz')
+    args = parser.parse_args()
+
+    jobs = args.jobs if args.jobs is not None or args.duration else 100
+    generator = LoadGenerator(
+        args.url,
+        args.concurrency,
+        jobs=jobs,
+        duration=args.duration,
+        company=args.company,
+        country=args.country,
+        poll_interval=args.poll_interval,
+        job_timeout=args.job_timeout
+    )
+    print(f"🚀 Yük testi: {args.url} (eşzamanlılık {args.concurrency})", file=sys.stderr)
+    mock_before = _mock_stats(args.mock_url) if args.mock_url else None
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "url": args.url,
+            "jobs": jobs,
+            "duration": args.duration,
+            "country": args.country,
+        },
+        "load": generator.run(),
+    }
+    if args.mock_url:
+        report["mock"] = {"before": mock_before, "after": _mock_stats(args.mock_url)}
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""Yapılandırılmış loglama - JSON satırları, kuyruklu handler, örnekleme, korelasyon kimliği
+
+Kayıtlar çağıran thread'de yalnızca filtrelenip kuyruğa atılır; mesajın
+biçimlenmesi ve yazılması arka plandaki QueueListener thread'inde yapılır.
+Bu yüzden log çağrıları %-biçimiyle (logging.info("... %s", değer)) yazılır.
+
+URL/sonuç başına olaylar extra=sampled(...) ile işaretlenir ve LOG_SAMPLE_RATE
+oranında tutulur; ERROR ve üstü hiçbir zaman atılmaz. Her kayda o anki
+istek/iş kimliği (correlation_id) eklenir; thread havuzlarına geçerken
+submit_with_context ile bağlam kopyalanır.
+
+Ortam: LOG_LEVEL (INFO), LOG_FORMAT (json|text), LOG_SAMPLE_RATE (0.1)
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+correlation_id = contextvars.ContextVar('correlation_id', default=None)
+
+DEFAULT_SAMPLE_RATE = 0.1
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - [%(correlation_id)s] %(message)s'
+
+# LogRecord'un kendi alanları - geri kalanlar extra olarak JSON'a eklenir
+_RECORD_FIELDS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {
+    'message', 'asctime', 'correlation_id', 'sample',
+}
+
+_lock = threading.Lock()
+_state = {'listener': None, 'handler': None, 'pid': None}
+
+
+def sampled(**fields):
+    """Örneklenecek olay için extra - ek alanlar JSON'da ayrı anahtar olur"""
+    fields['sample'] = True
+    return fields
+
+
+def new_correlation_id():
+    return uuid.uuid4().hex[:12]
+
+
+@contextmanager
+def correlation(value=None):
+    """Blok boyunca korelasyon kimliği (verilmezse yenisi)"""
+    token = correlation_id.set(value or new_correlation_id())
+    try:
+        yield correlation_id.get()
+    finally:
+        correlation_id.reset(token)
+
+
+def submit_with_context(executor, func, *args, **kwargs):
+    """executor.submit - çağıranın korelasyon kimliği işçi thread'inde de geçerli olsun"""
+    return executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
+
+
+class CorrelationFilter(logging.Filter):
+    """Kaydı üreten thread'in korelasyon kimliğini kayda ekle"""
+
+    def filter(self, record):
+        record.correlation_id = correlation_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """sample=True işaretli, ERROR altı kayıtların yalnızca bir kısmını tut"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR or not getattr(record, 'sample', False):
+            return True
+        return self.rate >= 1 or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Tek satır JSON: ts, level, msg, correlation_id ve extra alanları"""
+
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'correlation_id': getattr(record, 'correlation_id', None),
+            'thread': record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                payload[key] = value
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """Biçimlemeyi listener thread'ine bırakan, fork sonrası listener'ı yeniden başlatan handler"""
+
+    def prepare(self, record):
+        # Aynı süreçte kalan kuyruk - pickle için önceden biçimlemeye gerek yok
+        return record
+
+    def emit(self, record):
+        if _state['pid'] != os.getpid():
+            _restart_listener()
+        super().emit(record)
+
+
+def _build_formatter(fmt):
+    if fmt == 'json':
+        return JsonFormatter()
+    return logging.Formatter(TEXT_FORMAT)
+
+
+def _restart_listener():
+    """Fork edilen worker'da listener thread'i yoktur - yenisini başlat"""
+    with _lock:
+        if _state['pid'] == os.getpid() or _state['listener'] is None:
+            return
+        old = _state['listener']
+        listener = logging.handlers.QueueListener(old.queue, *old.handlers, respect_handler_level=True)
+        listener.start()
+        _state['listener'] = listener
+        _state['pid'] = os.getpid()
+
+
+def _stop():
+    listener = _state['listener']
+    if listener is not None and _state['pid'] == os.getpid():
+        listener.stop()
+
+
+def configure(level=None, fmt=None, sample_rate=None, handlers=None):
+    """Kök logger'ı kuyruklu handler'a bağla (tekrar çağrılırsa yeniden yapılandırır)"""
+    level = level or os.environ.get('LOG_LEVEL', 'INFO')
+    fmt = fmt or os.environ.get('LOG_FORMAT', 'json')
+    if sample_rate is None:
+        sample_rate = float(os.environ.get('LOG_SAMPLE_RATE', DEFAULT_SAMPLE_RATE))
+    handlers = handlers or [logging.StreamHandler(sys.stderr)]
+
+    formatter = _build_formatter(fmt)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    with _lock:
+        root = logging.getLogger()
+        if _state['handler'] is not None:
+            root.removeHandler(_state['handler'])
+        if _state['listener'] is not None and _state['pid'] == os.getpid():
+            _state['listener'].stop()
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = _LazyQueueHandler(log_queue)
+        queue_handler.addFilter(CorrelationFilter())
+        queue_handler.addFilter(SamplingFilter(sample_rate))
+
+        # basicConfig'ten kalan doğrudan handler'lar çift yazmasın
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(level)
+
+        listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        _state.update(listener=listener, handler=queue_handler, pid=os.getpid())
+    return queue_handler
+
+
+atexit.register(_stop)
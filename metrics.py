@@ -0,0 +1,332 @@
+"""Prometheus metin formatında ölçümler - aşama süreleri, önbellek, upstream durumları
+
+Sayaç ve histogram artışları süreç içinde biriktirilir; FLUSH_INTERVAL'da bir
+(ve /metrics okunurken) ortak SQLite tablosuna eklenir. Böylece hangi gunicorn
+worker'ı yanıtlarsa yanıtlasın tüm worker'ların toplamı görünür. Gauge'lar
+worker başına yazılır ve okunurken toplanır. Yol verilmezse süreç içi tutulur.
+
+    with metrics.span('crawl'):
+        ...
+"""
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from disk_cache import open_connection
+
+PREFIX = 'ticaret_'
+
+STAGE_SECONDS = PREFIX + 'stage_duration_seconds'
+UPSTREAM_RESPONSES = PREFIX + 'upstream_responses_total'
+CACHE_REQUESTS = PREFIX + 'cache_requests_total'
+CACHE_HIT_RATIO = PREFIX + 'cache_hit_ratio'
+JOBS_IN_FLIGHT = PREFIX + 'jobs_in_flight'
+
+# Aşama süreleri 5 ms ile 300 s (iş zaman aşımı) arasına yayılır
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# (tip, açıklama)
+FAMILIES = {
+    STAGE_SECONDS: ('histogram', 'Boru hattı aşaması süresi'),
+    UPSTREAM_RESPONSES: ('counter', 'Dış servis yanıtları (host, durum kodu)'),
+    CACHE_REQUESTS: ('counter', 'Önbellek okumaları (isabet/ıska)'),
+    CACHE_HIT_RATIO: ('gauge', 'Önbellek isabet oranı (tüm worker toplamı)'),
+    JOBS_IN_FLIGHT: ('gauge', 'Bekleyen + çalışan iş sayısı'),
+}
+
+FLUSH_INTERVAL = 10
+# Bu süre boyunca yazmayan worker'ın gauge değerleri yok sayılır
+GAUGE_TTL = 6 * FLUSH_INTERVAL
+
+# Host etiketi sınırlı kalsın - tanımlı olmayan hostlar 'other'
+OTHER_HOST = 'other'
+
+_lock = threading.Lock()
+_deltas = defaultdict(float)
+_gauges = {}
+_caches = {}
+_known_hosts = set()
+_store = None
+_flusher_pid = None
+
+
+def _labels(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def inc(name, labels=None, value=1):
+    """Sayaç artışı"""
+    with _lock:
+        _deltas[(name, _format_labels(_labels(labels)))] += value
+
+
+def observe(name, value, labels=None, buckets=STAGE_BUCKETS):
+    """Histogram gözlemi - kümülatif kovalar, _sum ve _count"""
+    base = _labels(labels)
+    with _lock:
+        for bound in buckets + (float('inf'),):
+            if value <= bound:
+                _deltas[(name + '_bucket', _format_labels(base + (('le', _format_value(bound)),)))] += 1
+        _deltas[(name + '_sum', _format_labels(base))] += value
+        _deltas[(name + '_count', _format_labels(base))] += 1
+
+
+@contextmanager
+def span(stage):
+    """Bloğun süresini aşama histogramına yaz"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(STAGE_SECONDS, time.perf_counter() - started, {'stage': stage})
+
+
+def count_upstream(host, status):
+    """Dış servis yanıtı - host yalnızca bilinen hostlardansa etiketlenir"""
+    inc(UPSTREAM_RESPONSES, {'host': host if host in _known_hosts else OTHER_HOST, 'status': str(status)})
+
+
+def watch_hosts(hosts):
+    _known_hosts.update(host for host in hosts if host)
+
+
+def register_gauge(name, func):
+    """Flush anında func() ile okunan worker başına gauge"""
+    _gauges[name] = func
+
+
+def watch_cache(name, cache):
+    """DiskCache/MemoryCache isabet sayaçlarını flush anında metriklere aktar"""
+    with _lock:
+        if name not in _caches:
+            _caches[name] = [cache, cache.hits, cache.misses]
+
+
+def _collect_caches():
+    with _lock:
+        watched = list(_caches.items())
+    for name, entry in watched:
+        cache, last_hits, last_misses = entry
+        hits, misses = cache.hits, cache.misses
+        entry[1], entry[2] = hits, misses
+        if hits > last_hits:
+            inc(CACHE_REQUESTS, {'cache': name, 'result': 'hit'}, hits - last_hits)
+        if misses > last_misses:
+            inc(CACHE_REQUESTS, {'cache': name, 'result': 'miss'}, misses - last_misses)
+
+
+class _MemoryStore:
+    def __init__(self):
+        self._counters = defaultdict(float)
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def add(self, deltas):
+        with self._lock:
+            for key, value in deltas.items():
+                self._counters[key] += value
+
+    def set_gauges(self, pid, values):
+        with self._lock:
+            self._gauges[pid] = values
+
+    def read(self):
+        with self._lock:
+            gauges = defaultdict(float)
+            for values in self._gauges.values():
+                for name, value in values.items():
+                    gauges[(name, '')] += value
+            return dict(self._counters), dict(gauges)
+
+
+class _SqliteStore:
+    """Tüm worker'ların ortak toplamı"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        conn = open_connection(self.path)
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS metric_counters ('
+            'name TEXT NOT NULL, labels TEXT NOT NULL, value REAL NOT NULL, '
+            'PRIMARY KEY (name, labels))'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS metric_gauges ('
+            'name TEXT NOT NULL, pid INTEGER NOT NULL, value REAL NOT NULL, updated REAL NOT NULL, '
+            'PRIMARY KEY (name, pid))'
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def add(self, deltas):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                'INSERT INTO metric_counters (name, labels, value) VALUES (?, ?, ?) '
+                'ON CONFLICT (name, labels) DO UPDATE SET value = value + excluded.value',
+                [(name, labels, value) for (name, labels), value in deltas.items()]
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def set_gauges(self, pid, values):
+        now = time.time()
+        conn = self._connect()
+        conn.executemany(
+            'INSERT OR REPLACE INTO metric_gauges (name, pid, value, updated) VALUES (?, ?, ?, ?)',
+            [(name, pid, value, now) for name, value in values.items()]
+        )
+
+    def read(self):
+        conn = self._connect()
+        counters = {
+            (name, labels): value
+            for name, labels, value in conn.execute('SELECT name, labels, value FROM metric_counters')
+        }
+        conn.execute('DELETE FROM metric_gauges WHERE updated < ?', (time.time() - GAUGE_TTL,))
+        gauges = {
+            (name, ''): value
+            for name, value in conn.execute('SELECT name, SUM(value) FROM metric_gauges GROUP BY name')
+        }
+        return counters, gauges
+
+
+def configure(path):
+    """Ortak depoyu seç ve bu süreç için arka plan flush thread'ini başlat"""
+    global _store
+    with _lock:
+        if _store is None:
+            _store = _SqliteStore(path) if path else _MemoryStore()
+    _start_flusher()
+
+
+def _start_flusher():
+    """Fork sonrası her worker kendi thread'ini başlatır"""
+    global _flusher_pid
+    with _lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+    threading.Thread(target=_flush_loop, name='metrics-flush', daemon=True).start()
+
+
+def _flush_loop():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        try:
+            flush()
+        except Exception as e:
+            logging.warning("❌ Metrik flush hatası: %s", e)
+
+
+def flush():
+    """Bu sürecin biriken artışlarını ve gauge değerlerini depoya yaz"""
+    global _deltas
+    if _store is None:
+        return
+    _collect_caches()
+    with _lock:
+        deltas, _deltas = _deltas, defaultdict(float)
+    try:
+        if deltas:
+            _store.add(deltas)
+    except Exception:
+        # Yazılamayan artışlar kaybolmasın - bir sonraki flush'ta tekrar denenir
+        with _lock:
+            for key, value in deltas.items():
+                _deltas[key] += value
+        raise
+
+    values = {}
+    for name, func in list(_gauges.items()):
+        try:
+            values[name] = func()
+        except Exception as e:
+            logging.warning("❌ Gauge okunamadı %s: %s", name, e)
+    if values:
+        _store.set_gauges(os.getpid(), values)
+
+
+def _family(name):
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith(suffix) and name[:-len(suffix)] in FAMILIES:
+            return name[:-len(suffix)]
+    return name
+
+
+def _series_order(item):
+    (name, labels), _ = item
+    # Kovalar 'le' değerine göre sıralanır (metin sırası 10 < 2.5 yapardı)
+    bound = float('inf')
+    if 'le="' in labels:
+        value = labels.split('le="', 1)[1].split('"', 1)[0]
+        bound = float('inf') if value == '+Inf' else float(value)
+    stripped = labels.split('le="', 1)[0].strip(',{}')
+    return (_family(name), stripped, name, bound)
+
+
+def _hit_ratios(counters):
+    totals = defaultdict(lambda: [0.0, 0.0])
+    for (name, labels), value in counters.items():
+        if name != CACHE_REQUESTS:
+            continue
+        cache = labels.split('cache="', 1)[1].split('"', 1)[0]
+        totals[cache][0 if 'result="hit"' in labels else 1] += value
+    return {
+        (CACHE_HIT_RATIO, _format_labels((('cache', cache),))): hits / (hits + misses)
+        for cache, (hits, misses) in totals.items()
+        if hits + misses
+    }
+
+
+def render():
+    """Prometheus metin formatı (text/plain; version=0.0.4)"""
+    if _store is None:
+        configure('')
+    flush()
+    counters, gauges = _store.read()
+    series = dict(counters)
+    series.update(gauges)
+    series.update(_hit_ratios(counters))
+
+    lines = []
+    current = None
+    for (name, labels), value in sorted(series.items(), key=_series_order):
+        family = _family(name)
+        if family != current:
+            current = family
+            kind, help_text = FAMILIES.get(family, ('untyped', ''))
+            lines.append(f'# HELP {family} {help_text}')
+            lines.append(f'# TYPE {family} {kind}')
+        lines.append(f'{name}{labels} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
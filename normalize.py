@@ -0,0 +1,10 @@
+"""Metin normalizasyonu - önbellek ve tekilleştirme anahtarları"""
+import unicodedata
+
+
+def normalize_key(value):
+    """Karşılaştırma anahtarı: Türkçe harfler, aksanlar ve boşluklar normalize"""
+    value = str(value or '').replace('İ', 'i').casefold().replace('ı', 'i')
+    value = unicodedata.normalize('NFKD', value)
+    value = ''.join(ch for ch in value if not unicodedata.combining(ch))
+    return ' '.join(value.split())
@@ -0,0 +1,389 @@
+"""İstek başına profil - cProfile/tracemalloc ya da üretimde güvenli yığın örneklemesi
+
+İki mod vardır:
+
+- 'sample': arka plandaki bir thread PROFILE_INTERVAL'da bir yalnızca bu
+  yakalamaya ait thread'lerin yığınlarını okur. İzleme kancası kurulmadığı
+  için yükü düşüktür; üretimde PROFILE_SAMPLE_RATE oranında işe uygulanabilir.
+  Çıktı: en çok görülen fonksiyonlar + flamegraph için katlanmış yığınlar.
+- 'full': thread başına cProfile + tracemalloc (ayırma farkı, tepe bellek).
+  Belirgin yavaşlatır; süreçte aynı anda tek 'full' yakalama çalışır, diğerleri
+  'sample' moduna düşer.
+
+Yakalamayı başlatan thread'e ek olarak traced() ile sarılan fonksiyonlar
+(crawl havuzu, toplu tarama thread'leri) da aynı yakalamaya katılır:
+
+    with profiler.capture('full') as active:
+        analyzer.smart_analyze(company, country)
+    active.result.summary, active.result.pstats, active.result.collapsed
+"""
+import contextvars
+import cProfile
+import json
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from concurrent.futures import thread as _futures_thread
+from contextlib import contextmanager
+from functools import wraps
+
+from disk_cache import open_connection
+
+SAMPLE = 'sample'
+FULL = 'full'
+MODES = (SAMPLE, FULL)
+
+# X-Profile / ?profile= değerleri
+_MODE_ALIASES = {
+    '1': SAMPLE, 'true': SAMPLE, 'yes': SAMPLE, 'on': SAMPLE, SAMPLE: SAMPLE,
+    FULL: FULL, 'cprofile': FULL,
+}
+
+DEFAULT_INTERVAL = 0.01
+MAX_STACK_DEPTH = 64
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 30
+
+# Her örnekte tekrarlanan thread/havuz altyapısı yığınlardan çıkarılır
+_PLUMBING_FILES = frozenset({threading.__file__, _futures_thread.__file__, __file__})
+
+_active = contextvars.ContextVar('profile_capture', default=None)
+# cProfile/tracemalloc süreç genelinde pahalı - aynı anda tek 'full' yakalama
+_full_lock = threading.Lock()
+
+
+def parse_mode(value):
+    """Başlık/sorgu değerinden mod - tanınmayan ya da boş değer için None"""
+    if not value:
+        return None
+    return _MODE_ALIASES.get(str(value).strip().lower())
+
+
+def new_profile_id():
+    return uuid.uuid4().hex
+
+
+def _frame_label(filename, lineno, name):
+    return f'{name} ({os.path.basename(filename)}:{lineno})'
+
+
+class ProfileResult:
+    """Yakalama çıktısı: JSON özet, cProfile (pstats) verisi, katlanmış yığınlar"""
+
+    def __init__(self, summary, pstats_data=None, collapsed=None):
+        self.summary = summary
+        self.pstats = pstats_data
+        self.collapsed = collapsed
+
+    def write_files(self, prefix):
+        """<prefix>.json, .prof (snakeviz/pstats) ve .collapsed.txt - yazılan dosyalar"""
+        paths = [prefix + '.json']
+        with open(paths[0], 'w', encoding='utf-8') as f:
+            json.dump(self.summary, f, indent=2, ensure_ascii=False)
+        if self.pstats is not None:
+            paths.append(prefix + '.prof')
+            with open(paths[-1], 'wb') as f:
+                f.write(self.pstats)
+        if self.collapsed is not None:
+            paths.append(prefix + '.collapsed.txt')
+            with open(paths[-1], 'w', encoding='utf-8') as f:
+                f.write(self.collapsed)
+        return paths
+
+
+class Capture:
+    def __init__(self, mode=SAMPLE, interval=DEFAULT_INTERVAL):
+        self.requested_mode = mode
+        self.mode = mode
+        self.interval = interval
+        self.notes = []
+        self.result = None
+        self._threads = Counter()
+        self._profiles = []
+        self._stacks = Counter()
+        self._samples = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._sampler = None
+        self._owns_full_lock = False
+        self._started_tracemalloc = False
+        self._token = None
+
+    # --- thread katılımı ---
+
+    def _enter_thread(self):
+        """Çağıran thread'i yakalamaya ekle - 'full' modda bu thread için cProfile"""
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads[ident] += 1
+            nested = self._threads[ident] > 1
+        if self.mode != FULL or nested:
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+: tek profiler zaten tüm thread'leri izliyor
+            return None
+        return profile
+
+    def _leave_thread(self, profile):
+        ident = threading.get_ident()
+        with self._lock:
+            # Yalnızca bitmiş thread'lerin profili birleştirilir; iptal edilip
+            # hâlâ çalışan crawl thread'inin profili yakalama dışında kalır
+            if profile is not None:
+                profile.disable()
+                self._profiles.append(profile)
+            self._threads[ident] -= 1
+            if self._threads[ident] <= 0:
+                del self._threads[ident]
+
+    @contextmanager
+    def thread_scope(self):
+        profile = self._enter_thread()
+        try:
+            yield
+        finally:
+            self._leave_thread(profile)
+
+    # --- başlat / durdur ---
+
+    def start(self):
+        if self.mode == FULL:
+            self._owns_full_lock = _full_lock.acquire(blocking=False)
+            if not self._owns_full_lock:
+                self.mode = SAMPLE
+                self.notes.append("Başka bir 'full' profil çalışıyordu, 'sample' moduna düşüldü")
+
+        if self.mode == FULL:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            else:
+                self.notes.append('tracemalloc zaten açıktı; ayırmalar süreç geneli')
+            tracemalloc.reset_peak()
+            self._snapshot = tracemalloc.take_snapshot()
+        else:
+            self._sampler = threading.Thread(target=self._sample_loop, name='profile-sampler', daemon=True)
+
+        self._token = _active.set(self)
+        self._main_profile = self._enter_thread()
+        self._wall_started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        if self._sampler is not None:
+            self._sampler.start()
+        return self
+
+    def stop(self):
+        wall_seconds = time.perf_counter() - self._wall_started
+        cpu_seconds = time.process_time() - self._cpu_started
+        self._leave_thread(self._main_profile)
+        _active.reset(self._token)
+
+        summary = {
+            'mode': self.mode,
+            'requested_mode': self.requested_mode,
+            'wall_seconds': round(wall_seconds, 4),
+            # process_time süreç geneli - eşzamanlı işlerin CPU'sunu da içerir
+            'process_cpu_seconds': round(cpu_seconds, 4),
+            'notes': self.notes,
+        }
+        pstats_data = collapsed = None
+
+        if self.mode == FULL:
+            try:
+                summary.update(self._allocation_summary())
+            finally:
+                if self._started_tracemalloc:
+                    tracemalloc.stop()
+                if self._owns_full_lock:
+                    _full_lock.release()
+            stats = self._merged_stats()
+            if stats is not None:
+                summary.update(self._function_summary(stats))
+                pstats_data = marshal.dumps(stats.stats)
+        else:
+            self._stop_event.set()
+            self._sampler.join()
+            summary.update(self._sample_summary())
+            collapsed = ''.join(f'{stack} {count}\n' for stack, count in self._stacks.most_common())
+
+        self.result = ProfileResult(summary, pstats_data, collapsed)
+        return self.result
+
+    # --- 'sample' modu ---
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            with self._lock:
+                idents = [ident for ident in self._threads if ident != own]
+            frames = sys._current_frames()
+            for ident in idents:
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    if code.co_filename not in _PLUMBING_FILES:
+                        stack.append(_frame_label(code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                if not stack:
+                    continue
+                stack.reverse()
+                self._stacks[';'.join(stack)] += 1
+                self._samples += 1
+
+    def _sample_summary(self):
+        self_counts = Counter()
+        total_counts = Counter()
+        for stack, count in self._stacks.items():
+            frames = stack.split(';')
+            self_counts[frames[-1]] += count
+            for label in set(frames):
+                total_counts[label] += count
+
+        def rows(counter):
+            return [
+                {
+                    'function': label,
+                    'samples': count,
+                    'percent': round(100.0 * count / self._samples, 2),
+                }
+                for label, count in counter.most_common(TOP_FUNCTIONS)
+            ]
+
+        return {
+            'interval_seconds': self.interval,
+            'samples': self._samples,
+            'top_self': rows(self_counts),
+            'top_cumulative': rows(total_counts),
+        }
+
+    # --- 'full' modu ---
+
+    def _merged_stats(self):
+        with self._lock:
+            profiles = list(self._profiles)
+        stats = None
+        for profile in profiles:
+            profile.create_stats()
+            if not profile.stats:
+                continue
+            if stats is None:
+                stats = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+        return stats
+
+    def _function_summary(self, stats):
+        entries = [
+            {
+                'function': _frame_label(*key),
+                'calls': nc,
+                'self_seconds': round(tt, 6),
+                'cumulative_seconds': round(ct, 6),
+            }
+            for key, (cc, nc, tt, ct, callers) in stats.stats.items()
+        ]
+        return {
+            'threads_profiled': len(self._profiles),
+            'top_self': sorted(entries, key=lambda e: e['self_seconds'], reverse=True)[:TOP_FUNCTIONS],
+            'top_cumulative': sorted(entries, key=lambda e: e['cumulative_seconds'], reverse=True)[:TOP_FUNCTIONS],
+        }
+
+    def _allocation_summary(self):
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        diff = after.compare_to(self._snapshot, 'lineno')
+        return {
+            'traced_current_bytes': current,
+            'traced_peak_bytes': peak,
+            'top_allocations': [
+                {
+                    'location': f'{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}',
+                    'size_diff_bytes': stat.size_diff,
+                    'count_diff': stat.count_diff,
+                }
+                for stat in diff[:TOP_ALLOCATIONS]
+            ],
+        }
+
+
+@contextmanager
+def capture(mode=SAMPLE, interval=DEFAULT_INTERVAL):
+    """Blok boyunca profil - çıkışta sonuç Capture.result (ProfileResult) olur"""
+    active = Capture(mode, interval).start()
+    try:
+        yield active
+    finally:
+        active.stop()
+
+
+def traced(func):
+    """Başka thread'de çalışacak fonksiyonu, çağıranın yakalamasına dahil et
+
+    Çağıran thread'de (executor.submit'ten önce) sarılmalıdır; etkin yakalama
+    yoksa fonksiyon olduğu gibi döner.
+    """
+    active = _active.get()
+    if active is None:
+        return func
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with active.thread_scope():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+class ProfileStore:
+    """Profiller SQLite'ta tutulur - indirme isteği hangi worker'a düşerse düşsün bulunur"""
+
+    def __init__(self, path, retention):
+        self.path = path
+        self.retention = retention
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        conn = open_connection(self.path)
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS profiles ('
+            'id TEXT PRIMARY KEY, created REAL NOT NULL, summary TEXT NOT NULL, '
+            'pstats BLOB, collapsed TEXT)'
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def save(self, profile_id, result):
+        conn = self._connect()
+        conn.execute(
+            'INSERT OR REPLACE INTO profiles (id, created, summary, pstats, collapsed) VALUES (?, ?, ?, ?, ?)',
+            (profile_id, time.time(), json.dumps(result.summary, ensure_ascii=False),
+             result.pstats, result.collapsed)
+        )
+        conn.execute('DELETE FROM profiles WHERE created < ?', (time.time() - self.retention,))
+
+    def get(self, profile_id):
+        """ProfileResult ya da None"""
+        row = self._connect().execute(
+            'SELECT summary, pstats, collapsed FROM profiles WHERE id = ?', (profile_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        summary, pstats_data, collapsed = row
+        return ProfileResult(json.loads(summary), pstats_data, collapsed)
@@ -0,0 +1,82 @@
+"""Arama sorgusu planlayıcı - tekilleştirme, geçmiş verime göre sıralama, erken durma
+
+Aynı kelimelerden oluşan sorgular (sıra, büyük/küçük harf ve ülke takma adı
+farkı gözetmeksizin) bir kez çalıştırılır. Şablonlar, geçmişte getirdikleri
+güçlü (şirket + ülke geçen) yeni URL oranına göre sıralanır; istatistikler
+ortak SQLite önbelleğinde tutulduğu için worker'lar arasında paylaşılır.
+"""
+import country_matcher
+import disk_cache
+from normalize import normalize_key
+
+# (şablon kimliği, sorgu kalıbı) - eşit verimde bu sıra korunur
+QUERY_TEMPLATES = (
+    ('export', '{short} {country} export'),
+    ('import', '{short} {country} import'),
+    ('country', '{short} {country}'),
+    ('trade', '{short} trade'),
+    ('full', '{company} {country}'),
+    ('customs', '{short} customs'),
+)
+
+MAX_STATS_ENTRIES = 100
+
+
+def _semantic_key(query):
+    """Kelime kümesi - ülke takma adları kanonik ada çevrilir"""
+    return frozenset(
+        normalize_key(country_matcher.country_key(word)) for word in normalize_key(query).split()
+    )
+
+
+def build_queries(company, country):
+    """[(şablon, sorgu)] - anlamca aynı sorgular ilk görülen haliyle bir kez"""
+    company = ' '.join(company.split())
+    short = ' '.join(company.split()[:2])
+    planned = []
+    seen = set()
+    for template_id, pattern in QUERY_TEMPLATES:
+        query = pattern.format(short=short, company=company, country=country)
+        key = _semantic_key(query)
+        if key in seen:
+            continue
+        seen.add(key)
+        planned.append((template_id, query))
+    return planned
+
+
+class QueryPlanner:
+    def __init__(self, config):
+        self.stats = disk_cache.get_cache(config.QUERY_STATS_PATH, 'query_stats', 0, MAX_STATS_ENTRIES)
+
+    def score(self, template_id):
+        """Sorgu başına güçlü yeni URL sayısı (Laplace düzeltmeli)"""
+        stats = self.stats.get(template_id) or {}
+        return (stats.get('strong', 0) + 1) / (stats.get('runs', 0) + 2)
+
+    def plan(self, company, country):
+        """Tekilleştirilmiş sorgular, yüksek verimli şablon önce"""
+        planned = build_queries(company, country)
+        scores = {template_id: self.score(template_id) for template_id, _ in planned}
+        return sorted(planned, key=lambda item: -scores[item[0]])
+
+    def record(self, template_id, new_hits, strong_hits):
+        """Bir sorgunun verimini istatistiğe ekle - tek işlemde, worker'lar arası güvenli"""
+        def add(stats):
+            stats = dict(stats or {'runs': 0, 'hits': 0, 'strong': 0})
+            stats['runs'] += 1
+            stats['hits'] += new_hits
+            stats['strong'] += strong_hits
+            return stats
+
+        self.stats.update(template_id, add)
+
+    @staticmethod
+    def is_strong(hit, company, country):
+        """Başlık/özette hem şirket adı hem hedef ülke geçiyor mu"""
+        text = hit.get('full_text', '')
+        words = normalize_key(company).split()
+        if not words or words[0] not in normalize_key(text):
+            return False
+        hits = country_matcher.get_matcher(country).scan(text)
+        return hits[country_matcher.country_key(country)] > 0
@@ -0,0 +1,216 @@
+"""Host bazlı uyarlanabilir hız sınırlayıcı - token bucket + AIMD
+
+Her host için bir kova tutulur; istek öncesi bir jeton ayrılır ve jeton yoksa
+gereken süre kadar beklenir. 429/403/503 yanıtlarında hız yarıya iner ve
+Retry-After süresi boyunca host bloke edilir; başarılı yanıtlarda hız yavaşça
+tanımlı değerine geri çıkar. Durum SQLite'ta tutulduğu için tüm thread'ler ve
+gunicorn worker'ları aynı kovayı paylaşır (yol verilmezse süreç içi).
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+
+from disk_cache import open_connection
+
+BLOCK_STATUSES = frozenset([403, 429, 503])
+
+# Başarılı yanıt başına tanımlı hızın bu oranı kadar artış
+ADDITIVE_STEP = 0.1
+
+# Retry-After değerine güvenilecek üst sınır (saniye)
+MAX_RETRY_AFTER = 3600
+
+
+class RateLimitExceeded(requests.exceptions.RequestException):
+    """Host için beklenecek süre izin verilen sınırı aşıyor"""
+
+
+def host_key(url):
+    """'https://www.Example.com:443/x' -> 'example.com'"""
+    host = (urlparse(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def parse_retry_after(value):
+    """Retry-After başlığı (saniye ya da HTTP tarihi) -> saniye veya None"""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+def parse_limit(value, default):
+    """'2.0,4' -> (2.0, 4) - boş ya da hatalıysa default"""
+    if not value:
+        return default
+    try:
+        rate, burst = value.split(',')
+        return float(rate), int(burst)
+    except ValueError:
+        logging.warning("❌ Geçersiz hız sınırı '%s', varsayılan kullanılıyor: %s", value, default)
+        return default
+
+
+class _MemoryBackend:
+    """Süreç içi durum"""
+
+    def __init__(self):
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def update(self, host, func):
+        with self._lock:
+            state, result = func(self._states.get(host))
+            if state is not None:
+                self._states[host] = state
+            return result
+
+
+class _SqliteBackend:
+    """Worker'lar arası paylaşılan durum - her güncelleme tek IMMEDIATE işlem"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        conn = open_connection(self.path)
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS rate_limits ('
+            'host TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, '
+            'rate REAL NOT NULL, blocked_until REAL NOT NULL)'
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def update(self, host, func):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT tokens, updated, rate, blocked_until FROM rate_limits WHERE host = ?', (host,)
+            ).fetchone()
+            state, result = func(row)
+            if state is not None:
+                conn.execute(
+                    'INSERT OR REPLACE INTO rate_limits (host, tokens, updated, rate, blocked_until) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    (host,) + tuple(state)
+                )
+            conn.execute('COMMIT')
+            return result
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+
+class HostRateLimiter:
+    def __init__(self, path, default_limit, host_limits, min_rate, max_wait):
+        self.default_limit = default_limit
+        self.host_limits = host_limits
+        self.min_rate = min_rate
+        self.max_wait = max_wait
+        self._backend = _SqliteBackend(path) if path else _MemoryBackend()
+
+    def limit_for(self, host):
+        """(istek/saniye, burst) - alt alan adları üst alanın sınırını kullanır"""
+        for name, limit in self.host_limits.items():
+            if host == name or host.endswith('.' + name):
+                return limit
+        return self.default_limit
+
+    def _update(self, host, func):
+        try:
+            return self._backend.update(host, func)
+        except sqlite3.Error as e:
+            logging.warning("❌ Hız sınırlayıcı hatası (%s): %s", host, e)
+            return None
+
+    def acquire(self, host):
+        """Bir istek için jeton ayır; gerekirse bekle"""
+        base_rate, burst = self.limit_for(host)
+
+        def reserve(state):
+            now = time.time()
+            if state is None:
+                tokens, rate, blocked_until = float(burst), base_rate, 0.0
+            else:
+                tokens, updated, rate, blocked_until = state
+                tokens = min(float(burst), tokens + (now - updated) * rate)
+
+            tokens -= 1
+            wait = max(blocked_until - now, -tokens / rate if tokens < 0 else 0.0)
+            if wait > self.max_wait:
+                return None, wait
+            return (tokens, now, rate, blocked_until), wait
+
+        wait = self._update(host, reserve) or 0.0
+        if wait > self.max_wait:
+            raise RateLimitExceeded(f"{host} için bekleme süresi çok uzun ({wait:.0f} sn)")
+        if wait > 0:
+            time.sleep(wait)
+
+    def feedback(self, host, status_code, retry_after=None):
+        """Yanıta göre hızı uyarla: engellemede yarıya indir, başarıda kademeli artır"""
+        base_rate, burst = self.limit_for(host)
+        blocked = status_code in BLOCK_STATUSES
+        delay = parse_retry_after(retry_after)
+
+        def adapt(state):
+            if state is None:
+                if not blocked:
+                    return None, None
+                state = (float(burst), time.time(), base_rate, 0.0)
+
+            tokens, updated, rate, blocked_until = state
+            if blocked:
+                now = time.time()
+                tokens = min(float(burst), tokens + (now - updated) * rate, 0.0)
+                updated = now
+                rate = max(self.min_rate, rate / 2)
+                pause = delay if delay is not None else 1 / rate
+                blocked_until = max(blocked_until, now + pause)
+            elif rate < base_rate:
+                rate = min(base_rate, rate + base_rate * ADDITIVE_STEP)
+            else:
+                return None, None
+            return (tokens, updated, rate, blocked_until), None
+
+        if blocked:
+            logging.warning("⏳ %s yanıtı %s - istek hızı düşürülüyor", host, status_code)
+        self._update(host, adapt)
+
+
+class RateLimitMixin:
+    """requests adapter'ı için: gönderimden önce jeton al, yanıtı geri bildir"""
+
+    def __init__(self, *args, limiter=None, **kwargs):
+        self.limiter = limiter
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if self.limiter is None:
+            return super().send(request, **kwargs)
+
+        host = host_key(request.url)
+        self.limiter.acquire(host)
+        response = super().send(request, **kwargs)
+        self.limiter.feedback(host, response.status_code, response.headers.get('Retry-After'))
+        return response
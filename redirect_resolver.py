@@ -0,0 +1,113 @@
+"""Arama motoru yönlendirme linklerini çözme
+
+DuckDuckGo '/l/?uddg=<hedef>' linklerinde hedef URL zaten sorgu parametresinde
+bulunur; bunlar ağa çıkmadan çözülür. Parametresi olmayan linkler eşzamanlı
+HEAD istekleriyle çözülür. HEAD'ler arama host'unun hız kovasını kullanmayan
+ayrı bir oturumdan gider ve çağrı başına max_heads ile sınırlıdır; kalanlar
+çözülmemiş (None) döner. Sonuçlar süreç içinde saklanır.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlparse
+
+from log_config import submit_with_context
+
+REDIRECT_BASE = 'https://duckduckgo.com'
+REDIRECT_PARAMS = ('uddg', 'u')
+MAX_MEMO_ENTRIES = 4096
+# Çift kodlanmış hedefler ('https%3A%2F%2F...') için en fazla bu kadar ek çözme
+MAX_UNQUOTE_ROUNDS = 2
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def is_redirect(url):
+    return bool(url) and ('//duckduckgo.com/l/' in url or url.startswith('/l/'))
+
+
+def absolute(url):
+    if url.startswith('//'):
+        return 'https:' + url
+    if url.startswith('/'):
+        return REDIRECT_BASE + url
+    return url
+
+
+def decode_redirect(url):
+    """Hedef URL sorgu parametresindeyse döndür, değilse None"""
+    query = parse_qs(urlparse(absolute(url)).query)
+    for name in REDIRECT_PARAMS:
+        for value in query.get(name, ()):
+            for _ in range(MAX_UNQUOTE_ROUNDS):
+                if not value.startswith(('http://', 'https://', '//')) and '%' in value:
+                    value = unquote(value)
+            if value.startswith('//'):
+                value = 'https:' + value
+            if value.startswith(('http://', 'https://')):
+                return value
+    return None
+
+
+def _remember(url, target):
+    with _memo_lock:
+        _memo[url] = target
+        _memo.move_to_end(url)
+        while len(_memo) > MAX_MEMO_ENTRIES:
+            _memo.popitem(last=False)
+
+
+def _lookup(url):
+    with _memo_lock:
+        if url in _memo:
+            _memo.move_to_end(url)
+            return True, _memo[url]
+    return False, None
+
+
+def _head(session, url, headers, timeout):
+    """Tek yönlendirme için HEAD - Location yoksa linkin kendisi, hata olursa None"""
+    try:
+        response = session.head(absolute(url), headers=headers, timeout=timeout, allow_redirects=False)
+        if response.status_code in (301, 302, 303, 307, 308) and 'Location' in response.headers:
+            return response.headers['Location']
+        return absolute(url)
+    except Exception:
+        return None
+
+
+def resolve_many(urls, session, headers=None, timeout=5, max_workers=4, max_heads=None):
+    """{yönlendirme linki: hedef URL ya da None} - yerel çözüm önce, kalanı paralel HEAD
+
+    max_heads verilirse en fazla o kadar link için HEAD atılır; diğerleri None.
+    """
+    resolved = {}
+    pending = []
+    for url in dict.fromkeys(urls):
+        found, target = _lookup(url)
+        if not found:
+            target = decode_redirect(url)
+            if target is None:
+                pending.append(url)
+                continue
+            _remember(url, target)
+        resolved[url] = target
+
+    if max_heads is not None and len(pending) > max_heads:
+        logging.info("↪️ %d yönlendirme çözülmeden bırakıldı (sınır %d)", len(pending) - max_heads, max_heads)
+        for url in pending[max_heads:]:
+            resolved[url] = None
+        pending = pending[:max_heads]
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+            futures = [submit_with_context(executor, _head, session, url, headers, timeout) for url in pending]
+            for url, future in zip(pending, futures):
+                target = future.result()
+                # Ağ hataları saklanmaz, sonraki aramada yeniden denenir
+                if target is not None:
+                    _remember(url, target)
+                resolved[url] = target
+    return resolved
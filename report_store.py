@@ -0,0 +1,114 @@
+"""Bellek içi rapor deposu - sonuç kimliğine göre, yaşa ve toplam boyuta göre tahliye
+
+Raporlar yalnızca indirilmek istendiğinde üretilir. Her rapor bir
+SpooledTemporaryFile içinde tutulur (küçükler bellekte kalır, büyükler geçici
+diske taşar) ve istemciye parça parça akıtılır. Worker'da bulunmayan rapor,
+iş sonucundan yeniden üretilir; bu yüzden dosya adı çakışması ve /tmp
+paylaşımı yoktur.
+"""
+import logging
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _Report:
+    def __init__(self, buffer, size, filename):
+        self.buffer = buffer
+        self.size = size
+        self.filename = filename
+        self.created = time.time()
+        # Aynı raporu aynı anda indirenler dosya konumunu paylaşıyor
+        self.lock = threading.Lock()
+
+    def iter_chunks(self, chunk_size=CHUNK_SIZE):
+        offset = 0
+        while offset < self.size:
+            with self.lock:
+                self.buffer.seek(offset)
+                chunk = self.buffer.read(chunk_size)
+            if not chunk:
+                return
+            offset += len(chunk)
+            yield chunk
+
+
+class ReportStore:
+    def __init__(self, max_bytes, max_age, spool_size):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.spool_size = spool_size
+        self._reports = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._build_locks = {}
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    def get(self, report_id):
+        with self._lock:
+            self._evict()
+            report = self._reports.get(report_id)
+            if report is not None:
+                self._reports.move_to_end(report_id)
+            return report
+
+    def discard(self, report_id):
+        """Raporu depodan çıkar - sonraki get_or_build yeniden üretir"""
+        with self._lock:
+            report = self._reports.pop(report_id, None)
+            if report is not None:
+                self._total_bytes -= report.size
+
+    def get_or_build(self, report_id, builder):
+        """Raporu döndür; yoksa builder(fileobj) ile üret (aynı kimlik için tek üretim)
+
+        builder raporu fileobj'e yazar ve indirme dosya adını döndürür.
+        """
+        report = self.get(report_id)
+        if report is not None:
+            return report
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(report_id, threading.Lock())
+        try:
+            with build_lock:
+                report = self.get(report_id)
+                if report is None:
+                    report = self._build(report_id, builder)
+            return report
+        finally:
+            with self._lock:
+                self._build_locks.pop(report_id, None)
+
+    def _build(self, report_id, builder):
+        buffer = tempfile.SpooledTemporaryFile(max_size=self.spool_size)
+        filename = builder(buffer)
+        size = buffer.seek(0, 2)
+        report = _Report(buffer, size, filename)
+
+        with self._lock:
+            self._reports[report_id] = report
+            self._total_bytes += size
+            self._evict()
+        logging.info("📄 Rapor üretildi: %s (%d bayt, depo %d bayt)", report_id, size, self._total_bytes)
+        return report
+
+    def _evict(self):
+        """Süresi dolanları ve toplam boyutu aşan en eski raporları at
+
+        İndirilmekte olan rapor, akış bitene kadar üreteç referansıyla yaşar.
+        """
+        cutoff = time.time() - self.max_age
+        expired = [report_id for report_id, report in self._reports.items() if report.created < cutoff]
+        for report_id in expired:
+            self._total_bytes -= self._reports.pop(report_id).size
+
+        while self._reports and self._total_bytes > self.max_bytes:
+            _, report = self._reports.popitem(last=False)
+            self._total_bytes -= report.size
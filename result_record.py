@@ -0,0 +1,199 @@
+"""Kompakt analiz sonucu kaydı
+
+Her satır 14 anahtarlı bir sözlük yerine __slots__ kullanan bir nesnedir:
+şirket/ülke/durum/risk metinleri intern edilir (aynı şirketin tüm satırları
+aynı nesneyi paylaşır), açıklama ve tavsiye durumdan türetilir, GTIP kodları
+tamsayı olarak saklanır. API/rapor sınırında to_dict() eski Türkçe anahtarlı
+sözlüğü üretir; get() ile sözlük gibi okunabilir. İş deposunda kayıt,
+anahtarsız alan listesi (to_row/from_row) olarak saklanır; dışa aktarım
+sözlüğe dönmeden kayıtlar üzerinden yapılır.
+"""
+import sys
+
+HIGH_RISK = sys.intern('YÜKSEK_RISK')
+RISK_FOUND = sys.intern('RISK_VAR')
+CLEAN = sys.intern('TEMIZ')
+# Kodun yalnızca bazı alt pozisyonları yaptırım listesinde - kesin yaptırım değil
+PARTIAL_MATCH = sys.intern('KISMI_ESLESME')
+# GTIP kodları ne yerel indekste ne EUR-Lex'te doğrulanabildi
+UNVERIFIED = sys.intern('DOGRULANAMADI')
+
+STATUS_RISK = {
+    HIGH_RISK: sys.intern('YÜKSEK'),
+    RISK_FOUND: sys.intern('ORTA'),
+    PARTIAL_MATCH: sys.intern('ORTA'),
+    UNVERIFIED: sys.intern('ORTA'),
+    CLEAN: sys.intern('DÜŞÜK'),
+}
+
+EXPLANATIONS = {
+    HIGH_RISK: '🚨 YÜKSEK RİSK: {company} şirketinin {country} ile yaptırımlı ürün ticareti tespit edildi',
+    RISK_FOUND: '🟡 RİSK VAR: {company} şirketi {country} ile ticaret bağlantısı var',
+    CLEAN: '✅ TEMİZ: {company} şirketinin {country} ile doğrudan ticaret bağlantısı bulunamadı',
+    PARTIAL_MATCH: '⚠️ KISMİ EŞLEŞME: {company} - {country} sonucundaki GTIP kodlarının bazı alt pozisyonları yaptırımlı',
+    UNVERIFIED: '❔ DOĞRULANAMADI: {company} - {country} sonucundaki GTIP kodları yaptırım listesinde doğrulanamadı',
+}
+
+ADVICE = {
+    HIGH_RISK: '🔴 ACİL İNCELEME GEREKİYOR! Yaptırımlı GTIP kodları bulundu',
+    RISK_FOUND: 'Ticaret bağlantısı doğrulandı. Detaylı inceleme önerilir.',
+    CLEAN: 'Risk seviyesi düşük. Rutin kontroller yeterlidir.',
+    PARTIAL_MATCH: 'Ürünün tam (8/10 haneli) GTIP kodu yaptırım ekiyle karşılaştırılmalı.',
+    UNVERIFIED: 'GTIP kodlarını güncel AB yaptırım ekinden elle kontrol edin.',
+}
+
+
+def describe_codes(status, company, country, codes):
+    """Durum açıklaması + ilgili GTIP kodları"""
+    return f"{EXPLANATIONS[status].format(company=company, country=country)} ({', '.join(codes)})"
+
+
+def pack_gtip(code):
+    """'0302' -> tamsayı; baştaki sıfırlar için hane sayısı alt 4 bitte tutulur"""
+    return int(code) << 4 | len(code)
+
+
+def unpack_gtip(value):
+    return str(value >> 4).zfill(value & 0xF)
+
+
+def pack_gtips(codes):
+    if isinstance(codes, str):
+        codes = codes.split(',')
+    codes = (str(code).strip() for code in codes)
+    return tuple(pack_gtip(code) for code in codes if code.isdigit())
+
+
+def _intern(value):
+    return sys.intern(str(value or ''))
+
+
+# to_row() alan sırası ve okurken intern edilecek alanlar
+_INTERNED = frozenset(['company', 'country', 'status', 'sanction_risk', 'search_engine'])
+_PACKED = frozenset(['_gtips', '_sanctioned'])
+
+
+class ResultRecord:
+    __slots__ = (
+        'company', 'country', 'status', 'sanction_risk', 'country_connection',
+        'confidence', 'title', 'url', 'snippet', 'search_engine',
+        '_gtips', '_sanctioned', '_explanation', '_advice',
+    )
+
+    def __init__(self, company, country, status, country_connection, gtip_codes=(),
+                 sanctioned_codes=(), confidence=0, title='', url='', snippet='',
+                 search_engine='', sanction_risk=None, explanation=None, advice=None):
+        self.company = _intern(company)
+        self.country = _intern(country)
+        self.status = _intern(status)
+        self.sanction_risk = _intern(sanction_risk or STATUS_RISK.get(self.status))
+        self.country_connection = bool(country_connection)
+        self.confidence = confidence
+        self.title = title or ''
+        self.url = url or ''
+        self.snippet = snippet or ''
+        self.search_engine = _intern(search_engine)
+        self._gtips = pack_gtips(gtip_codes)
+        self._sanctioned = pack_gtips(sanctioned_codes)
+        # Yalnızca durum şablonundan farklıysa sakla
+        self._explanation = explanation if explanation and explanation != self._template(EXPLANATIONS) else None
+        self._advice = advice if advice and advice != self._template(ADVICE) else None
+
+    def _template(self, templates):
+        template = templates.get(self.status)
+        return template.format(company=self.company, country=self.country) if template else ''
+
+    @property
+    def explanation(self):
+        return self._explanation or self._template(EXPLANATIONS)
+
+    @property
+    def advice(self):
+        return self._advice or self._template(ADVICE)
+
+    @property
+    def detected_gtips(self):
+        return [unpack_gtip(value) for value in self._gtips]
+
+    @property
+    def sanctioned_gtips(self):
+        return [unpack_gtip(value) for value in self._sanctioned]
+
+    @classmethod
+    def from_dict(cls, row):
+        """Türkçe anahtarlı sonuç sözlüğünden kayıt"""
+        digits = ''.join(ch for ch in str(row.get('GÜVEN_SEVİYESİ', '')) if ch.isdigit())
+        return cls(
+            company=row.get('ŞİRKET'),
+            country=row.get('ÜLKE'),
+            status=row.get('DURUM'),
+            country_connection=row.get('ULKE_BAGLANTISI') == 'EVET',
+            gtip_codes=row.get('TESPIT_EDILEN_GTIPLER') or (),
+            sanctioned_codes=row.get('YAPTIRIMLI_GTIPLER') or (),
+            confidence=int(digits) if digits else 0,
+            title=row.get('BAŞLIK'),
+            url=row.get('URL'),
+            snippet=row.get('ÖZET'),
+            search_engine=row.get('ARAMA_MOTORU'),
+            sanction_risk=row.get('YAPTIRIM_RISKI'),
+            explanation=row.get('AI_AÇIKLAMA'),
+            advice=row.get('AI_TAVSIYE'),
+        )
+
+    def to_row(self):
+        """Anahtarsız, JSON'a yazılabilir alan listesi (GTIP'ler paketli tamsayı)"""
+        return [getattr(self, slot) for slot in self.__slots__]
+
+    @classmethod
+    def from_row(cls, row):
+        """to_row() çıktısından kayıt - şablon karşılaştırması ve GTIP ayrıştırması yok"""
+        record = cls.__new__(cls)
+        for slot, value in zip(cls.__slots__, row):
+            if slot in _INTERNED:
+                value = _intern(value)
+            elif slot in _PACKED:
+                value = tuple(value)
+            setattr(record, slot, value)
+        return record
+
+    def get(self, key, default=None):
+        """Türkçe anahtarla sözlük gibi okuma"""
+        getter = _GETTERS.get(key)
+        return getter(self) if getter else default
+
+    def to_dict(self):
+        """API/rapor biçimi (eski 14 anahtarlı sözlük)"""
+        return {key: getter(self) for key, getter in _GETTERS.items()}
+
+    def __repr__(self):
+        return f'ResultRecord({self.company!r}, {self.country!r}, {self.status!r}, {self.url!r})'
+
+
+_GETTERS = {
+    'ŞİRKET': lambda r: r.company,
+    'ÜLKE': lambda r: r.country,
+    'DURUM': lambda r: r.status,
+    'AI_AÇIKLAMA': lambda r: r.explanation,
+    'AI_TAVSIYE': lambda r: r.advice,
+    'YAPTIRIM_RISKI': lambda r: r.sanction_risk,
+    'TESPIT_EDILEN_GTIPLER': lambda r: ', '.join(r.detected_gtips),
+    'YAPTIRIMLI_GTIPLER': lambda r: ', '.join(r.sanctioned_gtips),
+    'ULKE_BAGLANTISI': lambda r: 'EVET' if r.country_connection else 'HAYIR',
+    'BAŞLIK': lambda r: r.title,
+    'URL': lambda r: r.url,
+    'ÖZET': lambda r: r.snippet,
+    'GÜVEN_SEVİYESİ': lambda r: f'%{r.confidence}',
+    'ARAMA_MOTORU': lambda r: r.search_engine,
+}
+
+
+def to_dict(result):
+    """Kayıt ya da zaten sözlük olan sonuç -> sözlük"""
+    return result.to_dict() if isinstance(result, ResultRecord) else result
+
+
+def to_row(result):
+    """Kayıt ya da Türkçe anahtarlı sözlük -> iş deposu satırı"""
+    if not isinstance(result, ResultRecord):
+        result = ResultRecord.from_dict(result)
+    return result.to_row()
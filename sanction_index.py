@@ -0,0 +1,197 @@
+"""AB Rusya yaptırım eki - bellek içi GTIP önek indeksi
+
+Yaptırım listesi yerel bir anlık görüntü dosyasından bir kez yüklenir ve
+tüm kontroller için yeniden kullanılır. Sorgu ağ gerektirmez; kodun
+2/4/6/8 haneli önekleri küme üyeliğiyle kontrol edilir (kod uzunluğunda).
+
+Kullanım:
+    python sanction_index.py --refresh   # SANCTION_LIST_URL'den anlık görüntüyü yenile
+"""
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+PREFIX_LENGTHS = (2, 4, 6, 8)
+
+# classify() sonuçları
+SANCTIONED = 'sanctioned'
+PARTIAL = 'partial'
+
+_CODE_LINE = re.compile(r'^\s*(?:ex\s+)?(\d{2}(?:[ .]?\d{2}){0,3})(?!\d)', re.IGNORECASE)
+
+# Dosya değişikliği kontrolü ve başarısız indirme tekrarı aralıkları (saniye)
+CHECK_INTERVAL = 60
+REFRESH_RETRY_INTERVAL = 600
+
+_index = None
+_index_lock = threading.Lock()
+_state = {'checked_at': 0.0, 'last_refresh_attempt': 0.0}
+_refresh_thread = None
+
+
+class SanctionIndex:
+    """Yaptırımlı HS önekleri"""
+
+    def __init__(self, prefixes, source=None, mtime=None):
+        self.source = source
+        self.mtime = mtime
+        self._listed = frozenset(prefixes)
+        # Listelenen kodların üst başlıkları - ör. 870840 listeliyse 8708 "kısmen" yaptırımlı
+        self._partial = frozenset(
+            prefix[:length]
+            for prefix in self._listed
+            for length in PREFIX_LENGTHS
+            if length < len(prefix)
+        )
+
+    @classmethod
+    def from_lines(cls, lines, source=None, mtime=None):
+        """Satır satır kod listesi ayrıştır"""
+        prefixes = set()
+        for line in lines:
+            line = line.split('#', 1)[0]
+            match = _CODE_LINE.match(line)
+            if not match:
+                continue
+            code = re.sub(r'[^\d]', '', match.group(1))
+            if len(code) in PREFIX_LENGTHS:
+                prefixes.add(code)
+        return cls(prefixes, source=source, mtime=mtime)
+
+    @classmethod
+    def from_file(cls, path):
+        """Anlık görüntü dosyasından yükle"""
+        with open(path, encoding='utf-8') as f:
+            return cls.from_lines(f, source=path, mtime=os.path.getmtime(path))
+
+    def __len__(self):
+        return len(self._listed)
+
+    def lookup(self, gtip_code):
+        """Kodu kapsayan listelenmiş öneki döndür, yoksa None"""
+        code = re.sub(r'[^\d]', '', str(gtip_code))
+        for length in PREFIX_LENGTHS:
+            if length > len(code):
+                break
+            if code[:length] in self._listed:
+                return code[:length]
+        return None
+
+    def classify(self, gtip_code):
+        """SANCTIONED (kodu kapsayan önek listede), PARTIAL (yalnızca bazı alt
+        pozisyonları listede - kesin yaptırım değil) ya da None (listede yok)"""
+        code = re.sub(r'[^\d]', '', str(gtip_code))
+        if self.lookup(code) is not None:
+            return SANCTIONED
+        if code[:8] in self._partial:
+            return PARTIAL
+        return None
+
+    def is_sanctioned(self, gtip_code):
+        """Kodu kapsayan bir önek listede mi (kısmi eşleşmeler hariç)"""
+        return self.classify(gtip_code) == SANCTIONED
+
+    def is_partial(self, gtip_code):
+        return self.classify(gtip_code) == PARTIAL
+
+
+def refresh_snapshot(config):
+    """SANCTION_LIST_URL'den listeyi indirip anlık görüntü dosyasını atomik olarak değiştir"""
+    if not config.SANCTION_LIST_URL:
+        return False
+
+    import transport
+
+    response = transport.get_session(config).get(config.SANCTION_LIST_URL, timeout=config.REQUEST_TIMEOUT)
+    if response.status_code != 200:
+        logging.warning("❌ Yaptırım listesi indirilemedi: %s", response.status_code)
+        return False
+
+    candidate = SanctionIndex.from_lines(response.text.splitlines())
+    if not len(candidate):
+        logging.warning("❌ İndirilen yaptırım listesinde kod bulunamadı, anlık görüntü korunuyor")
+        return False
+
+    tmp_path = f"{config.SANCTION_LIST_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(response.text)
+    os.replace(tmp_path, config.SANCTION_LIST_PATH)
+    logging.info("✅ Yaptırım listesi güncellendi: %d kod", len(candidate))
+    return True
+
+
+def _refresh_due(config, mtime, now):
+    """Anlık görüntü eskimişse ve son denemeden beri yeterli süre geçtiyse True"""
+    if not config.SANCTION_LIST_URL:
+        return False
+    if now - _state['last_refresh_attempt'] < REFRESH_RETRY_INTERVAL:
+        return False
+    return mtime is None or now - mtime > config.SANCTION_LIST_REFRESH
+
+
+def _refresh_in_background(config):
+    try:
+        if refresh_snapshot(config):
+            # Bir sonraki get_index yeni dosyayı yüklesin
+            _state['checked_at'] = 0.0
+    except Exception as e:
+        logging.warning("❌ Yaptırım listesi yenileme hatası: %s", e)
+
+
+def _start_refresh(config, now):
+    """İndirmeyi arka plan thread'inde başlat - aynı anda en fazla bir yenileme (_index_lock altında)"""
+    global _refresh_thread
+    if _refresh_thread is not None and _refresh_thread.is_alive():
+        return
+    _state['last_refresh_attempt'] = now
+    _refresh_thread = threading.Thread(
+        target=_refresh_in_background, args=(config,), name='sanction-refresh', daemon=True
+    )
+    _refresh_thread.start()
+
+
+def get_index(config):
+    """Süreç genelinde tek indeks - eskiyse arka planda yenilenir, yüklenemezse None"""
+    global _index
+    now = time.time()
+    index = _index
+    if index is not None and now - _state['checked_at'] < CHECK_INTERVAL:
+        return index
+
+    with _index_lock:
+        index = _index
+        if index is not None and now - _state['checked_at'] < CHECK_INTERVAL:
+            return index
+        _state['checked_at'] = now
+
+        try:
+            mtime = os.path.getmtime(config.SANCTION_LIST_PATH)
+        except OSError:
+            mtime = None
+
+        # Dosya tüm worker'lar arasında ortak: biri indirir, diğerleri mtime değişince yeniden yükler.
+        # İndirme istek thread'ini bekletmez; o sırada mevcut anlık görüntü kullanılır.
+        if _refresh_due(config, mtime, now):
+            _start_refresh(config, now)
+
+        if mtime is not None and (index is None or index.mtime != mtime):
+            try:
+                _index = SanctionIndex.from_file(config.SANCTION_LIST_PATH)
+                logging.info("✅ AB yaptırım indeksi yüklendi: %d önek", len(_index))
+            except OSError as e:
+                logging.warning("❌ Yaptırım listesi okunamadı: %s", e)
+
+        return _index
+
+
+if __name__ == '__main__':
+    from app import Config
+
+    config = Config()
+    if '--refresh' in sys.argv:
+        refresh_snapshot(config)
+    index = SanctionIndex.from_file(config.SANCTION_LIST_PATH)
+    print(f"✅ {len(index)} yaptırımlı önek: {config.SANCTION_LIST_PATH}")
@@ -3,8 +3,9 @@ import pandas as pd
 import time
 import random
 from datetime import datetime
-import os
-from analiz_kodu import run_analysis_for_company
+import io
+import exporters
+from analiz_kodu import Config, SmartTradeAnalyzer
 
 st.set_page_config(
     page_title="AI Ticaret Analiz Sistemi",
@@ -38,40 +39,56 @@ if analyze_clicked:
             # Progress bar
             progress_bar = st.progress(0)
             status_text = st.empty()
+            live_table = st.empty()
             
-            # Analiz simülasyonu
-            for i in range(5):
-                progress_bar.progress((i + 1) * 20)
-                status_text.text(f"Analiz aşaması {i + 1}/5...")
-                time.sleep(1)
+            # Analiz olayları geldikçe ilerlemeyi ve sonuçları güncelle
+            analyzer = SmartTradeAnalyzer(Config())
+            results = []
+            crawl_total = 0
+            crawl_done = 0
             
-            # Gerçek analiz
-            results = run_analysis_for_company(company_name, country)
+            for event in analyzer.iter_analyze(company_name, country):
+                if event['type'] == 'stage':
+                    status_text.text(f"Analiz aşaması: {event['stage']}")
+                    if event['stage'] == 'crawl':
+                        crawl_total = event['urls']
+                        progress_bar.progress(20)
+                elif event['type'] == 'search_error':
+                    st.warning(f"Arama başarısız: {event['error']}")
+                elif event['type'] == 'search_hit':
+                    status_text.text(f"Arama sonucu: {event['hit']['title'][:80]}")
+                elif event['type'] == 'crawl':
+                    crawl_done += 1
+                    if crawl_total:
+                        progress_bar.progress(20 + int(80 * crawl_done / crawl_total))
+                elif event['type'] == 'result':
+                    results.append(event['result'])
+                    live_table.dataframe(pd.DataFrame([result.to_dict() for result in results]))
+            
+            progress_bar.progress(100)
+            live_table.empty()
             
             if results:
-                df = pd.DataFrame(results)
+                df = pd.DataFrame([result.to_dict() for result in results])
                 
                 # Sonuçları göster
                 st.success("✅ Analiz tamamlandı!")
                 
-                # Excel indirme
-                excel_file = f"ticaret_analizi_{int(time.time())}.xlsx"
-                df.to_excel(excel_file, index=False)
-                
-                with open(excel_file, "rb") as file:
+                # Rapor indirme - dosya sistemine yazmadan bellekte üretilir
+                for fmt, label in (('xlsx', "📊 Excel Dosyasını İndir"), ('csv', "📄 CSV Dosyasını İndir")):
+                    exporter = exporters.get_exporter(fmt)
+                    buffer = io.BytesIO()
+                    exporter.write(results, buffer)
                     st.download_button(
-                        label="📊 Excel Dosyasını İndir",
-                        data=file,
-                        file_name=excel_file,
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                        label=label,
+                        data=buffer.getvalue(),
+                        file_name=f"ticaret_analizi_{int(time.time())}.{exporter.extension}",
+                        mime=exporter.mimetype
                     )
                 
                 # Sonuçları tablo olarak göster
                 st.subheader("Analiz Sonuçları")
                 st.dataframe(df)
-                
-                # Temizlik
-                os.remove(excel_file)
             else:
                 st.error("Analiz sonucu bulunamadı")
 
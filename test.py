@@ -1,8 +1,9 @@
 import requests
 import json
+import time
 
 def test_analyze():
-    url = "https://your-render-app.onrender.com/analyze"
+    base_url = "https://your-render-app.onrender.com"
     
     data = {
         "company": "test şirket",
@@ -14,10 +15,27 @@ def test_analyze():
     }
     
     try:
-        response = requests.post(url, json=data, headers=headers, timeout=30)
+        response = requests.post(f"{base_url}/analyze", json=data, headers=headers, timeout=30)
         print(f"Status Code: {response.status_code}")
         print(f"Response: {response.text}")
         
+        if response.status_code != 202:
+            print("❌ Test başarısız!")
+            return False
+        
+        job = response.json()
+        
+        # İş bitene kadar durumu yokla
+        for _ in range(120):
+            time.sleep(2)
+            status = requests.get(f"{base_url}{job['status_url']}", timeout=30).json()
+            print(f"İş durumu: {status['status']}")
+            if status['status'] in ('done', 'failed'):
+                break
+        
+        response = requests.get(f"{base_url}{job['result_url']}", timeout=30)
+        print(f"Result: {response.text}")
+        
         if response.status_code == 200:
             result = response.json()
             print("✅ Test başarılı!")
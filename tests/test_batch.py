@@ -0,0 +1,45 @@
+import threading
+
+import batch
+
+
+class _Analyzer:
+    """Şirket başına sabit satır üreten sahte analyzer; 'Yavaş' şirket serbest bırakılana kadar bekler"""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def smart_analyze(self, company, country):
+        if company == 'Hatalı':
+            raise RuntimeError('arama hatası')
+        if company == 'Yavaş':
+            self.release.wait(5)
+        return [f'{company}-{i}' for i in range(2)]
+
+
+def test_rows_are_saved_per_company_as_they_finish():
+    analyzer = _Analyzer()
+    saved = {}
+    first_saved = threading.Event()
+
+    def save_rows(rows, part=0):
+        saved[part] = rows
+        first_saved.set()
+
+    pairs = [('Yavaş', 'Russia'), ('Hızlı', 'Russia'), ('hızlı', 'russia'), ('Hatalı', 'Iran')]
+    worker = threading.Thread(target=lambda: saved.setdefault('summary', batch.run_batch(analyzer, pairs, 2, save_rows)))
+    worker.start()
+
+    assert first_saved.wait(5)
+    assert saved[1] == ['Hızlı-0', 'Hızlı-1']
+    assert 0 not in saved
+
+    analyzer.release.set()
+    worker.join(5)
+    summary = saved.pop('summary')
+
+    assert saved == {0: ['Yavaş-0', 'Yavaş-1'], 1: ['Hızlı-0', 'Hızlı-1'], 2: []}
+    assert summary['total_results'] == 4
+    assert summary['unique_companies'] == 3
+    assert summary['errors'] == [{'company': 'Hatalı', 'country': 'Iran', 'error': 'arama hatası'}]
+    assert 'results' not in summary
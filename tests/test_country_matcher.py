@@ -0,0 +1,54 @@
+import country_matcher
+from country_matcher import CountryMatcher, country_key, get_matcher
+
+
+def test_short_aliases_need_word_boundaries_on_both_sides():
+    hits = get_matcher().scan('A virus, a trust and PRCS are not countries; rus trade is.')
+
+    assert hits == {'Russia': 1}
+
+
+def test_long_aliases_accept_suffixes_but_not_prefixes():
+    hits = get_matcher().scan("Rusya'dan ithalat, rusyadan ihracat, Russians; prerussia değil")
+
+    assert hits['Russia'] == 3
+
+
+def test_longest_overlapping_alias_wins():
+    hits = get_matcher().scan('Beyaz Rusya ve Russian Federation ile ticaret')
+
+    assert hits == {'Belarus': 1, 'Russia': 1}
+
+
+def test_unicode_case_folding():
+    hits = get_matcher().scan('TÜRKİYE, ÇİN ve РОССИЯ; Китай')
+
+    assert hits == {'Turkey': 1, 'China': 2, 'Russia': 1}
+
+
+def test_matches_are_counted_per_occurrence():
+    hits = get_matcher().scan('Iran iran IRAN-based; iranian')
+
+    assert hits['Iran'] == 4
+
+
+def test_custom_target_country_gets_its_own_automaton():
+    matcher = get_matcher('Kazakhstan')
+
+    assert matcher is not get_matcher()
+    assert matcher is get_matcher(' Kazakhstan ')
+    assert matcher.scan('Almaty, Kazakhstan; Russia')['Kazakhstan'] == 1
+    assert country_matcher.matcher_variant('Rusya') is None
+
+
+def test_country_key_resolves_aliases():
+    assert country_key('Rusya') == 'Russia'
+    assert country_key(' türkiye ') == 'Turkey'
+    assert country_key('Kazakhstan') == 'Kazakhstan'
+
+
+def test_matcher_agrees_with_a_naive_scan():
+    aliases = {'A': ['ab', 'abcde'], 'B': ['bcd', 'cdefg']}
+    matcher = CountryMatcher(aliases)
+
+    assert matcher.scan('abcdefg ab bcd cdefgh') == {'A': 2, 'B': 2}
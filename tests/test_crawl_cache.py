@@ -0,0 +1,148 @@
+import time
+
+import pytest
+
+import crawl_cache
+import fixture_server
+from crawl_cache import CrawlCache, canonical_url, content_hash, result_from_content
+
+
+class _Config:
+    CRAWL_CACHE_FRESH = 3600
+    CRAWL_CACHE_TTL = 7 * 24 * 3600
+    CRAWL_CACHE_MAX_ENTRIES = 100
+
+
+@pytest.fixture
+def cache(tmp_path):
+    config = _Config()
+    config.CRAWL_CACHE_PATH = str(tmp_path / 'crawl.sqlite3')
+    return CrawlCache(config)
+
+
+CONTENT = {
+    'countries': {'Russia': 2},
+    'gtip_codes': ['8708'],
+    'gtip_full_codes': ['870829'],
+    'content_preview': 'Rusya ihracatı',
+}
+
+
+def test_canonical_url_drops_tracking_params_fragment_and_default_port():
+    url = 'HTTPS://Example.COM:443?utm_source=x&b=2&gclid=1&a=1&ref=abc#bolum'
+
+    assert canonical_url(url) == 'https://example.com/?a=1&b=2'
+    assert canonical_url('http://example.com:8080/p?x=') == 'http://example.com:8080/p?x='
+
+
+def test_store_and_lookup_across_url_variants(cache):
+    digest = content_hash(b'<html>Rusya</html>')
+    cache.store('https://example.com/p?a=1&utm_medium=mail', 'Russia', {'ETag': '"v1"'}, digest, CONTENT)
+
+    page, content = cache.lookup('https://EXAMPLE.com/p?a=1#top', 'Russia')
+
+    assert page['hash'] == digest and page['etag'] == '"v1"'
+    assert content == CONTENT
+    assert cache.lookup('https://example.com/p?a=2', 'Russia') == (None, None)
+
+
+def test_content_is_keyed_by_matcher_variant(cache):
+    digest = content_hash(b'body')
+    cache.store('https://example.com/', 'Russia', {}, digest, CONTENT)
+
+    # Bilinen ülkeler aynı sonucu paylaşır, listede olmayan hedef yeniden ayrıştırılmalı
+    assert cache.get_content(digest, 'Iran') == CONTENT
+    assert cache.get_content(digest, 'Atlantis') is None
+    assert cache.lookup('https://example.com/', 'Atlantis') == (None, None)
+
+
+def test_freshness_and_conditional_headers(cache):
+    cache.store('https://example.com/', 'Russia', {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'},
+                content_hash(b'x'), CONTENT)
+    page, _ = cache.lookup('https://example.com/', 'Russia')
+
+    assert cache.is_fresh(page)
+    assert not cache.is_fresh(dict(page, checked=time.time() - 2 * _Config.CRAWL_CACHE_FRESH))
+    assert CrawlCache.conditional_headers(page) == {
+        'If-None-Match': '"v1"',
+        'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT',
+    }
+    assert CrawlCache.conditional_headers({'etag': None, 'last_modified': None}) == {}
+
+
+def test_touch_keeps_validators_and_refreshes_checked(cache):
+    cache.store('https://example.com/', 'Russia', {'ETag': '"v1"'}, content_hash(b'x'), CONTENT)
+    page, _ = cache.lookup('https://example.com/', 'Russia')
+
+    cache.touch('https://example.com/', dict(page, checked=0.0), {})
+    touched, content = cache.lookup('https://example.com/', 'Russia')
+
+    assert touched['etag'] == '"v1"'
+    assert touched['hash'] == page['hash']
+    assert touched['checked'] >= page['checked']
+    assert content == CONTENT
+
+
+def test_result_from_content_resolves_target_country():
+    found = result_from_content(CONTENT, 'Russia')
+    missing = result_from_content(CONTENT, 'Iran', status_code=203)
+
+    assert found['country_found'] is True and found['status_code'] == 200
+    assert missing['country_found'] is False and missing['status_code'] == 203
+    assert found['gtip_full_codes'] == ['870829']
+
+
+@pytest.fixture
+def live_crawler(monkeypatch, tmp_path):
+    with fixture_server.FixtureServer() as server:
+        monkeypatch.setenv('SANCTION_CACHE_PATH', str(tmp_path / 'cache.sqlite3'))
+        import app
+
+        crawler = app.SmartCrawler(app.Config())
+        parsed = []
+        parse = crawler._parse_content
+
+        def counting_parse(*args, **kwargs):
+            parsed.append(args)
+            return parse(*args, **kwargs)
+
+        monkeypatch.setattr(crawler, '_parse_content', counting_parse)
+        yield server, crawler, parsed
+
+
+def _page_requests(server):
+    requests = server.stats()['requests']
+    return requests.get('pages 200', 0), requests.get('pages 304', 0)
+
+
+def test_fresh_pages_skip_the_network_and_stale_ones_revalidate(live_crawler):
+    server, crawler, parsed = live_crawler
+    url = server.base_url + fixture_server.PAGES_PREFIX + 'trade-1.html'
+
+    first = crawler.smart_crawl(url + '?utm_source=mail', 'Russia')
+    second = crawler.smart_crawl(url, 'Russia')
+
+    assert first['status_code'] == second['status_code'] == 200
+    assert second['gtip_codes'] == first['gtip_codes']
+    assert _page_requests(server) == (1, 0)
+    assert len(parsed) == 1
+
+    crawler.crawl_cache.fresh_for = 0
+    third = crawler.smart_crawl(url, 'Russia')
+
+    assert third['gtip_codes'] == first['gtip_codes']
+    assert _page_requests(server) == (1, 1)
+    assert len(parsed) == 1
+
+
+def test_same_content_under_another_url_is_parsed_once(live_crawler):
+    server, crawler, parsed = live_crawler
+    url = server.base_url + fixture_server.PAGES_PREFIX + 'trade-2.html'
+
+    first = crawler.smart_crawl(url + '?id=1', 'Russia')
+    second = crawler.smart_crawl(url + '?id=2', 'Russia')
+
+    assert _page_requests(server) == (2, 0)
+    assert len(parsed) == 1
+    assert second['gtip_codes'] == first['gtip_codes']
+    assert crawl_cache.canonical_url(url + '?id=2') != crawl_cache.canonical_url(url + '?id=1')
@@ -0,0 +1,50 @@
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def crawler(monkeypatch, tmp_path):
+    monkeypatch.setenv('SANCTION_CACHE_PATH', str(tmp_path / 'cache.sqlite3'))
+    import app
+
+    config = app.Config()
+    config.PER_HOST_CONCURRENCY = 2
+    return app.SmartCrawler(config)
+
+
+def test_host_slots_limit_concurrency_and_are_dropped_when_idle(crawler, monkeypatch):
+    active = {}
+    peak = {}
+    lock = threading.Lock()
+
+    def fake_crawl(url, target_country):
+        host = url.split('/')[2]
+        with lock:
+            active[host] = active.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), active[host])
+        time.sleep(0.02)
+        with lock:
+            active[host] -= 1
+        return {'country_found': False, 'gtip_codes': [], 'content_preview': '', 'status_code': 200}
+
+    monkeypatch.setattr(crawler, 'smart_crawl', fake_crawl)
+    urls = [f'https://host{i % 3}.example/{i}' for i in range(12)] + [f'https://tek{i}.example/' for i in range(20)]
+
+    results = dict(crawler.crawl_many(urls, 'Russia', max_concurrency=8))
+
+    assert len(results) == len(urls)
+    assert max(peak[f'host{i}.example'] for i in range(3)) <= 2
+    assert crawler._host_slots == {}
+
+
+def test_host_slot_is_released_when_crawl_fails(crawler, monkeypatch):
+    def broken_crawl(url, target_country):
+        raise RuntimeError('bağlantı hatası')
+
+    monkeypatch.setattr(crawler, 'smart_crawl', broken_crawl)
+
+    with pytest.raises(RuntimeError):
+        crawler._crawl_with_host_limit('https://example.com/a', 'Russia')
+    assert crawler._host_slots == {}
@@ -0,0 +1,70 @@
+import csv
+import io
+
+import exporters
+from report_store import ReportStore
+
+
+def _results(count):
+    return [
+        {
+            'ŞİRKET': 'Örnek A.Ş.',
+            'ÜLKE': 'Russia',
+            'DURUM': 'TEMIZ',
+            'ULKE_BAGLANTISI': 'EVET',
+            'TESPIT_EDILEN_GTIPLER': '8703, 8708',
+            'GÜVEN_SEVİYESİ': '%70',
+            'BAŞLIK': f'Başlık {index}',
+            'URL': f'https://example.com/{index}',
+        }
+        for index in range(count)
+    ]
+
+
+def _build_csv(results):
+    store = ReportStore(max_bytes=16 * 1024 * 1024, max_age=3600, spool_size=1024)
+    exporter = exporters.get_exporter('csv')
+
+    def build(buffer):
+        exporter.write(results, buffer)
+        return 'rapor.csv'
+
+    report = store.get_or_build('job.csv', build)
+    return b''.join(report.iter_chunks()).decode('utf-8')
+
+
+def test_csv_export_through_report_store():
+    rows = list(csv.reader(io.StringIO(_build_csv(_results(3)))))
+
+    assert rows[0] == exporters.COLUMN_NAMES
+    assert len(rows) == 4
+    record = dict(zip(rows[0], rows[1]))
+    assert record['company'] == 'Örnek A.Ş.'
+    assert record['detected_gtips'] == '8703, 8708'
+    assert record['confidence'] == '70'
+
+
+def test_csv_export_larger_than_chunk():
+    results = _results(2000)
+    text = _build_csv(results)
+
+    assert len(text) > exporters.CSV_CHUNK_CHARS
+    assert len(list(csv.reader(io.StringIO(text)))) == len(results) + 1
+
+
+class _WriteOnlyFile:
+    """Python 3.9 SpooledTemporaryFile gibi: readable()/writable() yok"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+        return len(data)
+
+
+def test_csv_export_needs_only_write():
+    fileobj = _WriteOnlyFile()
+
+    assert exporters.get_exporter('csv').write(_results(2), fileobj) == 2
+    assert b''.join(fileobj.chunks).decode('utf-8').startswith(','.join(exporters.COLUMN_NAMES))
@@ -0,0 +1,42 @@
+import os
+
+from gtip_extractor import BARE, EXPLICIT, extract_gtip_codes, extract_gtip_matches
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'fixtures')
+
+
+def test_plain_year_is_not_a_heading():
+    assert extract_gtip_matches('Şirket 2005 yılında kuruldu.') == {}
+    assert extract_gtip_codes('2019 - 2023 ihracat raporu') == []
+
+
+def test_labelled_year_like_heading_is_kept():
+    assert extract_gtip_matches('HS code 2005 (sebze konserveleri)') == {'2005': EXPLICIT}
+    assert extract_gtip_matches('GTIP kodları: 8703, 2005') == {'8703': BARE, '2005': BARE}
+    assert extract_gtip_matches('Tariff code 2009') == {'2009': EXPLICIT}
+
+
+def test_bare_non_year_heading_and_full_codes_are_kept():
+    text = 'Ürünler 8703 ve 2005.10 pozisyonunda, 2023 kataloğu'
+
+    assert extract_gtip_matches(text) == {'8703': BARE, '2005': BARE}
+
+
+def test_quantities_and_prices_next_to_units_are_not_headings():
+    assert extract_gtip_codes('21 pallets 2516 kg, 4405 pcs') == []
+    assert extract_gtip_codes('Fiyat: USD 7216 / 9208 EUR / $4101') == []
+    assert extract_gtip_matches('HS 8703 - 12 pallets 4101 kg') == {'8703': EXPLICIT}
+
+
+def test_trade_fixture_yields_only_labelled_headings(monkeypatch, tmp_path):
+    monkeypatch.setenv('SANCTION_CACHE_PATH', str(tmp_path / 'cache.sqlite3'))
+    import app
+
+    crawler = app.SmartCrawler(app.Config())
+    with open(os.path.join(FIXTURES, 'trade-2.html'), 'rb') as handle:
+        result = crawler._parse_content(handle.read(), 'Russia', 200)
+
+    assert set(result['gtip_context'].values()) == {EXPLICIT}
+    assert sorted(result['gtip_codes']) == [
+        '3926', '4016', '7304', '8409', '8413', '8421', '8483', '8512', '8703', '8708',
+    ]
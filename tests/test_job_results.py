@@ -0,0 +1,56 @@
+import csv
+import io
+
+import pytest
+
+import jobs
+import report_store
+from result_record import CLEAN, ResultRecord
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setenv('SANCTION_CACHE_PATH', str(tmp_path / 'cache.sqlite3'))
+    import app
+
+    store = jobs.JobStore(str(tmp_path / 'jobs.sqlite3'), timeout=600)
+    monkeypatch.setattr(app, '_job_queue', jobs.JobQueue(store, max_workers=1, max_pending=10, retention=3600))
+    monkeypatch.setattr(app, '_report_store', report_store.ReportStore(10 ** 7, 3600, 10 ** 6))
+    return app.app.test_client(), store
+
+
+def _finished_job(store, rows):
+    job_id = store.create('batch', {'pairs': []})
+    store.add_rows(job_id, 0, 0, [
+        ResultRecord(f'Firma {i}', 'Russia', CLEAN, False, url=f'https://example.com/{i}').to_row()
+        for i in range(rows)
+    ])
+    store.mark_done(job_id, {'success': True, 'total_results': rows})
+    return job_id
+
+
+def test_result_is_paginated(client):
+    client, store = client
+    job_id = _finished_job(store, 5)
+
+    first = client.get(f'/jobs/{job_id}/result?limit=2').get_json()
+    last = client.get(f'/jobs/{job_id}/result?offset=4&limit=2').get_json()
+
+    assert [row['ŞİRKET'] for row in first['analysis']] == ['Firma 0', 'Firma 1']
+    assert first['next_url'] == f'/jobs/{job_id}/result?offset=2&limit=2'
+    assert [row['ŞİRKET'] for row in last['analysis']] == ['Firma 4']
+    assert last['next_url'] is None
+    assert first['total_results'] == 5
+    assert set(first['export_urls']) >= {'csv', 'ndjson', 'xlsx'}
+
+
+def test_export_streams_all_rows_from_the_row_table(client):
+    client, store = client
+    job_id = _finished_job(store, 2500)
+
+    response = client.get(f'/jobs/{job_id}/export/csv')
+    rows = list(csv.reader(io.StringIO(response.get_data().decode('utf-8'))))
+
+    assert response.status_code == 200
+    assert len(rows) == 2501
+    assert rows[-1][0] == 'Firma 2499'
@@ -0,0 +1,143 @@
+import threading
+import time
+
+import jobs
+
+
+def _store(tmp_path):
+    return jobs.JobStore(str(tmp_path / 'jobs.sqlite3'), timeout=600, kind_timeouts={'batch': 6 * 3600})
+
+
+def _age(store, job_id, seconds):
+    """İşi seconds kadar önce oluşturulmuş (ve bitmişse o zaman bitmiş) göster"""
+    past = time.time() - seconds
+    store._connect().execute(
+        'UPDATE jobs SET created = ?, started = ?, finished = CASE WHEN finished IS NULL THEN NULL ELSE ? END '
+        'WHERE id = ?',
+        (past, past, past, job_id)
+    )
+
+
+def test_purge_keeps_long_running_batch(tmp_path):
+    store = _store(tmp_path)
+    batch_id = store.create('batch', {'pairs': []})
+    store.mark_running(batch_id)
+    store.add_event(batch_id, 0, {'type': 'company_done'})
+    _age(store, batch_id, 2 * 3600)
+
+    store.purge(3600)
+
+    job = store.get(batch_id)
+    assert job is not None
+    assert job['status'] == jobs.RUNNING
+    assert len(store.get_events(batch_id)) == 1
+
+    store.mark_done(batch_id, {'analysis': []})
+    assert store.get(batch_id, with_result=True)['result'] == {'analysis': []}
+
+
+def test_purge_keeps_queued_job(tmp_path):
+    store = _store(tmp_path)
+    job_id = store.create('analyze', {})
+    _age(store, job_id, 2 * 3600)
+
+    store.purge(3600)
+
+    assert store.get(job_id) is not None
+
+
+def test_purge_removes_expired_finished_jobs(tmp_path):
+    store = _store(tmp_path)
+    old_id = store.create('analyze', {})
+    store.mark_done(old_id, {})
+    store.add_event(old_id, 0, {'type': 'result'})
+    store.add_rows(old_id, 0, 0, [{'URL': 'a'}])
+    _age(store, old_id, 2 * 3600)
+    recent_id = store.create('analyze', {})
+    store.mark_failed(recent_id, 'hata')
+
+    store.purge(3600)
+
+    assert store.get(old_id) is None
+    assert store.get_events(old_id) == []
+    assert store.count_rows(old_id) == 0
+    assert store.get(recent_id) is not None
+
+
+def test_purge_removes_abandoned_jobs_after_timeout(tmp_path):
+    store = _store(tmp_path)
+    job_id = store.create('batch', {})
+    store.mark_running(job_id)
+    _age(store, job_id, 6 * 3600 + 2 * 3600)
+
+    store.purge(3600)
+
+    assert store.get(job_id) is None
+
+
+def test_job_survives_purge_triggered_by_other_jobs(tmp_path):
+    store = _store(tmp_path)
+    queue = jobs.JobQueue(store, max_workers=2, max_pending=10, retention=3600)
+    release = threading.Event()
+
+    def slow_job(emit, save_rows):
+        release.wait(10)
+        return {'ok': True}
+
+    long_id = queue.submit('batch', {}, slow_job)
+    time.sleep(0.1)
+    _age(store, long_id, 2 * 3600)
+
+    short_id = queue.submit('analyze', {}, lambda emit, save_rows: {'ok': True})
+    for _ in range(100):
+        if store.get(short_id)['status'] == jobs.DONE:
+            break
+        time.sleep(0.02)
+
+    assert store.get(long_id)['status'] == jobs.RUNNING
+    release.set()
+    for _ in range(100):
+        if store.get(long_id)['status'] == jobs.DONE:
+            break
+        time.sleep(0.02)
+    assert store.get(long_id, with_result=True)['result'] == {'ok': True}
+
+
+def test_rows_are_read_in_part_order_in_pages(tmp_path):
+    store = _store(tmp_path)
+    job_id = store.create('batch', {})
+    store.add_rows(job_id, 1, 0, [{'n': 3}, {'n': 4}])
+    store.add_rows(job_id, 0, 0, [{'n': 1}])
+    store.add_rows(job_id, 0, 1, [{'n': 2}])
+    store.add_rows(job_id, 2, 0, [{'n': 5}])
+
+    assert store.count_rows(job_id) == 5
+    assert [row['n'] for row in store.iter_rows(job_id, batch_size=2)] == [1, 2, 3, 4, 5]
+    assert [row['n'] for row in store.get_rows(job_id, offset=1, limit=3)] == [2, 3, 4]
+
+
+def test_job_rows_are_saved_while_the_job_runs(tmp_path):
+    store = _store(tmp_path)
+    queue = jobs.JobQueue(store, max_workers=1, max_pending=10, retention=3600)
+    halfway = threading.Event()
+    release = threading.Event()
+
+    def job(emit, save_rows):
+        save_rows([{'n': 1}, {'n': 2}])
+        halfway.set()
+        release.wait(10)
+        save_rows([{'n': 3}])
+        save_rows([{'n': 0}], part=-1)
+        return {'total_results': 4}
+
+    job_id = queue.submit('analyze', {}, job)
+    assert halfway.wait(5)
+    assert store.count_rows(job_id) == 2
+
+    release.set()
+    for _ in range(100):
+        if store.get(job_id)['status'] == jobs.DONE:
+            break
+        time.sleep(0.02)
+    assert [row['n'] for row in store.iter_rows(job_id)] == [0, 1, 2, 3]
+    assert store.get(job_id, with_result=True)['result'] == {'total_results': 4}
@@ -0,0 +1,54 @@
+import multiprocessing
+import threading
+
+import disk_cache
+import query_planner
+
+RECORDS_PER_WORKER = 50
+
+
+class _Config:
+    def __init__(self, path):
+        self.QUERY_STATS_PATH = path
+
+
+def _record_many(path):
+    planner = query_planner.QueryPlanner(_Config(path))
+    for _ in range(RECORDS_PER_WORKER):
+        planner.record('export', 2, 1)
+
+
+def test_concurrent_workers_do_not_lose_updates(tmp_path):
+    path = str(tmp_path / 'stats.sqlite3')
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=_record_many, args=(path,)) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    threads = [threading.Thread(target=_record_many, args=(path,)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for worker in workers + threads:
+        worker.join(60)
+
+    stats = disk_cache.DiskCache(path, 'query_stats', 0, 0).get('export')
+
+    assert stats == {'runs': 4 * RECORDS_PER_WORKER, 'hits': 8 * RECORDS_PER_WORKER, 'strong': 4 * RECORDS_PER_WORKER}
+
+
+def test_higher_yield_template_is_planned_first():
+    planner = query_planner.QueryPlanner(_Config(''))
+    planner.record('customs', 5, 5)
+    planner.record('export', 5, 0)
+
+    planned = [template_id for template_id, _ in planner.plan('Örnek Sanayi AŞ', 'Russia')]
+
+    assert planned[0] == 'customs'
+    assert planned.index('export') > planned.index('import')
+
+
+def test_memory_cache_update_uses_the_default_once():
+    cache = disk_cache.MemoryCache('t', 0, 10)
+
+    assert cache.update('k', lambda value: value + 1, default=0) == 1
+    assert cache.update('k', lambda value: value + 1, default=0) == 2
+    assert cache.get('k') == 2
@@ -0,0 +1,121 @@
+import time
+
+import pytest
+
+import rate_limiter
+from rate_limiter import HostRateLimiter, RateLimitExceeded
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    calls = []
+    monkeypatch.setattr(rate_limiter.time, 'sleep', calls.append)
+    return calls
+
+
+def _limiter(path='', max_wait=30):
+    return HostRateLimiter(path, (2.0, 4), {'duckduckgo.com': (1.0, 2)}, 0.05, max_wait)
+
+
+def _state(limiter, host):
+    """(tokens, updated, rate, blocked_until)"""
+    return limiter._backend.update(host, lambda state: (None, state))
+
+
+def test_burst_is_free_then_requests_are_spaced(sleeps):
+    limiter = _limiter()
+
+    for _ in range(4):
+        limiter.acquire('example.com')
+    assert sleeps == []
+
+    limiter.acquire('example.com')
+    assert sleeps == [pytest.approx(0.5, abs=0.05)]
+
+
+def test_subdomains_use_the_parent_limit():
+    limiter = _limiter()
+
+    assert limiter.limit_for('html.duckduckgo.com') == (1.0, 2)
+    assert limiter.limit_for('notduckduckgo.com') == (2.0, 4)
+
+
+def test_blocked_responses_halve_the_rate_down_to_the_floor():
+    limiter = _limiter()
+
+    limiter.feedback('example.com', 429)
+    assert _state(limiter, 'example.com')[2] == 1.0
+    limiter.feedback('example.com', 403)
+    limiter.feedback('example.com', 503)
+    assert _state(limiter, 'example.com')[2] == 0.25
+
+    for _ in range(10):
+        limiter.feedback('example.com', 429)
+    assert _state(limiter, 'example.com')[2] == 0.05
+
+
+def test_success_recovers_the_rate_additively():
+    limiter = _limiter()
+    limiter.feedback('example.com', 429)
+
+    limiter.feedback('example.com', 200)
+    assert _state(limiter, 'example.com')[2] == pytest.approx(1.2)
+
+    for _ in range(20):
+        limiter.feedback('example.com', 200)
+    assert _state(limiter, 'example.com')[2] == 2.0
+
+
+def test_success_on_an_unseen_host_stores_nothing():
+    limiter = _limiter()
+
+    limiter.feedback('example.com', 200)
+
+    assert _state(limiter, 'example.com') is None
+
+
+def test_retry_after_blocks_the_host(sleeps):
+    limiter = _limiter()
+
+    limiter.feedback('example.com', 429, retry_after='3')
+    limiter.acquire('example.com')
+
+    assert sleeps == [pytest.approx(3, abs=0.1)]
+
+
+def test_wait_beyond_max_wait_raises_without_taking_a_token(sleeps):
+    limiter = _limiter(max_wait=5)
+    limiter.feedback('example.com', 429, retry_after='60')
+    before = _state(limiter, 'example.com')
+
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire('example.com')
+
+    assert sleeps == []
+    assert _state(limiter, 'example.com') == before
+
+
+def test_state_is_shared_through_sqlite(tmp_path, sleeps):
+    path = str(tmp_path / 'limits.sqlite3')
+    first, second = _limiter(path), _limiter(path)
+
+    first.feedback('example.com', 429, retry_after='2')
+    second.acquire('example.com')
+
+    assert sleeps == [pytest.approx(2, abs=0.1)]
+
+
+def test_parse_retry_after():
+    assert rate_limiter.parse_retry_after('7') == 7.0
+    assert rate_limiter.parse_retry_after('-4') == 0.0
+    assert rate_limiter.parse_retry_after('99999') == rate_limiter.MAX_RETRY_AFTER
+    future = time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(time.time() + 30))
+    assert rate_limiter.parse_retry_after(future) == pytest.approx(30, abs=2)
+    assert rate_limiter.parse_retry_after('yarın') is None
+    assert rate_limiter.parse_retry_after(None) is None
+
+
+def test_parse_limit():
+    assert rate_limiter.parse_limit('0.5,2', (2.0, 4)) == (0.5, 2)
+    assert rate_limiter.parse_limit('', (2.0, 4)) == (2.0, 4)
+    assert rate_limiter.parse_limit('hızlı', (2.0, 4)) == (2.0, 4)
@@ -0,0 +1,70 @@
+import threading
+from collections import OrderedDict
+from urllib.parse import quote
+
+import pytest
+
+import redirect_resolver
+
+
+@pytest.fixture(autouse=True)
+def empty_memo(monkeypatch):
+    monkeypatch.setattr(redirect_resolver, '_memo', OrderedDict())
+
+
+class _Session:
+    """HEAD isteklerini sayan sahte oturum"""
+
+    def __init__(self):
+        self.heads = []
+        self._lock = threading.Lock()
+
+    def head(self, url, headers=None, timeout=None, allow_redirects=False):
+        with self._lock:
+            self.heads.append(url)
+        return type('Response', (), {'status_code': 302, 'headers': {'Location': f'https://hedef.example/{len(self.heads)}'}})()
+
+
+def test_uddg_links_are_decoded_without_network():
+    session = _Session()
+    target = 'https://firma.example/ürün?id=1'
+    links = [
+        '/l/?uddg=' + quote(target, safe='') + '&rut=abc',
+        '//duckduckgo.com/l/?uddg=' + quote(quote(target, safe=''), safe=''),
+        'https://duckduckgo.com/l/?uddg=' + quote('//firma.example/a', safe=''),
+    ]
+
+    resolved = redirect_resolver.resolve_many(links, session, max_heads=0)
+
+    assert resolved == {links[0]: target, links[1]: target, links[2]: 'https://firma.example/a'}
+    assert session.heads == []
+
+
+def test_head_fallback_is_capped_per_call():
+    session = _Session()
+    links = [f'/l/?kh=-1&id={i}' for i in range(10)]
+
+    resolved = redirect_resolver.resolve_many(links, session, max_heads=3)
+
+    assert len(session.heads) == 3
+    assert [resolved[link] is not None for link in links] == [True] * 3 + [False] * 7
+
+    # Çözülmeyenler saklanmaz - sonraki çağrı kalanlardan devam eder
+    resolved = redirect_resolver.resolve_many(links, session, max_heads=3)
+    assert len(session.heads) == 6
+    assert sum(target is not None for target in resolved.values()) == 6
+
+
+def test_redirect_session_bypasses_the_rate_limiter():
+    import rate_limiter
+    import transport
+
+    class Config:
+        POOL_CONNECTIONS = 2
+        POOL_MAXSIZE = 2
+        RETRY_ATTEMPTS = 0
+        RETRY_BACKOFF = 0
+
+    session = transport._create_redirect_session(Config())
+
+    assert not any(isinstance(adapter, rate_limiter.RateLimitMixin) for adapter in session.adapters.values())
@@ -0,0 +1,44 @@
+import json
+
+import result_record
+from result_record import HIGH_RISK, PARTIAL_MATCH, ResultRecord
+
+
+def _record():
+    return ResultRecord(
+        company='Örnek Sanayi', country='Russia', status=HIGH_RISK, country_connection=True,
+        gtip_codes=['0302', '8703'], sanctioned_codes=['870323'], confidence=85,
+        title='Başlık', url='https://example.com', snippet='özet', search_engine='duckduckgo'
+    )
+
+
+def test_row_round_trip_keeps_packed_fields():
+    record = _record()
+
+    row = json.loads(json.dumps(record.to_row()))
+    restored = ResultRecord.from_row(row)
+
+    assert restored.to_dict() == record.to_dict()
+    assert restored.detected_gtips == ['0302', '8703']
+    assert restored._gtips == record._gtips
+    assert restored.company is record.company
+
+
+def test_row_is_keyless_and_smaller_than_the_dict():
+    record = _record()
+
+    assert len(json.dumps(record.to_row())) < len(json.dumps(record.to_dict(), ensure_ascii=False))
+    assert not any(isinstance(value, dict) for value in record.to_row())
+
+
+def test_dict_results_are_packed_too():
+    row = result_record.to_row({
+        'ŞİRKET': 'A', 'ÜLKE': 'Russia', 'DURUM': PARTIAL_MATCH, 'ULKE_BAGLANTISI': 'HAYIR',
+        'TESPIT_EDILEN_GTIPLER': '8517, 8542', 'GÜVEN_SEVİYESİ': '%60',
+    })
+
+    restored = ResultRecord.from_row(row)
+
+    assert restored.status == PARTIAL_MATCH
+    assert restored.detected_gtips == ['8517', '8542']
+    assert restored.confidence == 60
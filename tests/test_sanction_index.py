@@ -0,0 +1,157 @@
+import os
+import threading
+
+import sanction_index
+from sanction_index import PARTIAL, SANCTIONED, SanctionIndex
+
+
+def _index():
+    return SanctionIndex.from_lines([
+        '8542        # entegre devreler',
+        '8517 62',
+        '8708 40 20',
+    ])
+
+
+def test_listed_prefix_is_sanctioned():
+    index = _index()
+
+    assert index.classify('85423100') == SANCTIONED
+    assert index.classify('851762') == SANCTIONED
+    assert index.is_sanctioned('8542')
+
+
+def test_heading_with_listed_subheading_is_partial_not_sanctioned():
+    index = _index()
+
+    assert index.classify('8517') == PARTIAL
+    assert index.classify('870840') == PARTIAL
+    assert not index.is_sanctioned('8517')
+    assert index.is_partial('8708')
+
+
+def test_unlisted_code_is_not_classified():
+    index = _index()
+
+    assert index.classify('8703') is None
+    assert index.classify('851711') is None
+
+
+class _Config:
+    MAX_GTIP_CHECK = 1
+    SANCTION_INDEX_COMPLETE = False
+    SANCTION_CACHE_PATH = ''
+    SANCTION_CACHE_TTL = 60
+    SANCTION_CACHE_MAX_ENTRIES = 10
+    EURLEX_SEARCH_URL = 'http://127.0.0.1:9/search.html'
+    USER_AGENTS = ['test']
+
+
+def _checker(monkeypatch, config):
+    import app
+
+    monkeypatch.setattr(sanction_index, 'get_index', lambda config: _index())
+    checker = app.QuickEURLexChecker(config)
+    eurlex_calls = []
+
+    def fake_eurlex(codes, verdict):
+        eurlex_calls.append(list(codes))
+        verdict['unverified'].extend(codes)
+
+    monkeypatch.setattr(checker, '_check_eurlex', fake_eurlex)
+    return checker, eurlex_calls
+
+
+def test_checker_separates_partial_and_falls_back_for_unlisted(monkeypatch):
+    checker, eurlex_calls = _checker(monkeypatch, _Config())
+
+    verdict = checker.check_gtip(['8542', '8517', '8703'])
+
+    assert verdict == {'sanctioned': ['8542'], 'partial': ['8517'], 'unverified': ['8703']}
+    assert eurlex_calls == [['8703']]
+    assert checker.quick_check_gtip(['8542', '8517']) == ['8542']
+
+
+def test_complete_index_skips_eurlex(monkeypatch):
+    config = _Config()
+    config.SANCTION_INDEX_COMPLETE = True
+    checker, eurlex_calls = _checker(monkeypatch, config)
+
+    verdict = checker.check_gtip(['8703'])
+
+    assert verdict == {'sanctioned': [], 'partial': [], 'unverified': []}
+    assert eurlex_calls == []
+
+
+def test_partial_and_unverified_results_are_not_clean(monkeypatch):
+    import app
+    import result_record
+
+    analyzer = app.SmartTradeAnalyzer.__new__(app.SmartTradeAnalyzer)
+    crawl = {'country_found': False, 'gtip_codes': ['8517'], 'status_code': 200}
+    hit = {'title': 't', 'url': 'https://example.com', 'full_text': ''}
+
+    partial = analyzer._build_result('A', 'Russia', hit, crawl, {'sanctioned': [], 'partial': ['8517'], 'unverified': []})
+    unverified = analyzer._build_result('A', 'Russia', hit, crawl, {'sanctioned': [], 'partial': [], 'unverified': ['8517']})
+
+    assert partial.status == result_record.PARTIAL_MATCH
+    assert partial.sanctioned_gtips == []
+    assert '8517' in partial.explanation
+    assert unverified.status == result_record.UNVERIFIED
+
+
+def test_full_page_codes_reach_the_index(monkeypatch, tmp_path):
+    monkeypatch.setenv('SANCTION_CACHE_PATH', str(tmp_path / 'cache.sqlite3'))
+    import app
+
+    config = app.Config()
+    config.SANCTION_INDEX_COMPLETE = True
+    checker, _eurlex_calls = _checker(monkeypatch, config)
+    crawler = app.SmartCrawler(config)
+    html = b'<p>HS code 8517 62 00 ve GTIP 8708.40; pozisyon 8708</p>'
+
+    crawl = crawler._parse_content(html, 'Russia', 200)
+    verdict = checker.check_gtip(crawl['gtip_full_codes'])
+
+    assert crawl['gtip_codes'] == ['8517', '8708']
+    assert crawl['gtip_full_codes'] == ['85176200', '870840']
+    assert verdict['sanctioned'] == ['85176200']
+    assert verdict['partial'] == ['870840']
+
+
+def test_stale_snapshot_is_served_while_one_refresh_runs(monkeypatch, tmp_path):
+    path = tmp_path / 'annex.txt'
+    path.write_text('8542\n', encoding='utf-8')
+    os.utime(path, (0, 0))
+
+    class Config:
+        SANCTION_LIST_URL = 'http://127.0.0.1:9/annex.txt'
+        SANCTION_LIST_PATH = str(path)
+        SANCTION_LIST_REFRESH = 3600
+
+    release = threading.Event()
+    downloads = []
+
+    def slow_refresh(config):
+        downloads.append(config)
+        release.wait(5)
+        path.write_text('8542\n8703\n', encoding='utf-8')
+        return True
+
+    monkeypatch.setattr(sanction_index, 'refresh_snapshot', slow_refresh)
+    monkeypatch.setattr(sanction_index, '_index', None)
+    monkeypatch.setattr(sanction_index, '_state', {'checked_at': 0.0, 'last_refresh_attempt': 0.0})
+    monkeypatch.setattr(sanction_index, '_refresh_thread', None)
+    monkeypatch.setattr(sanction_index, 'REFRESH_RETRY_INTERVAL', 0)
+
+    index = sanction_index.get_index(Config())
+    sanction_index._state['checked_at'] = 0.0
+    sanction_index.get_index(Config())
+
+    assert index.is_sanctioned('8542') and not index.is_sanctioned('8703')
+    assert len(downloads) == 1
+
+    release.set()
+    sanction_index._refresh_thread.join(5)
+
+    assert sanction_index.get_index(Config()).is_sanctioned('8703')
@@ -0,0 +1,46 @@
+import pytest
+
+import fixture_server
+
+
+@pytest.fixture
+def failing_search(monkeypatch, tmp_path):
+    """Canlı mod; arama uç noktası her istekte 500 döner"""
+    faults = fixture_server.Faults(error_rate=1.0, routes=('search',))
+    with fixture_server.FixtureServer(faults=faults) as server:
+        monkeypatch.setenv('DEMO_MODE', '0')
+        monkeypatch.setenv('SEARCH_URL', server.search_url)
+        monkeypatch.setenv('EURLEX_SEARCH_URL', server.eurlex_url)
+        monkeypatch.setenv('SANCTION_CACHE_PATH', str(tmp_path / 'cache.sqlite3'))
+        yield server
+
+
+def test_live_search_failure_returns_no_sample_hits(failing_search):
+    import app
+
+    searcher = app.SimpleDuckDuckGoSearcher(app.Config())
+
+    assert searcher.search_simple('Örnek Sanayi Russia', 10) == []
+    with pytest.raises(app.SearchError):
+        searcher.search('Örnek Sanayi Russia', 10)
+
+
+def test_live_analysis_reports_search_errors(failing_search):
+    import app
+
+    analyzer = app.SmartTradeAnalyzer(app.Config())
+    events = list(analyzer.iter_analyze('Örnek Sanayi', 'Russia'))
+    types = [event['type'] for event in events]
+
+    assert 'search_error' in types
+    assert 'search_hit' not in types
+    assert 'result' not in types
+
+
+def test_demo_search_failure_uses_sample_hits(failing_search, monkeypatch):
+    import app
+
+    monkeypatch.setenv('DEMO_MODE', '1')
+    searcher = app.SimpleDuckDuckGoSearcher(app.Config())
+
+    assert searcher.search_simple('Örnek Sanayi Russia', 5)
@@ -0,0 +1,197 @@
+"""Paylaşılan HTTP katmanı - süreç genelinde keep-alive bağlantı havuzları
+
+SmartCrawler, SimpleDuckDuckGoSearcher ve QuickEURLexChecker aynı
+requests.Session ve aynı cloudscraper örneğini kullanır; böylece TCP/TLS
+bağlantıları ve Cloudflare çerezleri istekler arasında yeniden kullanılır.
+Tüm adapter'lar ortak host bazlı hız sınırlayıcıdan (rate_limiter) geçer ve
+yanıt kodları host bazında metrics'e sayılır.
+"""
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import metrics
+from rate_limiter import HostRateLimiter, RateLimitExceeded, RateLimitMixin, host_key
+
+_lock = threading.Lock()
+_pid = None
+_session = None
+_scraper = None
+_redirect_session = None
+_limiter = None
+
+
+class UpstreamMetricsMixin:
+    """requests adapter'ı için: son yanıt kodunu (yeniden denemelerden sonra) say"""
+
+    def send(self, request, **kwargs):
+        host = host_key(request.url)
+        try:
+            response = super().send(request, **kwargs)
+        except RateLimitExceeded:
+            metrics.count_upstream(host, 'rate_limited')
+            raise
+        except Exception:
+            metrics.count_upstream(host, 'error')
+            raise
+        metrics.count_upstream(host, response.status_code)
+        return response
+
+
+class RateLimitedHTTPAdapter(UpstreamMetricsMixin, RateLimitMixin, HTTPAdapter):
+    pass
+
+
+class MeteredHTTPAdapter(UpstreamMetricsMixin, HTTPAdapter):
+    """Hız sınırlayıcısız adapter - yalnızca yanıt kodları sayılır"""
+
+
+def _build_retry(config):
+    """Config.RETRY_ATTEMPTS ile yeniden deneme politikası"""
+    return Retry(
+        total=config.RETRY_ATTEMPTS,
+        connect=config.RETRY_ATTEMPTS,
+        read=config.RETRY_ATTEMPTS,
+        backoff_factor=config.RETRY_BACKOFF,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD', 'POST']),
+        raise_on_status=False,
+        # 429/Retry-After beklemesini rate_limiter yönetir (tüm worker'lar için)
+        respect_retry_after_header=False,
+    )
+
+
+def _get_limiter(config):
+    """Süreç genelinde tek sınırlayıcı - durumu SQLite üzerinden worker'larla ortak"""
+    global _limiter
+    if _limiter is None:
+        _limiter = HostRateLimiter(
+            config.RATE_LIMIT_PATH,
+            config.RATE_LIMIT_DEFAULT,
+            config.HOST_RATE_LIMITS,
+            config.RATE_LIMIT_MIN_RATE,
+            config.RATE_LIMIT_MAX_WAIT,
+        )
+    return _limiter
+
+
+def _mount_pools(session, config, adapter_factory):
+    """Varsayılan ve host bazlı havuzları oturuma bağla"""
+    default_adapter = adapter_factory(config.POOL_MAXSIZE)
+    session.mount('http://', adapter_factory(config.POOL_MAXSIZE))
+    session.mount('https://', default_adapter)
+
+    # requests en uzun önek eşleşmesini seçer - host'a özel havuz boyutu
+    for host, pool_size in config.HOST_POOL_SIZES.items():
+        session.mount(f'https://{host}/', adapter_factory(pool_size))
+
+    return session
+
+
+def _create_session(config):
+    """Düz requests oturumu"""
+    limiter = _get_limiter(config)
+
+    def adapter_factory(pool_size):
+        return RateLimitedHTTPAdapter(
+            pool_connections=config.POOL_CONNECTIONS,
+            pool_maxsize=pool_size,
+            max_retries=_build_retry(config),
+            limiter=limiter,
+        )
+
+    return _mount_pools(requests.Session(), config, adapter_factory)
+
+
+def _create_scraper(config):
+    """Cloudscraper oturumu - TLS şifre ayarları korunarak havuzlanır"""
+    # Ağır bağımlılık: yalnızca ilk gerçek crawl/arama isteğinde yüklenir
+    import cloudscraper
+
+    class RateLimitedCipherSuiteAdapter(UpstreamMetricsMixin, RateLimitMixin, cloudscraper.CipherSuiteAdapter):
+        pass
+
+    scraper = cloudscraper.create_scraper()
+    base_adapter = scraper.get_adapter('https://')
+    limiter = _get_limiter(config)
+
+    def adapter_factory(pool_size):
+        return RateLimitedCipherSuiteAdapter(
+            ssl_context=base_adapter.ssl_context,
+            source_address=base_adapter.source_address,
+            pool_connections=config.POOL_CONNECTIONS,
+            pool_maxsize=pool_size,
+            max_retries=_build_retry(config),
+            limiter=limiter,
+        )
+
+    return _mount_pools(scraper, config, adapter_factory)
+
+
+def _create_redirect_session(config):
+    """Yönlendirme HEAD'leri için oturum - arama host'unun hız kovasını tüketmez"""
+    session = requests.Session()
+    adapter = MeteredHTTPAdapter(
+        pool_connections=config.POOL_CONNECTIONS,
+        pool_maxsize=config.POOL_MAXSIZE,
+        max_retries=_build_retry(config),
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _ensure_process():
+    """Fork sonrası ebeveynden kalan soketleri paylaşma"""
+    global _pid, _session, _scraper, _redirect_session
+    if _pid != os.getpid():
+        _pid = os.getpid()
+        _session = None
+        _scraper = None
+        _redirect_session = None
+
+
+def get_session(config):
+    """Süreç genelinde paylaşılan requests oturumu"""
+    global _session
+    with _lock:
+        _ensure_process()
+        if _session is None:
+            _session = _create_session(config)
+        return _session
+
+
+def get_scraper(config):
+    """Süreç genelinde paylaşılan cloudscraper oturumu (çerez/challenge durumu ortak)"""
+    global _scraper
+    with _lock:
+        _ensure_process()
+        if _scraper is None:
+            _scraper = _create_scraper(config)
+        return _scraper
+
+
+def get_redirect_session(config):
+    """Süreç genelinde paylaşılan, hız sınırlayıcısız yönlendirme oturumu (bkz. redirect_resolver)"""
+    global _redirect_session
+    with _lock:
+        _ensure_process()
+        if _redirect_session is None:
+            _redirect_session = _create_redirect_session(config)
+        return _redirect_session
+
+
+def reset():
+    """Tüm oturumları kapat - bir sonraki çağrıda yeniden oluşturulur"""
+    global _session, _scraper, _redirect_session, _limiter
+    with _lock:
+        for session in (_session, _scraper, _redirect_session):
+            if session is not None:
+                session.close()
+        _session = None
+        _scraper = None
+        _redirect_session = None
+        _limiter = None